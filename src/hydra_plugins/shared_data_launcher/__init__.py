@@ -0,0 +1 @@
+"""Hydra launcher plugin: local parallel multirun that shares generated data between jobs."""
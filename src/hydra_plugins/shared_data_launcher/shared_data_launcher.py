@@ -0,0 +1,185 @@
+"""``hydra/launcher=shared_data``: run multirun jobs on a local process pool, sharing their data.
+
+Before any job starts, every job config is composed and the ground truths and validation logs
+the jobs will draw are grouped by fingerprint (see ``synthetic.shared_data``). Each distinct
+ground truth is computed once into ``<shared_dir>/ground_truth`` and every validation log needed
+by several jobs is generated once into ``<shared_dir>/datasets``, where jobs open it as a
+memory-mapped ``.npy`` file. The jobs then run concurrently on at most ``n_jobs`` processes.
+With ``execution.backend=processes`` each job's pool is capped at ``cpu_count // n_jobs`` cores
+(``execution.n_workers`` is lowered to fit), so nested pools do not oversubscribe the machine.
+
+The launcher is opt-in (not in the ``config.yaml`` defaults). Hydra imports this module at
+startup for every run, so it must stay cheap to import.
+"""
+
+import copy
+import logging
+import os
+import re
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, cast
+
+from hydra.core.config_store import ConfigStore
+from hydra.core.hydra_config import HydraConfig
+from hydra.core.singleton import Singleton
+from hydra.core.utils import JobReturn, configure_log, filter_overrides, run_job, setup_globals
+from hydra.plugins.launcher import Launcher
+from hydra.types import HydraContext, TaskFunction
+from omegaconf import DictConfig, OmegaConf, open_dict
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class SharedDataLauncherConf:
+    _target_: str = (
+        "hydra_plugins.shared_data_launcher.shared_data_launcher.SharedDataLauncher"
+    )
+    # worker processes for data preparation and for jobs; null: os.cpu_count()
+    n_jobs: int | None = None
+    # where shared ground truths and logs are written; null: <hydra.sweep.dir>/shared
+    shared_dir: str | None = None
+
+
+ConfigStore.instance().store(
+    group="hydra/launcher", name="shared_data", node=SharedDataLauncherConf, provider="synthetic"
+)
+
+
+def _app_container(sweep_config: DictConfig) -> dict[str, Any]:
+    app_config = copy.deepcopy(sweep_config)
+    with open_dict(app_config):
+        del app_config["hydra"]
+    container = OmegaConf.to_container(app_config, resolve=True)
+    return cast(dict[str, Any], container)
+
+
+def _execute_job(
+    idx: int,
+    overrides: Sequence[str],
+    hydra_context: HydraContext,
+    config: DictConfig,
+    task_function: TaskFunction,
+    singleton_state: dict[Any, Any],
+) -> JobReturn:
+    setup_globals()
+    Singleton.set_state(singleton_state)
+    sweep_config = hydra_context.config_loader.load_sweep_config(config, list(overrides))
+    with open_dict(sweep_config):
+        sweep_config.hydra.job.id = f"{sweep_config.hydra.job.name}_{idx}"
+        sweep_config.hydra.job.num = idx
+    HydraConfig.instance().set_config(sweep_config)
+    return run_job(
+        hydra_context=hydra_context,
+        task_function=task_function,
+        config=sweep_config,
+        job_dir_key="hydra.sweep.dir",
+        job_subdir_key="hydra.sweep.subdir",
+    )
+
+
+def _quoted(value: str) -> str:
+    """``value`` as a single-quoted Hydra override value; quotes and backslashes are escaped."""
+    # only backslashes before a quote or at the end are escapes in a quoted Hydra string
+    value = re.sub(r"(\\*)'", lambda m: m[1] * 2 + "\\'", value)
+    value = re.sub(r"(\\+)$", lambda m: m[1] * 2, value)
+    return f"'{value}'"
+
+
+class SharedDataLauncher(Launcher):
+    def __init__(self, n_jobs: int | None = None, shared_dir: str | None = None) -> None:
+        if n_jobs is not None and n_jobs < 1:
+            raise ValueError(f"`n_jobs` must be positive, but {n_jobs} is given")
+        self.n_jobs = n_jobs
+        self.shared_dir = shared_dir
+        self.config: DictConfig | None = None
+        self.task_function: TaskFunction | None = None
+        self.hydra_context: HydraContext | None = None
+
+    def setup(
+        self,
+        *,
+        hydra_context: HydraContext,
+        task_function: TaskFunction,
+        config: DictConfig,
+    ) -> None:
+        self.config = config
+        self.hydra_context = hydra_context
+        self.task_function = task_function
+
+    def _sharing_overrides(
+        self, sweep_config: DictConfig, shared_dir: Path, n_jobs: int
+    ) -> list[str]:
+        overrides = [f"ground_truth.cache_dir={_quoted(str(shared_dir / 'ground_truth'))}"]
+        if sweep_config.dataset_cache.dir is None:
+            # jobs read the shared logs but keep their own, unshared ones in memory
+            overrides += [
+                f"dataset_cache.dir={_quoted(str(shared_dir / 'datasets'))}",
+                "dataset_cache.write=false",
+            ]
+        execution = sweep_config.execution
+        if execution.backend == "processes":
+            # every job starts its own pool: split the cores between the n_jobs concurrent jobs
+            cores_per_job = max(1, (os.cpu_count() or 1) // n_jobs)
+            max_workers = max(1, cores_per_job // int(execution.blas_threads))
+            if execution.n_workers is None or int(execution.n_workers) > max_workers:
+                overrides.append(f"execution.n_workers={max_workers}")
+        return overrides
+
+    def launch(
+        self, job_overrides: Sequence[Sequence[str]], initial_job_idx: int
+    ) -> Sequence[JobReturn]:
+        from joblib import Parallel, delayed
+
+        from synthetic.shared_data import plan_shared_data, prepare_shared_task
+
+        setup_globals()
+        assert self.hydra_context is not None
+        assert self.config is not None
+        assert self.task_function is not None
+
+        configure_log(self.config.hydra.hydra_logging, self.config.hydra.verbose)
+        sweep_dir = Path(str(self.config.hydra.sweep.dir)).resolve()
+        sweep_dir.mkdir(parents=True, exist_ok=True)
+        shared_dir = Path(self.shared_dir).resolve() if self.shared_dir else sweep_dir / "shared"
+        n_jobs = min(self.n_jobs or os.cpu_count() or 1, max(len(job_overrides), 1))
+
+        jobs: list[list[str]] = []
+        app_configs: list[dict[str, Any]] = []
+        for overrides in job_overrides:
+            sweep_config = self.hydra_context.config_loader.load_sweep_config(
+                self.config, list(overrides)
+            )
+            job = list(overrides) + self._sharing_overrides(sweep_config, shared_dir, n_jobs)
+            jobs.append(job)
+            app_configs.append(
+                _app_container(
+                    self.hydra_context.config_loader.load_sweep_config(self.config, job)
+                )
+            )
+
+        tasks = plan_shared_data(app_configs)
+        log.info(
+            f"Preparing {len(tasks)} shared ground truths / logs in {shared_dir} "
+            f"on {n_jobs} processes"
+        )
+        Parallel(n_jobs=n_jobs, backend="loky")(delayed(prepare_shared_task)(t) for t in tasks)
+
+        log.info(f"Launching {len(jobs)} jobs locally on {n_jobs} processes")
+        for idx, overrides in enumerate(job_overrides):
+            log.info(f"\t#{initial_job_idx + idx} : {' '.join(filter_overrides(overrides))}")
+        singleton_state = Singleton.get_state()
+        runs: list[JobReturn] = Parallel(n_jobs=n_jobs, backend="loky")(
+            delayed(_execute_job)(
+                initial_job_idx + idx,
+                job,
+                self.hydra_context,
+                self.config,
+                self.task_function,
+                singleton_state,
+            )
+            for idx, job in enumerate(jobs)
+        )
+        return runs
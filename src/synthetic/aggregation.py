@@ -0,0 +1,109 @@
+"""MSE / squared bias / variance of OPE estimates, streamed per seed or laid out per seed."""
+
+from __future__ import annotations
+
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from synthetic.result_store import sweep_key
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+
+@dataclass
+class RunningMoments:
+    """Welford running mean and sum of squared deviations of a scalar stream."""
+
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+
+    def update(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    @property
+    def variance(self) -> float:
+        """Population variance (``ddof=0``), as in the per-seed decomposition of the MSE."""
+        return self.m2 / self.count if self.count else float("nan")
+
+
+class EstimateAggregator:
+    """Per (sweep value, estimator) accuracy of the estimates seen so far, in O(1) memory each.
+
+    ``update`` folds in the estimates of one seed; ``summary`` can be called at any time and
+    returns one row per sweep value and estimator with the columns ``plots.plot_line`` reads:
+    ``se`` (MSE), ``bias`` (squared bias) and ``variance`` (across seeds), plus the mean
+    estimate ``value`` and ``n_seeds``. ``se == bias + variance`` holds exactly in exact
+    arithmetic. The summary does not depend on the order of the updates beyond float rounding.
+    """
+
+    def __init__(self, x_col: str) -> None:
+        self.x_col = x_col
+        self._sweep_values: dict[str, Any] = {}
+        self._policy_values: dict[str, float] = {}
+        self._moments: dict[str, dict[str, RunningMoments]] = {}
+
+    def set_policy_value(self, sweep_value: Any, policy_value: float) -> None:
+        key = sweep_key(sweep_value)
+        self._sweep_values.setdefault(key, sweep_value)
+        self._policy_values[key] = float(policy_value)
+        self._moments.setdefault(key, {})
+
+    def update(self, sweep_value: Any, estimates: Mapping[str, float]) -> None:
+        key = sweep_key(sweep_value)
+        if key not in self._policy_values:
+            raise KeyError(f"No policy value set for sweep value {sweep_value!r}")
+        moments = self._moments[key]
+        for est, value in estimates.items():
+            moments.setdefault(est, RunningMoments()).update(float(value))
+
+    def summary(self) -> DataFrame:
+        from pandas import DataFrame
+
+        rows = []
+        for key, moments in self._moments.items():
+            policy_value = self._policy_values[key]
+            for est, m in moments.items():
+                bias = (policy_value - m.mean) ** 2
+                rows.append(
+                    {
+                        "est": est,
+                        "value": m.mean,
+                        self.x_col: self._sweep_values[key],
+                        "se": bias + m.variance,
+                        "bias": bias,
+                        "variance": m.variance,
+                        "n_seeds": m.count,
+                    }
+                )
+        columns = ["est", "value", self.x_col, "se", "bias", "variance", "n_seeds"]
+        return DataFrame(rows, columns=columns)
+
+
+def per_seed_frame(
+    estimates: Sequence[Mapping[str, float]], policy_value: float, x_col: str, x_value: Any
+) -> DataFrame:
+    """One row per seed and estimator with per-seed ``se``, ``bias`` and ``variance`` terms.
+
+    The long format of ``df/result_df.csv``: averaging each column per estimator gives the
+    ``EstimateAggregator`` summary, while ``plots.plot_line`` draws the seed bootstrap band
+    around that mean. The frame is indexed by the seed position in ``estimates``.
+    """
+    from pandas import DataFrame
+
+    result_df = (
+        DataFrame(DataFrame(list(estimates)).stack())
+        .reset_index(1)
+        .rename(columns={"level_1": "est", 0: "value"})
+    )
+    result_df[x_col] = x_value
+    mean = result_df.groupby("est")["value"].transform("mean")
+    result_df["se"] = (result_df["value"] - policy_value) ** 2
+    result_df["bias"] = (policy_value - mean) ** 2
+    result_df["variance"] = (result_df["value"] - mean) ** 2
+    return result_df
@@ -0,0 +1,104 @@
+"""Map config keys to the base regressors of the DM/DR and MDR reward models (YAML-friendly).
+
+Every factory takes ``(random_state, dim_context)``: the design matrices of
+``obp.ope.RegressionModel`` and ``RegressionModelMDR`` start with the ``dim_context`` context
+columns, followed by integer category codes (action context, and the embedding for MDR).
+
+- ``random_forest``: the paper's ``RandomForestRegressor(n_estimators=10, max_samples=0.8)``.
+- ``random_forest_threaded``: the same forest with its trees fitted and evaluated on all cores;
+  the estimates are identical to ``random_forest``. Meant for ``execution.backend=serial``,
+  since worker processes already occupy the cores.
+- ``hist_gradient_boosting``: ``HistGradientBoostingRegressor`` (binned features, category
+  codes treated as ordinal).
+- ``one_hot_ridge``: closed-form ridge on the context and one-hot category codes.
+"""
+
+from collections.abc import Callable
+
+import numpy as np
+from sklearn.base import BaseEstimator, RegressorMixin
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor  # type: ignore
+
+
+class OneHotRidgeRegressor(RegressorMixin, BaseEstimator):
+    """Ridge regression on ``[X[:, :n_continuous], one_hot(X[:, n_continuous:])]``.
+
+    The trailing columns hold integer category codes; each is one-hot encoded with the
+    categories seen in ``fit`` (unseen codes contribute nothing). The normal equations are
+    solved in closed form with an unpenalized intercept, and ``predict`` adds up per-category
+    coefficients instead of materializing the one-hot matrix, so it costs
+    ``O(n_rows * n_features)``.
+    """
+
+    def __init__(self, n_continuous: int = 0, alpha: float = 1.0) -> None:
+        self.n_continuous = n_continuous
+        self.alpha = alpha
+
+    def _codes(self, X: np.ndarray) -> np.ndarray:
+        return np.asarray(X[:, self.n_continuous :], dtype=np.int64)
+
+    def fit(
+        self, X: np.ndarray, y: np.ndarray, sample_weight: np.ndarray | None = None
+    ) -> "OneHotRidgeRegressor":
+        X = np.asarray(X, dtype=np.float64)
+        codes = self._codes(X)
+        if codes.size and codes.min() < 0:
+            raise ValueError("Category codes must be non-negative")
+        self.n_categories_ = codes.max(axis=0) + 1 if codes.size else np.zeros(0, dtype=np.int64)
+        self.offsets_ = np.r_[0, np.cumsum(self.n_categories_)[:-1]].astype(np.int64)
+        n_one_hot = int(self.n_categories_.sum())
+        design = np.zeros((X.shape[0], 1 + self.n_continuous + n_one_hot))
+        design[:, 0] = 1.0
+        design[:, 1 : 1 + self.n_continuous] = X[:, : self.n_continuous]
+        rows = np.arange(X.shape[0])[:, np.newaxis]
+        design[rows, 1 + self.n_continuous + self.offsets_ + codes] = 1.0
+        weighted = design if sample_weight is None else design * sample_weight[:, np.newaxis]
+        gram = weighted.T @ design
+        penalized = np.arange(1, gram.shape[0])
+        gram[penalized, penalized] += self.alpha
+        coef = np.linalg.lstsq(gram, weighted.T @ y, rcond=None)[0]
+        self.intercept_ = float(coef[0])
+        self.coef_continuous_ = coef[1 : 1 + self.n_continuous]
+        self.coef_categorical_ = coef[1 + self.n_continuous :]
+        return self
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        codes = self._codes(X)
+        pred = np.asarray(X[:, : self.n_continuous], dtype=np.float64) @ self.coef_continuous_
+        pred += self.intercept_
+        for j, (n_cats, offset) in enumerate(zip(self.n_categories_, self.offsets_, strict=True)):
+            seen = codes[:, j] < n_cats
+            pred[seen] += self.coef_categorical_[offset + codes[seen, j]]
+        return np.asarray(pred)
+
+
+def _random_forest(random_state: int, dim_context: int) -> BaseEstimator:
+    return RandomForestRegressor(n_estimators=10, max_samples=0.8, random_state=random_state)
+
+
+def _random_forest_threaded(random_state: int, dim_context: int) -> BaseEstimator:
+    return RandomForestRegressor(
+        n_estimators=10, max_samples=0.8, n_jobs=-1, random_state=random_state
+    )
+
+
+def _hist_gradient_boosting(random_state: int, dim_context: int) -> BaseEstimator:
+    return HistGradientBoostingRegressor(max_iter=100, random_state=random_state)
+
+
+def _one_hot_ridge(random_state: int, dim_context: int) -> BaseEstimator:
+    return OneHotRidgeRegressor(n_continuous=dim_context, alpha=1.0)
+
+
+BASE_MODELS: dict[str, Callable[[int, int], BaseEstimator]] = {
+    "random_forest": _random_forest,
+    "random_forest_threaded": _random_forest_threaded,
+    "hist_gradient_boosting": _hist_gradient_boosting,
+    "one_hot_ridge": _one_hot_ridge,
+}
+
+
+def make_base_model(key: str, random_state: int, dim_context: int) -> BaseEstimator:
+    if key not in BASE_MODELS:
+        raise ValueError(f"Unknown base_model {key!r}; choose one of {sorted(BASE_MODELS)}")
+    return BASE_MODELS[key](random_state, dim_context)
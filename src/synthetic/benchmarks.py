@@ -0,0 +1,294 @@
+"""Benchmarks of the data-generation and OPE hot paths, with JSON baselines and a compare command.
+
+Usage::
+
+    python -m synthetic.benchmarks run --scale faster --experiment beta --output bench.json
+    python -m synthetic.benchmarks compare benchmarks/baselines/faster_beta.json bench.json
+
+``run_ope[<key>]`` repeats ``run_ope`` with every other ``base_model_registry`` regressor, so
+the per-seed wall time and peak memory of the regression backends can be compared.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable, Sequence
+from dataclasses import asdict, dataclass
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from hydra import compose, initialize_config_dir
+from omegaconf import DictConfig
+
+from synthetic.aggregation import EstimateAggregator
+from synthetic.base_model_registry import BASE_MODELS, make_base_model
+from synthetic.experiment_runner import build_dataset_and_rounds, seed_random_state
+from synthetic.ope import _marginal_embedding_weights, run_ope
+from synthetic.policy import EpsGreedyPolicy
+from synthetic.regression_model_mdr import RegressionModelMDR
+
+CONFIG_DIR = Path(__file__).resolve().parent / "hydra_conf"
+BENCHMARK_FORMAT_VERSION = 1
+_N_FOLDS = 2
+
+
+@dataclass
+class BenchmarkResult:
+    wall_time_s: float
+    throughput: float
+    throughput_unit: str
+    peak_memory_bytes: int
+
+
+@dataclass
+class _Case:
+    """A hot path: ``fn()`` does the work; it processes ``n_items`` of ``unit`` per call."""
+
+    fn: Callable[[], Any]
+    n_items: int
+    unit: str
+
+
+def load_config(scale: str, experiment: str, overrides: Sequence[str] = ()) -> DictConfig:
+    with initialize_config_dir(config_dir=str(CONFIG_DIR), version_base=None):
+        return compose(
+            config_name="config",
+            overrides=[f"scale={scale}", f"experiment={experiment}", *overrides],
+        )
+
+
+def _mdr_model(dataset: Any, feedback: dict[str, Any], random_state: int) -> RegressionModelMDR:
+    return RegressionModelMDR(
+        n_actions=dataset.n_actions,
+        action_context=feedback["action_context"],
+        base_model=make_base_model("random_forest", random_state, feedback["context"].shape[1]),
+        dtype=str(dataset.dtype),
+    )
+
+
+def _aggregate(seed_estimates: list[dict[str, float]]) -> Any:
+    aggregator = EstimateAggregator("x")
+    aggregator.set_policy_value(0, 0.0)
+    for estimates in seed_estimates:
+        aggregator.update(0, estimates)
+    return aggregator.summary()
+
+
+def build_cases(cfg: DictConfig) -> dict[str, _Case]:
+    """Hot paths on the first sweep value of ``cfg.experiment`` with ``n_train`` logged rounds."""
+    sweep_value = list(cfg.experiment.sweep_values)[0]
+    random_state = int(cfg.random_state)
+    n_seeds = int(cfg.n_seeds)
+    dataset, policy_eps, n_val = build_dataset_and_rounds(cfg, sweep_value)
+
+    def generate() -> dict[str, Any]:
+        dataset.random_ = seed_random_state(random_state, 0)
+        return dict(dataset.obtain_batch_bandit_feedback(n_rounds=n_val))
+
+    feedback = generate()
+    policy = EpsGreedyPolicy.from_expected_reward(
+        feedback["expected_reward"], is_optimal=bool(cfg.policy.is_optimal), eps=policy_eps
+    )
+    mdr_kwargs = dict(
+        context=feedback["context"],
+        action=feedback["action"],
+        embedding=feedback["action_embed"],
+        reward=feedback["reward"],
+        n_folds=_N_FOLDS,
+        random_state=random_state,
+    )
+    fitted_mdr = _mdr_model(dataset, feedback, random_state)
+    fitted_mdr.fit(
+        context=feedback["context"],
+        action=feedback["action"],
+        embedding=feedback["action_embed"],
+        reward=feedback["reward"],
+    )
+    seed_estimates = [
+        {name: float(v) for name, v in zip(("IPS", "DR", "DM", "MIPS", "MDR"), row, strict=True)}
+        for row in np.random.RandomState(random_state).normal(size=(n_seeds, 5))
+    ]
+
+    def ope(base_model: str = "random_forest") -> Any:
+        return run_ope(
+            dataset=dataset,
+            round=0,
+            val_bandit_data=feedback,
+            action_dist_val=policy,
+            random_state=random_state,
+            estimator_backend=str(cfg.estimator_backend),
+            base_model=base_model,
+            factorize_q_hat=bool(cfg.regression.factorize_q_hat),
+        )
+
+    cases = {
+        "obtain_batch_bandit_feedback": _Case(generate, n_val, "rounds/s"),
+        "marginal_embedding_weights": _Case(
+            lambda: _marginal_embedding_weights(
+                feedback["pi_b"], policy, feedback["p_e_a"], feedback["action_embed"]
+            ),
+            n_val,
+            "rounds/s",
+        ),
+        "regression_model_mdr_fit_predict": _Case(
+            lambda: _mdr_model(dataset, feedback, random_state).fit_predict(**mdr_kwargs),
+            _N_FOLDS,
+            "fits/s",
+        ),
+        "regression_model_mdr_predict": _Case(
+            lambda: fitted_mdr.predict(
+                context=feedback["context"], embedding=feedback["action_embed"]
+            ),
+            n_val,
+            "rounds/s",
+        ),
+        "run_ope": _Case(ope, n_val, "rounds/s"),
+        "aggregate_estimates": _Case(lambda: _aggregate(seed_estimates), n_seeds, "seeds/s"),
+    }
+    for key in BASE_MODELS:
+        if key != "random_forest":
+            cases[f"run_ope[{key}]"] = _Case(partial(ope, key), n_val, "rounds/s")
+    return cases
+
+
+def measure(case: _Case, repeats: int) -> BenchmarkResult:
+    """Best-of-``repeats`` wall time; peak traced memory from one extra (slower) traced call."""
+    if repeats < 1:
+        raise ValueError(f"`repeats` must be positive, but {repeats} is given")
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        case.fn()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        case.fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    wall_time = min(times)
+    return BenchmarkResult(
+        wall_time_s=wall_time,
+        throughput=case.n_items / wall_time if wall_time > 0 else float("inf"),
+        throughput_unit=case.unit,
+        peak_memory_bytes=int(peak),
+    )
+
+
+def run_benchmarks(
+    scale: str,
+    experiment: str,
+    overrides: Sequence[str] = (),
+    repeats: int = 3,
+    only: Sequence[str] | None = None,
+) -> dict[str, Any]:
+    cfg = load_config(scale, experiment, overrides)
+    cases = build_cases(cfg)
+    if only:
+        unknown = sorted(set(only) - set(cases))
+        if unknown:
+            raise ValueError(f"Unknown benchmarks {unknown}; choose from {sorted(cases)}")
+        cases = {name: case for name, case in cases.items() if name in only}
+    results = {name: asdict(measure(case, repeats)) for name, case in cases.items()}
+    return {
+        "format_version": BENCHMARK_FORMAT_VERSION,
+        "config": {
+            "scale": scale,
+            "experiment": experiment,
+            "overrides": list(overrides),
+            "repeats": repeats,
+        },
+        "machine": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def compare(
+    baseline: dict[str, Any], current: dict[str, Any], threshold: float = 0.2
+) -> list[str]:
+    """Describe every benchmark that is more than ``threshold`` (relative) slower or larger.
+
+    Wall time and peak memory are compared; benchmarks present in only one file are skipped.
+    """
+    if threshold < 0:
+        raise ValueError(f"`threshold` must be non-negative, but {threshold} is given")
+    regressions = []
+    for name, base in sorted(baseline["results"].items()):
+        cur = current["results"].get(name)
+        if cur is None:
+            continue
+        for metric in ("wall_time_s", "peak_memory_bytes"):
+            if base[metric] > 0 and cur[metric] > base[metric] * (1 + threshold):
+                ratio = cur[metric] / base[metric]
+                regressions.append(
+                    f"{name}.{metric}: {base[metric]:.4g} -> {cur[metric]:.4g} ({ratio:.2f}x)"
+                )
+    return regressions
+
+
+def _format_table(report: dict[str, Any]) -> str:
+    lines = [f"{'benchmark':<36}{'wall [s]':>12}{'throughput':>20}{'peak [MiB]':>12}"]
+    for name, r in report["results"].items():
+        throughput = f"{r['throughput']:.4g} {r['throughput_unit']}"
+        lines.append(
+            f"{name:<36}{r['wall_time_s']:>12.4g}{throughput:>20}"
+            f"{r['peak_memory_bytes'] / 2**20:>12.2f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m synthetic.benchmarks", description=__doc__)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_p = sub.add_parser("run", help="run the benchmarks and write a JSON report")
+    run_p.add_argument("--scale", default="fastest", help="hydra_conf/scale/<name>.yaml")
+    run_p.add_argument("--experiment", default="beta", help="hydra_conf/experiment/<name>.yaml")
+    run_p.add_argument("--repeats", type=int, default=3)
+    run_p.add_argument("--only", nargs="+", default=None, help="subset of benchmark names")
+    run_p.add_argument("--output", type=Path, default=None, help="JSON file to write")
+    run_p.add_argument("overrides", nargs="*", help="extra Hydra overrides, e.g. dataset.n_actions=500")
+
+    cmp_p = sub.add_parser("compare", help="flag regressions of CURRENT against BASELINE")
+    cmp_p.add_argument("baseline", type=Path)
+    cmp_p.add_argument("current", type=Path)
+    cmp_p.add_argument("--threshold", type=float, default=0.2, help="allowed relative slowdown")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        report = run_benchmarks(
+            args.scale, args.experiment, args.overrides, repeats=args.repeats, only=args.only
+        )
+        print(_format_table(report))
+        if args.output is not None:
+            args.output.parent.mkdir(parents=True, exist_ok=True)
+            args.output.write_text(json.dumps(report, indent=2) + "\n")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())
+    current = json.loads(args.current.read_text())
+    regressions = compare(baseline, current, threshold=args.threshold)
+    for name in sorted(set(current["results"]) - set(baseline["results"])):
+        print(f"NO BASELINE {name} (not compared; regenerate the baseline to include it)")
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if not regressions:
+        print(f"no regressions beyond {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
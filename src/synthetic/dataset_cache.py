@@ -0,0 +1,126 @@
+"""Opt-in on-disk cache of ``obtain_batch_bandit_feedback`` output, reopened with ``mmap_mode``."""
+
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+from synthetic.policy import SparseRowPolicy
+
+if TYPE_CHECKING:
+    from obp.types import BanditFeedback
+
+    from synthetic.synthetic_bandit_with_action_embeds import (
+        SyntheticBanditDatasetWithActionEmbeds,
+    )
+
+# Bump when the generator or the on-disk layout changes so stale entries are not reused.
+CACHE_FORMAT_VERSION = 2
+
+_META_FILE = "meta.json"
+_RNG_KEYS_FILE = "rng_keys.npy"
+
+
+def _describe(value: Any) -> Any:
+    if callable(value):
+        return f"{getattr(value, '__module__', '?')}.{getattr(value, '__qualname__', repr(value))}"
+    if isinstance(value, np.ndarray):
+        digest = hashlib.blake2b(np.ascontiguousarray(value).tobytes(), digest_size=20)
+        return ["ndarray", value.dtype.str, list(value.shape), digest.hexdigest()]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def dataset_cache_key(dataset: SyntheticBanditDatasetWithActionEmbeds, n_rounds: int) -> str:
+    """Hash of the dataset fields, the current RNG state and ``n_rounds``."""
+    h = hashlib.blake2b(digest_size=20)
+    fields = {f.name: _describe(getattr(dataset, f.name)) for f in dataclasses.fields(dataset)}
+    h.update(json.dumps([CACHE_FORMAT_VERSION, n_rounds, fields], sort_keys=True).encode())
+    name, keys, pos, has_gauss, cached_gaussian = dataset.random_.get_state()
+    h.update(json.dumps([name, int(pos), int(has_gauss), float(cached_gaussian)]).encode())
+    h.update(np.ascontiguousarray(keys).tobytes())
+    return h.hexdigest()
+
+
+def _save_entry(
+    entry_dir: Path, feedback: BanditFeedback, rng_state: tuple[Any, ...]
+) -> None:
+    entry_dir.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(prefix=f".{entry_dir.name}.", dir=entry_dir.parent))
+    try:
+        scalars: dict[str, Any] = {}
+        sparse: dict[str, int] = {}
+        for name, value in feedback.items():
+            if isinstance(value, np.ndarray):
+                np.save(tmp_dir / f"{name}.npy", value)
+            elif isinstance(value, SparseRowPolicy):
+                np.save(tmp_dir / f"{name}.indices.npy", value.indices)
+                np.save(tmp_dir / f"{name}.probs.npy", value.probs)
+                sparse[name] = value.n_actions
+            else:
+                scalars[name] = value
+        rng_name, keys, pos, has_gauss, cached_gaussian = rng_state
+        np.save(tmp_dir / _RNG_KEYS_FILE, keys)
+        meta = {
+            "scalars": scalars,
+            "sparse_policies": sparse,
+            "rng_state": [rng_name, int(pos), int(has_gauss), float(cached_gaussian)],
+        }
+        (tmp_dir / _META_FILE).write_text(json.dumps(meta))
+        os.replace(tmp_dir, entry_dir)
+    except OSError:
+        # another process published the same entry first, or the disk is full: not fatal
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _load_entry(entry_dir: Path) -> tuple[dict[str, Any], tuple[Any, ...]]:
+    meta = json.loads((entry_dir / _META_FILE).read_text())
+    feedback: dict[str, Any] = dict(meta["scalars"])
+    for path in entry_dir.glob("*.npy"):
+        if path.name != _RNG_KEYS_FILE and "." not in path.stem:
+            feedback[path.stem] = np.load(path, mmap_mode="r")
+    for name, n_actions in meta["sparse_policies"].items():
+        feedback[name] = SparseRowPolicy(
+            indices=np.load(entry_dir / f"{name}.indices.npy", mmap_mode="r"),
+            probs=np.load(entry_dir / f"{name}.probs.npy", mmap_mode="r"),
+            n_actions=n_actions,
+        )
+    rng_name, pos, has_gauss, cached_gaussian = meta["rng_state"]
+    rng_state = (rng_name, np.load(entry_dir / _RNG_KEYS_FILE), pos, has_gauss, cached_gaussian)
+    return feedback, rng_state
+
+
+def cached_batch_bandit_feedback(
+    dataset: SyntheticBanditDatasetWithActionEmbeds,
+    n_rounds: int,
+    cache_dir: str | Path | None,
+    write: bool = True,
+) -> BanditFeedback:
+    """``dataset.obtain_batch_bandit_feedback(n_rounds)``, reusing a cached draw when possible.
+
+    Entries are keyed by ``dataset_cache_key``; on a hit the arrays are opened read-only with
+    ``mmap_mode="r"`` (loaded lazily by the OS) and ``dataset.random_`` is advanced to the state
+    the generator would have left it in, so later draws are unchanged by the cache.
+    With ``cache_dir=None`` this is exactly ``obtain_batch_bandit_feedback``; with
+    ``write=False`` existing entries are reused but a miss is not saved.
+    """
+    if cache_dir is None:
+        return dataset.obtain_batch_bandit_feedback(n_rounds=n_rounds)
+    entry_dir = Path(cache_dir) / dataset_cache_key(dataset, n_rounds)
+    if (entry_dir / _META_FILE).exists():
+        feedback, rng_state = _load_entry(entry_dir)
+        dataset.random_.set_state(rng_state)
+        return feedback
+    feedback = dataset.obtain_batch_bandit_feedback(n_rounds=n_rounds)
+    if write:
+        _save_entry(entry_dir, feedback, dataset.random_.get_state())
+    return feedback
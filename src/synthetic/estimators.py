@@ -0,0 +1,201 @@
+"""IPS, DM, DR, MIPS and MDR written directly against NumPy arrays.
+
+Every function reduces over the last axis (rounds), so the same code evaluates one log of
+shape ``(n,)`` or ``S`` stacked replicates of shape ``(S, n)`` in one vectorized pass.
+The inputs are the per-round quantities the estimators are built from:
+
+- ``reward``, ``pscore``: observed reward :math:`r_i` and :math:`\\pi_b(a_i|x_i)`;
+- ``pi_e_factual``: :math:`\\pi_e(a_i|x_i)`;
+- ``q_pi``: :math:`\\sum_a \\pi_e(a|x_i) \\hat{q}(x_i,a)`;
+- ``q_hat_factual``: :math:`\\hat{q}(x_i,a_i)`;
+- ``w_x_e``: marginal embedding weight :math:`p(e_i|x_i,\\pi_e) / p(e_i|x_i,\\pi_b)`;
+- ``q_hat_mdr_factual``: the MDR regression :math:`\\hat{q}(x_i,a_i,e_i)`.
+
+``q_pi`` and ``q_hat_factual`` are read from a dense ``(n, n_actions[, 1])`` ``q_hat`` or a
+``FactorizedQHat`` by ``policy_expected_reward`` and ``factual_expected_reward``.
+"""
+
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+from synthetic.policy import EpsGreedyPolicy
+
+ESTIMATOR_NAMES = ("IPS", "DR", "DM", "MIPS", "MDR")
+
+
+@dataclass
+class FactorizedQHat:
+    """Reward predictions :math:`\\hat{q}(x_i,a)` that depend on ``a`` only through its context.
+
+    ``values[i, u]`` is the prediction for round ``i`` and the ``u``-th distinct action-context
+    row, and action ``a`` has row ``context_index[a]``. This takes ``n_rounds * n_unique``
+    floats instead of ``n_rounds * n_actions``; the DM value and the DR correction are computed
+    from it directly and ``to_dense`` expands it to ``(n_rounds, n_actions, 1)``.
+    """
+
+    values: np.ndarray
+    context_index: np.ndarray
+
+    @property
+    def n_rounds(self) -> int:
+        return int(self.values.shape[0])
+
+    @property
+    def n_actions(self) -> int:
+        return int(self.context_index.shape[0])
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.values.nbytes + self.context_index.nbytes)
+
+    def setflags(self, write: bool) -> None:
+        self.values.setflags(write=write)
+        self.context_index.setflags(write=write)
+
+    def factual(self, action: np.ndarray) -> np.ndarray:
+        """:math:`\\hat{q}(x_i,a_i)`."""
+        return np.asarray(self.values[np.arange(action.shape[0]), self.context_index[action]])
+
+    def policy_value(self, action_dist: Any, chunk_size: int = 1024) -> np.ndarray:
+        """:math:`\\sum_a \\pi(a|x_i) \\hat{q}(x_i,a)` for an ``EpsGreedyPolicy`` or a dense array.
+
+        The policy's probabilities are summed per distinct context (``chunk_size`` rows at a
+        time for a dense array), so ``values`` is never expanded to all actions.
+        """
+        n_unique = self.values.shape[1]
+        if isinstance(action_dist, EpsGreedyPolicy):
+            counts = np.bincount(self.context_index, minlength=n_unique)
+            greedy_q = self.factual(action_dist.greedy_action)
+            mean_q = self.values @ counts / self.n_actions
+            return np.asarray((1.0 - action_dist.eps) * greedy_q + action_dist.eps * mean_q)
+        if not isinstance(action_dist, np.ndarray):
+            raise TypeError(
+                "`action_dist` must be an EpsGreedyPolicy or an ndarray, "
+                f"but {type(action_dist)} is given"
+            )
+        probs = action_dist[:, :, 0] if action_dist.ndim == 3 else action_dist
+        order = np.argsort(self.context_index, kind="stable")
+        starts = np.searchsorted(self.context_index[order], np.arange(n_unique))
+        value = np.empty(self.n_rounds)
+        for start in range(0, self.n_rounds, chunk_size):
+            rows = slice(start, start + chunk_size)
+            probs_by_context = np.add.reduceat(probs[rows][:, order], starts, axis=1)
+            value[rows] = np.einsum("iu,iu->i", probs_by_context, self.values[rows])
+        return value
+
+    def to_dense(self) -> np.ndarray:
+        return np.asarray(self.values[:, self.context_index, np.newaxis])
+
+
+def check_logged_data(
+    reward: np.ndarray,
+    action: np.ndarray,
+    pscore: np.ndarray,
+    n_actions: int,
+    action_dist: Any = None,
+) -> None:
+    """Validate a log once, before any estimator reads it.
+
+    obp's ``OffPolicyEvaluation`` re-validates the log inside every estimator; the native
+    estimators in this module do no checks of their own and rely on this single pass.
+    """
+    if action.shape != reward.shape or pscore.shape != reward.shape:
+        raise ValueError(
+            "`reward`, `action` and `pscore` must have the same shape, but "
+            f"{reward.shape}, {action.shape} and {pscore.shape} are given"
+        )
+    if not np.issubdtype(action.dtype, np.integer):
+        raise ValueError(f"`action` must be integer-valued, but dtype {action.dtype} is given")
+    if action.size and (action.min() < 0 or action.max() >= n_actions):
+        raise ValueError(f"`action` must be in [0, {n_actions}), but out-of-range actions are given")
+    if np.any(pscore <= 0):
+        raise ValueError("`pscore` must be positive")
+    if isinstance(action_dist, np.ndarray):
+        probs = action_dist[..., 0] if action_dist.ndim == reward.ndim + 2 else action_dist
+        if probs.shape != (*reward.shape, n_actions):
+            raise ValueError(
+                f"`action_dist` must have shape {(*reward.shape, n_actions)}[+(1,)], "
+                f"but {action_dist.shape} is given"
+            )
+        if not np.allclose(probs.sum(axis=-1), 1.0):
+            raise ValueError("`action_dist` must sum up to 1 over actions in every round")
+
+
+def policy_factual_prob(action_dist: Any, action: np.ndarray) -> np.ndarray:
+    """:math:`\\pi_e(a_i|x_i)` for a dense ``(n, n_actions[, 1])`` array or a compact policy."""
+    if isinstance(action_dist, np.ndarray):
+        probs = action_dist[:, :, 0] if action_dist.ndim == 3 else action_dist
+        return np.asarray(probs[np.arange(action.shape[0]), action])
+    return np.asarray(action_dist.action_prob(action))
+
+
+def policy_expected_reward(action_dist: Any, q_hat: Any) -> np.ndarray:
+    """:math:`\\sum_a \\pi_e(a|x_i) \\hat{q}(x_i,a)` for a dense array or a compact policy."""
+    if isinstance(q_hat, FactorizedQHat):
+        return q_hat.policy_value(action_dist)
+    q = q_hat[:, :, 0] if q_hat.ndim == 3 else q_hat
+    if isinstance(action_dist, np.ndarray):
+        probs = action_dist[:, :, 0] if action_dist.ndim == 3 else action_dist
+        return np.asarray(np.einsum("ia,ia->i", probs, q))
+    return np.asarray(action_dist.policy_value(q))
+
+
+def factual_expected_reward(q_hat: Any, action: np.ndarray) -> np.ndarray:
+    """:math:`\\hat{q}(x_i,a_i)` from a dense ``(n, n_actions, 1)`` array or ``FactorizedQHat``."""
+    if isinstance(q_hat, FactorizedQHat):
+        return q_hat.factual(action)
+    return np.asarray(q_hat[np.arange(action.shape[0]), action, 0])
+
+
+def ips(reward: np.ndarray, pscore: np.ndarray, pi_e_factual: np.ndarray) -> np.ndarray:
+    return np.asarray(np.mean(reward * pi_e_factual / pscore, axis=-1))
+
+
+def dm(q_pi: np.ndarray) -> np.ndarray:
+    return np.asarray(np.mean(q_pi, axis=-1))
+
+
+def dr(
+    reward: np.ndarray,
+    pscore: np.ndarray,
+    pi_e_factual: np.ndarray,
+    q_pi: np.ndarray,
+    q_hat_factual: np.ndarray,
+) -> np.ndarray:
+    iw = pi_e_factual / pscore
+    return np.asarray(np.mean(q_pi + iw * (reward - q_hat_factual), axis=-1))
+
+
+def mips(reward: np.ndarray, w_x_e: np.ndarray) -> np.ndarray:
+    return np.asarray(np.mean(w_x_e * reward, axis=-1))
+
+
+def mdr(
+    reward: np.ndarray, q_pi: np.ndarray, w_x_e: np.ndarray, q_hat_mdr_factual: np.ndarray
+) -> np.ndarray:
+    """DM plus the MIPS-weighted residual of the MDR regression."""
+    return np.asarray(np.mean(q_pi + w_x_e * (reward - q_hat_mdr_factual), axis=-1))
+
+
+def estimate_all(
+    reward: np.ndarray,
+    pscore: np.ndarray,
+    pi_e_factual: np.ndarray,
+    q_pi: np.ndarray,
+    q_hat_factual: np.ndarray,
+    w_x_e: np.ndarray,
+    q_hat_mdr_factual: np.ndarray,
+) -> np.ndarray:
+    """All estimators, shape ``(..., len(ESTIMATOR_NAMES))`` in ``ESTIMATOR_NAMES`` order."""
+    return np.stack(
+        [
+            ips(reward, pscore, pi_e_factual),
+            dr(reward, pscore, pi_e_factual, q_pi, q_hat_factual),
+            dm(q_pi),
+            mips(reward, w_x_e),
+            mdr(reward, q_pi, w_x_e, q_hat_mdr_factual),
+        ],
+        axis=-1,
+    )
@@ -0,0 +1,100 @@
+"""Execution backends for independent sweep tasks (serial or a process pool)."""
+
+from __future__ import annotations
+
+import os
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from multiprocessing import get_context
+from typing import Any
+
+BACKENDS = ("serial", "processes")
+
+_BLAS_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+)
+
+
+def resolve_n_workers(n_workers: int | None, blas_threads: int) -> int:
+    """Default to one worker per ``blas_threads`` cores so the machine is not oversubscribed."""
+    if n_workers is not None:
+        if n_workers < 1:
+            raise ValueError(f"`n_workers` must be positive, but {n_workers} is given")
+        return n_workers
+    return max(1, (os.cpu_count() or 1) // blas_threads)
+
+
+@contextmanager
+def _blas_env(blas_threads: int) -> Iterator[None]:
+    """Export BLAS/OpenMP thread limits so spawned workers start with them."""
+    saved = {var: os.environ.get(var) for var in _BLAS_ENV_VARS}
+    os.environ.update({var: str(blas_threads) for var in _BLAS_ENV_VARS})
+    try:
+        yield
+    finally:
+        for var, value in saved.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+
+
+def _init_worker(blas_threads: int) -> None:
+    # Libraries already loaded while unpickling ``__main__`` ignore the env vars; clamp them too.
+    from threadpoolctl import threadpool_limits
+
+    threadpool_limits(limits=blas_threads)
+
+
+def map_tasks(
+    fn: Callable[[Any], Any],
+    tasks: Sequence[Any],
+    backend: str = "serial",
+    n_workers: int | None = None,
+    blas_threads: int = 1,
+    desc: str | None = None,
+    on_result: Callable[[int, Any], None] | None = None,
+) -> list[Any]:
+    """Apply ``fn`` to every task and return the results in task order.
+
+    ``fn`` must be a module-level function and ``tasks`` picklable when ``backend="processes"``.
+    Tasks must carry their own seeds: results then do not depend on the backend or on the
+    order in which workers finish. ``on_result(task_index, result)`` is called in this process
+    as soon as each task finishes (in completion order), e.g. to checkpoint it.
+    """
+    from tqdm import tqdm
+
+    if backend == "serial":
+        results = []
+        for i, task in enumerate(tqdm(tasks, desc=desc)):
+            results.append(fn(task))
+            if on_result is not None:
+                on_result(i, results[-1])
+        return results
+    if backend == "processes":
+        if blas_threads < 1:
+            raise ValueError(f"`blas_threads` must be positive, but {blas_threads} is given")
+        max_workers = min(resolve_n_workers(n_workers, blas_threads), max(len(tasks), 1))
+        with (
+            _blas_env(blas_threads),
+            ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(blas_threads,),
+            ) as executor,
+        ):
+            futures = {executor.submit(fn, task): i for i, task in enumerate(tasks)}
+            ordered: list[Any] = [None] * len(tasks)
+            for future in tqdm(as_completed(futures), total=len(tasks), desc=desc):
+                i = futures[future]
+                ordered[i] = future.result()
+                if on_result is not None:
+                    on_result(i, ordered[i])
+            return ordered
+    raise ValueError(f"Unknown execution backend {backend!r}; choose one of {list(BACKENDS)}")
@@ -2,27 +2,35 @@
 
 from __future__ import annotations
 
+import hashlib
+import json
+import os
 import time
 import warnings
+from functools import partial
 from logging import getLogger
 from pathlib import Path
 from typing import Any, cast
 
 import numpy as np
 import pandas as pd
-from hydra.utils import get_original_cwd
+from hydra.utils import get_original_cwd, instantiate, to_absolute_path
 from omegaconf import DictConfig, OmegaConf
-from pandas import DataFrame
 from sklearn.exceptions import ConvergenceWarning
-from tqdm import tqdm
 
-from synthetic.ope import run_ope
-from synthetic.plots import plot_line
-from synthetic.policy import gen_eps_greedy
+from synthetic.aggregation import EstimateAggregator, per_seed_frame
+from synthetic.dataset_cache import cached_batch_bandit_feedback, dataset_cache_key
+from synthetic.estimators import ESTIMATOR_NAMES
+from synthetic.execution import map_tasks
+from synthetic.fit_cache import FitCache, shared_fit_cache
+from synthetic.ope import run_ope, run_ope_batch, stack_bandit_feedback
+from synthetic.policy import EpsGreedyPolicy, eps_greedy_policy_value
+from synthetic.result_store import ResultStore, sweep_key
 from synthetic.reward_function_registry import resolve_reward_function
 from synthetic.synthetic_bandit_with_action_embeds import (
     SyntheticBanditDatasetWithActionEmbeds,
 )
+from synthetic.timing import StageTimer, StageTiming
 
 logger = getLogger(__name__)
 
@@ -64,91 +72,352 @@ def build_dataset_and_rounds(
     return dataset, policy_eps, n_val
 
 
-def summarize_estimates(
-    estimated_policy_value_list: list[dict[str, Any]],
-    policy_value: float,
-    x_col: str,
-    x_value: Any,
-) -> DataFrame:
-    result_df = (
-        DataFrame(DataFrame(estimated_policy_value_list).stack())
-        .reset_index(1)
-        .rename(columns={"level_1": "est", 0: "value"})
+def ground_truth_cache_key(cfg: DictConfig, sweep_value: Any) -> str:
+    """Fingerprint of everything ``ground_truth_policy_value`` depends on."""
+    dataset, policy_eps, _ = build_dataset_and_rounds(cfg, sweep_value)
+    streaming = bool(cfg.ground_truth.streaming)
+    h = hashlib.blake2b(digest_size=20)
+    h.update(dataset_cache_key(dataset, int(cfg.n_test)).encode())
+    h.update(
+        json.dumps(
+            [
+                policy_eps,
+                bool(cfg.policy.is_optimal),
+                streaming,
+                int(cfg.ground_truth.chunk_size) if streaming else None,
+            ]
+        ).encode()
+    )
+    return h.hexdigest()
+
+
+def validation_cache_keys(cfg: DictConfig, sweep_value: Any, n_seeds: int) -> list[str]:
+    """``dataset_cache_key`` of the validation log of each seed, as drawn by ``_run_seed_task``."""
+    dataset, _, n_val = build_dataset_and_rounds(cfg, sweep_value)
+    keys = []
+    for seed_i in range(n_seeds):
+        dataset.random_ = seed_random_state(int(cfg.random_state), seed_i)
+        keys.append(dataset_cache_key(dataset, n_val))
+    return keys
+
+
+def ground_truth_policy_value(cfg: DictConfig, sweep_value: Any) -> float:
+    """Value of the evaluation policy on ``n_test`` fresh rounds (chunked when streaming).
+
+    With ``ground_truth.cache_dir`` set, values are stored there by ``ground_truth_cache_key``
+    and reused by later runs and by other jobs of a multirun.
+    """
+    cache_dir = cfg.ground_truth.get("cache_dir")
+    if cache_dir is None:
+        return _compute_ground_truth_policy_value(cfg, sweep_value)
+    path = Path(str(cache_dir)) / f"{ground_truth_cache_key(cfg, sweep_value)}.json"
+    if path.exists():
+        return float(json.loads(path.read_text())["policy_value"])
+    policy_value = _compute_ground_truth_policy_value(cfg, sweep_value)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}")
+    tmp_path.write_text(json.dumps({"policy_value": policy_value}))
+    os.replace(tmp_path, path)
+    return policy_value
+
+
+def _compute_ground_truth_policy_value(cfg: DictConfig, sweep_value: Any) -> float:
+    dataset, policy_eps, _ = build_dataset_and_rounds(cfg, sweep_value)
+    is_optimal = bool(cfg.policy.is_optimal)
+    if bool(cfg.ground_truth.streaming):
+        return dataset.calc_ground_truth_policy_value_streaming(
+            n_rounds=int(cfg.n_test),
+            policy_value_fn=partial(eps_greedy_policy_value, is_optimal=is_optimal, eps=policy_eps),
+            chunk_size=int(cfg.ground_truth.chunk_size),
+        )
+
+    test_bandit_data = cached_batch_bandit_feedback(
+        dataset,
+        n_rounds=int(cfg.n_test),
+        cache_dir=cfg.dataset_cache.dir,
+        write=bool(cfg.dataset_cache.write),
+    )
+    action_dist_test = EpsGreedyPolicy.from_expected_reward(
+        expected_reward=test_bandit_data["expected_reward"],
+        is_optimal=is_optimal,
+        eps=policy_eps,
+    )
+    return dataset.calc_ground_truth_policy_value(
+        expected_reward=test_bandit_data["expected_reward"],
+        action_dist=action_dist_test,
+    )
+
+
+def seed_random_state(random_state: int, seed_i: int) -> np.random.RandomState:
+    """RNG for the validation log of seed ``seed_i``; independent of execution order."""
+    return np.random.RandomState([random_state, seed_i])
+
+
+def _fit_cache(cfg: DictConfig) -> FitCache | None:
+    if not bool(cfg.fit_cache.enabled):
+        return None
+    return shared_fit_cache(int(cfg.fit_cache.max_bytes), cfg.fit_cache.dir)
+
+
+def _run_seed_task(
+    task: tuple[dict[str, Any], Any, int],
+) -> tuple[dict[str, Any], list[StageTiming]]:
+    """Draw the validation log for one (sweep value, seed); return its OPE estimates and timings."""
+    cfg_container, sweep_value, seed_i = task
+    cfg = OmegaConf.create(cfg_container)
+    random_state = int(cfg.random_state)
+    timer = StageTimer(sweep_value=sweep_value, seed=seed_i)
+    with timer.stage("data_generation"):
+        dataset, policy_eps, n_val = build_dataset_and_rounds(cfg, sweep_value)
+        dataset.random_ = seed_random_state(random_state, seed_i)
+        val_bandit_data = cached_batch_bandit_feedback(
+            dataset,
+            n_rounds=n_val,
+            cache_dir=cfg.dataset_cache.dir,
+            write=bool(cfg.dataset_cache.write),
+        )
+    with timer.stage("policy_construction"):
+        action_dist_val = EpsGreedyPolicy.from_expected_reward(
+            expected_reward=val_bandit_data["expected_reward"],
+            is_optimal=bool(cfg.policy.is_optimal),
+            eps=policy_eps,
+        )
+    estimates = run_ope(
+        dataset=dataset,
+        round=seed_i,
+        val_bandit_data=val_bandit_data,
+        action_dist_val=action_dist_val,
+        embed_selection=bool(cfg.embed_selection),
+        random_state=random_state,
+        n_jobs=cfg.regression.n_jobs,
+        fit_cache=_fit_cache(cfg),
+        timer=timer,
+        estimator_backend=str(cfg.estimator_backend),
+        base_model=str(cfg.regression.base_model),
+        factorize_q_hat=bool(cfg.regression.factorize_q_hat),
+    )
+    return estimates, timer.records
+
+
+def _run_seed_batch_task(
+    task: tuple[dict[str, Any], Any, tuple[int, ...]],
+) -> tuple[list[dict[str, Any]], list[StageTiming]]:
+    """``_run_seed_task`` for several seeds of one sweep value, estimated in one batched pass."""
+    cfg_container, sweep_value, seeds = task
+    cfg = OmegaConf.create(cfg_container)
+    random_state = int(cfg.random_state)
+    timer = StageTimer(sweep_value=sweep_value)
+    feedbacks, policies = [], []
+    for seed_i in seeds:
+        with timer.stage("data_generation", seed=seed_i):
+            dataset, policy_eps, n_val = build_dataset_and_rounds(cfg, sweep_value)
+            dataset.random_ = seed_random_state(random_state, seed_i)
+            feedbacks.append(
+                cached_batch_bandit_feedback(
+                    dataset,
+                    n_rounds=n_val,
+                    cache_dir=cfg.dataset_cache.dir,
+                    write=bool(cfg.dataset_cache.write),
+                )
+            )
+        with timer.stage("policy_construction", seed=seed_i):
+            policies.append(
+                EpsGreedyPolicy.from_expected_reward(
+                    expected_reward=feedbacks[-1]["expected_reward"],
+                    is_optimal=bool(cfg.policy.is_optimal),
+                    eps=policy_eps,
+                )
+            )
+    estimates = run_ope_batch(
+        dataset=dataset,
+        rounds=seeds,
+        val_bandit_data=stack_bandit_feedback(feedbacks),
+        action_dist_val=policies,
+        embed_selection=bool(cfg.embed_selection),
+        random_state=random_state,
+        n_jobs=cfg.regression.n_jobs,
+        fit_cache=_fit_cache(cfg),
+        timer=timer,
+        base_model=str(cfg.regression.base_model),
+        factorize_q_hat=bool(cfg.regression.factorize_q_hat),
+    )
+    return [
+        {name: float(value) for name, value in zip(ESTIMATOR_NAMES, row, strict=True)}
+        for row in estimates
+    ], timer.records
+
+
+def store_fingerprint(cfg: DictConfig) -> dict[str, Any]:
+    """Config entries that determine stored results (``n_seeds`` and sweep lists may grow)."""
+    resolved = OmegaConf.to_container(cfg, resolve=True)
+    assert isinstance(resolved, dict)
+    fingerprint = {
+        key: resolved[key]
+        for key in ("dataset", "policy", "random_state", "embed_selection", "n_test", "n_train")
+    }
+    fingerprint["base_model"] = resolved["regression"]["base_model"]
+    fingerprint["experiment"] = {
+        key: resolved["experiment"].get(key) for key in ("name", "mode", "field", "result_column")
+    }
+    return cast(dict[str, Any], fingerprint)
+
+
+def _stored_policy_values(store: ResultStore, sweep_values: list[Any]) -> dict[str, float]:
+    policy_values = store.policy_values()
+    missing = [v for v in sweep_values if sweep_key(v) not in policy_values]
+    if missing:
+        raise ValueError(f"Result store {store.path} has no ground truth for {missing}")
+    return policy_values
+
+
+def aggregate_store(
+    store: ResultStore, sweep_values: list[Any], n_seeds: int, x_col: str
+) -> EstimateAggregator:
+    """Aggregator over the ground truths and the first ``n_seeds`` stored seeds of each value."""
+    policy_values = _stored_policy_values(store, sweep_values)
+    aggregator = EstimateAggregator(x_col)
+    for sweep_value in sweep_values:
+        aggregator.set_policy_value(sweep_value, policy_values[sweep_key(sweep_value)])
+    completed = store.estimates()
+    for sweep_value in sweep_values:
+        for seed_i in range(n_seeds):
+            if (sweep_key(sweep_value), seed_i) in completed:
+                aggregator.update(sweep_value, completed[(sweep_key(sweep_value), seed_i)])
+    return aggregator
+
+
+def per_seed_results(
+    store: ResultStore, sweep_values: list[Any], n_seeds: int, x_col: str
+) -> pd.DataFrame:
+    """``per_seed_frame`` of every sweep value over its first ``n_seeds`` stored seeds."""
+    policy_values = _stored_policy_values(store, sweep_values)
+    completed = store.estimates()
+    parts = []
+    for sweep_value in sweep_values:
+        key = sweep_key(sweep_value)
+        estimates = [completed[(key, s)] for s in range(n_seeds) if (key, s) in completed]
+        if estimates:
+            parts.append(per_seed_frame(estimates, policy_values[key], x_col, sweep_value))
+    return pd.concat(parts).reset_index(level=0)
+
+
+def _render_plots(cfg: DictConfig, result_df: Any) -> None:
+    # matplotlib / seaborn are only needed here; seed workers never import them
+    from synthetic.plots import render_plots
+
+    sweep_values = list(cfg.experiment.sweep_values)
+    render_plots(
+        "plots",
+        result_df,
+        x=str(cfg.experiment.result_column),
+        xlabel=str(cfg.experiment.xlabel),
+        xticklabels=sweep_values,
+        markersize=int(cfg.markersize),
+        formats=list(cfg.plots.formats),
+        backend=str(cfg.plots.backend),
+        n_workers=cfg.plots.n_workers,
     )
-    result_df[x_col] = x_value
-    result_df["se"] = (result_df.value - policy_value) ** 2
-    result_df["bias"] = 0.0
-    result_df["variance"] = 0.0
-    sample_mean = DataFrame(result_df.groupby(["est"]).mean().value).reset_index()
-    for est_ in sample_mean["est"]:
-        estimates = result_df.loc[result_df["est"] == est_, "value"].values
-        mean_estimates = sample_mean.loc[sample_mean["est"] == est_, "value"].values
-        mean_estimates = np.ones_like(estimates) * mean_estimates
-        result_df.loc[result_df["est"] == est_, "bias"] = (policy_value - mean_estimates) ** 2
-        result_df.loc[result_df["est"] == est_, "variance"] = (estimates - mean_estimates) ** 2
-    return result_df
 
 
 def run_sweep_experiment(cfg: DictConfig) -> None:
     logger.info("cwd=%s", Path.cwd())
     start = time.time()
+    if cfg.dataset_cache.dir is not None:
+        # Hydra changes into the run directory; resolve against the launch directory
+        cfg.dataset_cache.dir = to_absolute_path(str(cfg.dataset_cache.dir))
+    if cfg.ground_truth.cache_dir is not None:
+        cfg.ground_truth.cache_dir = to_absolute_path(str(cfg.ground_truth.cache_dir))
+    if cfg.fit_cache.dir is not None:
+        cfg.fit_cache.dir = to_absolute_path(str(cfg.fit_cache.dir))
+
+    seeds_per_task = int(cfg.execution.seeds_per_task)
+    if seeds_per_task < 1:
+        raise ValueError(f"`seeds_per_task` must be positive, but {seeds_per_task} is given")
+    batched = seeds_per_task > 1
+    if batched and str(cfg.estimator_backend) != "native":
+        # run_ope_batch evaluates every replicate with the native estimate_all reductions
+        raise ValueError(
+            "`execution.seeds_per_task` > 1 requires `estimator_backend=native`, "
+            f"but {cfg.estimator_backend} is given"
+        )
 
     sweep_values = list(cfg.experiment.sweep_values)
     x_col = str(cfg.experiment.result_column)
     xlabel = str(cfg.experiment.xlabel)
-    xticklabels = sweep_values
-    markersize = int(cfg.markersize)
-    random_state = int(cfg.random_state)
+    n_seeds = int(cfg.n_seeds)
 
     out_df = Path("df")
     out_df.mkdir(parents=True, exist_ok=True)
+    timer = StageTimer(callbacks=[instantiate(c) for c in cfg.timing.callbacks])
+
+    store = ResultStore(out_df / "estimates.jsonl")
+    if bool(cfg.plots_only):
+        store.resume(store_fingerprint(cfg))
+        with timer.stage("summarization"):
+            result_df = per_seed_results(store, sweep_values, n_seeds, x_col)
+        with timer.stage("plotting"):
+            _render_plots(cfg, result_df)
+        timer.to_json(out_df / "timings.json")
+        timer.finish()
+        return
+
+    if bool(cfg.resume):
+        store.resume(store_fingerprint(cfg))
+    else:
+        store.reset(store_fingerprint(cfg))
 
-    result_parts: list[DataFrame] = []
+    stored_policy_values = store.policy_values()
     for sweep_value in sweep_values:
-        dataset, policy_eps, n_val = build_dataset_and_rounds(cfg, sweep_value)
+        if sweep_key(sweep_value) not in stored_policy_values:
+            with timer.stage("ground_truth", sweep_value=sweep_value):
+                policy_value = ground_truth_policy_value(cfg, sweep_value)
+            store.append_policy_value(sweep_value, policy_value)
+            stored_policy_values[sweep_key(sweep_value)] = policy_value
 
-        test_bandit_data = dataset.obtain_batch_bandit_feedback(n_rounds=int(cfg.n_test))
-        action_dist_test = gen_eps_greedy(
-            expected_reward=test_bandit_data["expected_reward"],
-            is_optimal=bool(cfg.policy.is_optimal),
-            eps=policy_eps,
-        )
-        policy_value = dataset.calc_ground_truth_policy_value(
-            expected_reward=test_bandit_data["expected_reward"],
-            action_dist=action_dist_test,
+    aggregator = aggregate_store(store, sweep_values, n_seeds, x_col)
+    completed = store.estimates()
+    cfg_container = OmegaConf.to_container(cfg, resolve=True)
+    assert isinstance(cfg_container, dict)
+    tasks: list[tuple[Any, Any, Any]] = []
+    for sweep_value in sweep_values:
+        pending = [s for s in range(n_seeds) if (sweep_key(sweep_value), s) not in completed]
+        if batched:
+            tasks += [
+                (cfg_container, sweep_value, tuple(pending[i : i + seeds_per_task]))
+                for i in range(0, len(pending), seeds_per_task)
+            ]
+        else:
+            tasks += [(cfg_container, sweep_value, seed_i) for seed_i in pending]
+    if completed:
+        logger.info(
+            "resuming from %s: %d seeds done, %d to run", store.path, len(completed), len(tasks)
         )
 
-        estimated_policy_value_list: list[dict[str, Any]] = []
-        for seed_i in tqdm(
-            range(int(cfg.n_seeds)),
-            desc=f"{xlabel}: {sweep_value}",
-        ):
-            val_bandit_data = dataset.obtain_batch_bandit_feedback(n_rounds=n_val)
-            action_dist_val = gen_eps_greedy(
-                expected_reward=val_bandit_data["expected_reward"],
-                is_optimal=bool(cfg.policy.is_optimal),
-                eps=policy_eps,
-            )
-            estimated_policy_values = run_ope(
-                dataset=dataset,
-                round=seed_i,
-                val_bandit_data=val_bandit_data,
-                action_dist_val=action_dist_val,
-                embed_selection=bool(cfg.embed_selection),
-                random_state=random_state,
-            )
-            estimated_policy_value_list.append(estimated_policy_values)
-
-        result_parts.append(
-            summarize_estimates(
-                estimated_policy_value_list,
-                float(policy_value),
-                x_col,
-                sweep_value,
-            )
-        )
+    def checkpoint(task_index: int, result: tuple[Any, list[StageTiming]]) -> None:
+        _, sweep_value, seeds = tasks[task_index]
+        estimates, task_timings = result
+        if not batched:
+            seeds, estimates = (seeds,), [estimates]
+        for seed_i, estimated_policy_values in zip(seeds, estimates, strict=True):
+            store.append_estimates(sweep_value, seed_i, estimated_policy_values)
+            aggregator.update(sweep_value, estimated_policy_values)
+        # a few rows per estimator: cheap enough to keep the summary on disk current mid-run
+        aggregator.summary().to_csv(out_df / "summary.csv")
+        timer.extend(task_timings)
+
+    map_tasks(
+        _run_seed_batch_task if batched else _run_seed_task,
+        tasks,
+        backend=str(cfg.execution.backend),
+        n_workers=cfg.execution.n_workers,
+        blas_threads=int(cfg.execution.blas_threads),
+        desc=xlabel,
+        on_result=checkpoint,
+    )
 
-    result_df = pd.concat(result_parts).reset_index(level=0)
+    with timer.stage("summarization"):
+        aggregator.summary().to_csv(out_df / "summary.csv")
+        result_df = per_seed_results(store, sweep_values, n_seeds, x_col)
     result_df.to_csv(out_df / "result_df.csv")
 
     if bool(cfg.output.save_legacy_csv):
@@ -159,14 +428,7 @@ def run_sweep_experiment(cfg: DictConfig) -> None:
     elapsed = (time.time() - start) / 60
     print(f"execution time: {elapsed} mins")
 
-    for flag_share_y_scale in (True, False):
-        for flag_log_scale in (False, True):
-            plot_line(
-                result_df=result_df,
-                x=x_col,
-                xlabel=xlabel,
-                xticklabels=xticklabels,
-                flag_log_scale=flag_log_scale,
-                flag_share_y_scale=flag_share_y_scale,
-                markersize=markersize,
-            )
+    with timer.stage("plotting"):
+        _render_plots(cfg, result_df)
+    timer.to_json(out_df / "timings.json")
+    timer.finish()
@@ -0,0 +1,227 @@
+"""Content-addressed LRU cache of cross-fitted regression outputs (``q_hat`` and fold models).
+
+Entries live in memory for the current process and, with ``cache_dir``, also on disk as one
+pickle per key, so repeat runs of the same configuration and pool workers reuse each other's fits.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import tempfile
+from collections import OrderedDict
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from importlib.metadata import version
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from synthetic.estimators import FactorizedQHat
+
+# Parameters that change how a fit is executed but not what it produces.
+_EXECUTION_ONLY_PARAMS = ("n_jobs", "verbose", "max_predict_rows")
+
+# Bump when the pickled entry layout changes so stale files are not reused.
+FIT_CACHE_FORMAT_VERSION = 1
+
+
+@dataclass
+class FitCacheEntry:
+    q_hat: np.ndarray | FactorizedQHat
+    fold_models: list[Any] = field(default_factory=list)
+    nbytes: int = 0
+
+
+def _update_with_value(h: Any, value: Any) -> None:
+    if isinstance(value, np.ndarray):
+        arr = np.ascontiguousarray(value)
+        h.update(f"ndarray:{arr.dtype.str}:{arr.shape}".encode())
+        h.update(memoryview(arr).cast("B"))
+    else:
+        h.update(repr(value).encode())
+
+
+def _is_execution_only(name: str) -> bool:
+    return name.rsplit("__", 1)[-1] in _EXECUTION_ONLY_PARAMS
+
+
+def _array_nbytes(obj: Any, seen: dict[int, Any]) -> int:
+    """Bytes of the arrays reachable from ``obj`` through containers and pickle state.
+
+    Counts what dominates a pickled fold model (e.g. the node arrays of every tree) without
+    serializing it; ``seen`` keeps visited objects alive so their ids are not reused.
+    """
+    if id(obj) in seen or isinstance(obj, (int, float, complex, str, bytes, bool, type(None))):
+        return 0
+    seen[id(obj)] = obj
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sum(_array_nbytes(item, seen) for item in obj)
+    if isinstance(obj, dict):
+        return sum(_array_nbytes(item, seen) for item in obj.values())
+    if isinstance(obj, type):
+        return 0
+    return _array_nbytes(obj.__getstate__(), seen)
+
+
+def _versioned_dir(cache_dir: str | Path | None) -> Path | None:
+    if cache_dir is None:
+        return None
+    return Path(cache_dir) / f"v{FIT_CACHE_FORMAT_VERSION}-sklearn{version('scikit-learn')}"
+
+
+class FitCache:
+    """LRU cache of ``fit_predict`` results keyed by a hash of everything that determines them.
+
+    The key covers the model class and its (deep) hyperparameters, every array passed to
+    ``fit_predict`` and the cross-fitting split (``n_folds``, ``random_state``). Entries are
+    evicted least-recently-used first once their total size exceeds ``max_bytes``; the size of an
+    entry is its ``q_hat`` plus the arrays of its fold models.
+    Cached ``q_hat`` arrays are returned read-only and shared between callers.
+
+    With ``cache_dir``, every entry is also written to ``<cache_dir>/<version>/<key>.pkl``
+    (``<version>`` pins this format and the scikit-learn version), and a memory miss falls back
+    to that file. Files are published atomically and never evicted; delete the directory to
+    reclaim space.
+    """
+
+    def __init__(self, max_bytes: int = 2 * 1024**3, cache_dir: str | Path | None = None) -> None:
+        if max_bytes < 0:
+            raise ValueError(f"`max_bytes` must be non-negative, but {max_bytes} is given")
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, FitCacheEntry] = OrderedDict()
+        self.cache_dir = _versioned_dir(cache_dir)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    @staticmethod
+    def make_key(model: Any, fit_predict_kwargs: Mapping[str, Any]) -> str:
+        h = hashlib.blake2b(digest_size=20)
+        h.update(f"{type(model).__module__}.{type(model).__qualname__}".encode())
+        for name, value in sorted(model.get_params(deep=True).items()):
+            if _is_execution_only(name):
+                continue
+            h.update(f"|param:{name}=".encode())
+            _update_with_value(h, value)
+        for name, value in sorted(fit_predict_kwargs.items()):
+            h.update(f"|arg:{name}=".encode())
+            _update_with_value(h, value)
+        return h.hexdigest()
+
+    def get(self, key: str) -> FitCacheEntry | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry
+        entry = self._load(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.disk_hits += 1
+        self._insert(key, entry)
+        return entry
+
+    def _load(self, key: str) -> FitCacheEntry | None:
+        if self.cache_dir is None:
+            return None
+        try:
+            with (self.cache_dir / f"{key}.pkl").open("rb") as f:
+                q_hat, fold_models = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            # missing, or a truncated file from an interrupted writer: refit
+            return None
+        return self._entry(q_hat, fold_models)
+
+    def _save(self, key: str, entry: FitCacheEntry) -> None:
+        assert self.cache_dir is not None
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=f".{key}.", dir=self.cache_dir)
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump((entry.q_hat, entry.fold_models), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.cache_dir / f"{key}.pkl")
+        except OSError:
+            # the disk is full or read-only: the in-memory entry still serves this process
+            pass
+
+    @staticmethod
+    def _entry(q_hat: np.ndarray | FactorizedQHat, fold_models: list[Any]) -> FitCacheEntry:
+        q_hat.setflags(write=False)
+        nbytes = q_hat.nbytes + _array_nbytes(fold_models, {})
+        return FitCacheEntry(q_hat=q_hat, fold_models=fold_models, nbytes=nbytes)
+
+    def _insert(self, key: str, entry: FitCacheEntry) -> None:
+        if entry.nbytes > self.max_bytes:
+            return
+        if key in self._entries:
+            self.nbytes -= self._entries.pop(key).nbytes
+        self._entries[key] = entry
+        self.nbytes += entry.nbytes
+        self._evict_to_budget()
+
+    def put(
+        self,
+        key: str,
+        q_hat: np.ndarray | FactorizedQHat,
+        fold_models: list[Any] | None = None,
+    ) -> None:
+        entry = self._entry(q_hat, list(fold_models or []))
+        self._insert(key, entry)
+        if self.cache_dir is not None:
+            self._save(key, entry)
+
+    def _evict_to_budget(self) -> None:
+        while self.nbytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.nbytes = 0
+
+    def fit_predict(self, model: Any, **fit_predict_kwargs: Any) -> np.ndarray | FactorizedQHat:
+        """Return ``model.fit_predict(**fit_predict_kwargs)``, reusing a cached result if any.
+
+        On a hit ``model`` is left unfitted; the cached fold models are in ``get(key).fold_models``.
+        """
+        key = self.make_key(model, fit_predict_kwargs)
+        entry = self.get(key)
+        if entry is not None:
+            return entry.q_hat
+        q_hat: np.ndarray | FactorizedQHat = model.fit_predict(**fit_predict_kwargs)
+        if not isinstance(q_hat, FactorizedQHat):
+            q_hat = np.asarray(q_hat)
+        self.put(key, q_hat, getattr(model, "fold_models_", None))
+        return q_hat
+
+
+_shared_fit_cache: FitCache | None = None
+
+
+def shared_fit_cache(max_bytes: int, cache_dir: str | Path | None = None) -> FitCache:
+    """Process-wide cache, so sequential runs in one process (e.g. Hydra multirun) share fits.
+
+    Fits reach other processes and later runs only through ``cache_dir``.
+    """
+    global _shared_fit_cache
+    if _shared_fit_cache is None or _shared_fit_cache.cache_dir != _versioned_dir(cache_dir):
+        _shared_fit_cache = FitCache(max_bytes=max_bytes, cache_dir=cache_dir)
+    _shared_fit_cache.max_bytes = max_bytes
+    _shared_fit_cache._evict_to_budget()
+    return _shared_fit_cache
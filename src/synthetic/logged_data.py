@@ -0,0 +1,276 @@
+"""Logged bandit data read from disk, for running ``run_ope`` on logs larger than memory.
+
+``LoggedData.from_npy_dir`` opens a directory of ``<key>.npy`` files with ``mmap_mode="r"``, the
+layout ``dataset_cache`` writes (so cached synthetic logs open the same way). Per-round keys:
+
+- ``context`` ``(n, dim_context)``, ``action``, ``reward``, ``pscore`` ``(n,)``;
+- ``action_embed`` ``(n, n_cat_dim)`` integer categories;
+- ``pi_b``: the behavior policy, dense ``pi_b.npy`` ``(n, n_actions[, 1])`` or sparse
+  ``pi_b.indices.npy`` / ``pi_b.probs.npy`` (``SparseRowPolicy``). MIPS and MDR need
+  :math:`p(e_i|x_i,\\pi_b)`, which ``pscore`` alone does not give.
+
+Shared keys: ``p_e_a`` ``(n_actions, n_cat_per_dim, n_cat_dim)`` and optionally
+``action_context`` ``(n_actions, k)``, the action features of the DM/DR and MDR regressions
+(default: one-hot ``np.eye(n_actions)``, as in ``SyntheticBanditDatasetWithActionEmbeds``).
+
+``to_bandit_feedback`` returns the ``obtain_batch_bandit_feedback`` keys over the memory maps,
+so only the pages a stage reads are loaded: the MIPS weights and the native IPS / DR / DM
+estimates read them in place, while the reward regressions (sklearn) load their inputs.
+``iter_batches`` reads the log ``batch_size`` rows at a time for the streaming estimators.
+
+Columnar logs are converted once with ``convert_parquet_to_npy_dir`` (requires ``pyarrow``) or
+``convert_columns_to_npy_dir``, writing one row group at a time: column ``<key>`` becomes
+``<key>.npy`` and columns ``<key>_0, <key>_1, ...`` become the columns of a 2-D ``<key>.npy``.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import shutil
+import tempfile
+from collections.abc import Iterable, Iterator, Mapping
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Literal
+
+import numpy as np
+
+from synthetic.policy import SparseRowPolicy
+
+PER_ROUND_KEYS = ("context", "action", "reward", "pscore", "action_embed", "pi_b")
+
+_COLUMN_INDEX = re.compile(r"^(?P<key>.+)_(?P<col>\d+)$")
+
+
+@dataclass
+class LoggedData:
+    """One logged dataset; arrays may be memory maps. Also usable as ``run_ope``'s ``dataset``."""
+
+    context: np.ndarray
+    action: np.ndarray
+    reward: np.ndarray
+    pscore: np.ndarray
+    action_embed: np.ndarray
+    pi_b: np.ndarray | SparseRowPolicy
+    p_e_a: np.ndarray
+    action_context: np.ndarray | None = None
+
+    def __post_init__(self) -> None:
+        if self.p_e_a.ndim != 3:
+            raise ValueError(
+                "`p_e_a` must have shape (n_actions, n_cat_per_dim, n_cat_dim), "
+                f"but {self.p_e_a.shape} is given"
+            )
+        for key in PER_ROUND_KEYS:
+            value = getattr(self, key)
+            n = value.n_rounds if isinstance(value, SparseRowPolicy) else value.shape[0]
+            if n != self.n_rounds:
+                raise ValueError(
+                    f"`{key}` must have {self.n_rounds} rows like `reward`, but {n} are given"
+                )
+        if self.action_embed.ndim != 2 or self.action_embed.shape[1] != self.p_e_a.shape[2]:
+            raise ValueError(
+                f"`action_embed` must have shape (n_rounds, {self.p_e_a.shape[2]}), "
+                f"but {self.action_embed.shape} is given"
+            )
+        if self.action_context is None:
+            self.action_context = np.eye(self.n_actions, dtype=int)
+        elif self.action_context.shape[0] != self.n_actions:
+            raise ValueError(
+                f"`action_context` must have {self.n_actions} rows, "
+                f"but {self.action_context.shape[0]} are given"
+            )
+
+    @property
+    def n_rounds(self) -> int:
+        return int(self.reward.shape[0])
+
+    @property
+    def n_actions(self) -> int:
+        return int(self.p_e_a.shape[0])
+
+    @classmethod
+    def from_npy_dir(
+        cls, path: str | Path, mmap_mode: Literal["r", "c"] | None = "r"
+    ) -> LoggedData:
+        """Open the ``<key>.npy`` files in ``path``; others (e.g. ``q_x_e``) are ignored."""
+        path = Path(path)
+
+        def load(name: str) -> np.ndarray:
+            return np.load(path / f"{name}.npy", mmap_mode=mmap_mode)  # type: ignore[no-any-return]
+
+        keys = (*PER_ROUND_KEYS, "p_e_a")
+        sparse_pi_b = (path / "pi_b.indices.npy").exists()
+        missing = [
+            key
+            for key in keys
+            if not (path / f"{key}.npy").exists() and not (key == "pi_b" and sparse_pi_b)
+        ]
+        if missing:
+            raise ValueError(f"{path} has no {', '.join(f'{key}.npy' for key in missing)}")
+        p_e_a = load("p_e_a")
+        pi_b: np.ndarray | SparseRowPolicy = (
+            SparseRowPolicy(load("pi_b.indices"), load("pi_b.probs"), int(p_e_a.shape[0]))
+            if sparse_pi_b
+            else load("pi_b")
+        )
+        return cls(
+            context=load("context"),
+            action=load("action"),
+            reward=load("reward"),
+            pscore=load("pscore"),
+            action_embed=load("action_embed"),
+            pi_b=pi_b,
+            p_e_a=p_e_a,
+            action_context=(
+                load("action_context") if (path / "action_context.npy").exists() else None
+            ),
+        )
+
+    def to_bandit_feedback(self) -> dict[str, Any]:
+        """The ``obtain_batch_bandit_feedback`` keys available in a real log, without copies."""
+        return dict(
+            n_rounds=self.n_rounds,
+            n_actions=self.n_actions,
+            action_context=self.action_context,
+            action_embed=self.action_embed,
+            context=self.context,
+            action=self.action,
+            position=None,
+            reward=self.reward,
+            p_e_a=self.p_e_a,
+            pi_b=self.pi_b,
+            pscore=self.pscore,
+        )
+
+    def iter_batches(self, batch_size: int) -> Iterator[tuple[slice, dict[str, Any]]]:
+        """``(rows, batch)`` for consecutive ``batch_size``-row slices, each read into memory.
+
+        ``batch`` has the keys of ``to_bandit_feedback`` restricted to ``rows``; slice the
+        evaluation policy with ``rows`` as well (``action_dist[rows]``).
+        """
+        if batch_size < 1:
+            raise ValueError(f"`batch_size` must be positive, but {batch_size} is given")
+        for start in range(0, self.n_rounds, batch_size):
+            rows = slice(start, min(start + batch_size, self.n_rounds))
+            batch = self.to_bandit_feedback()
+            for key in PER_ROUND_KEYS:
+                value = batch[key][rows]
+                batch[key] = (
+                    SparseRowPolicy(
+                        np.asarray(value.indices), np.asarray(value.probs), value.n_actions
+                    )
+                    if isinstance(value, SparseRowPolicy)
+                    else np.asarray(value)
+                )
+            batch["n_rounds"] = rows.stop - rows.start
+            yield rows, batch
+
+
+def _group_columns(names: Iterable[str]) -> dict[str, list[str]]:
+    """Map every output key to its input columns (one name, or ``<key>_<j>`` in ``j`` order)."""
+    indexed: dict[str, dict[int, str]] = {}
+    plain: dict[str, list[str]] = {}
+    for name in names:
+        match = _COLUMN_INDEX.match(name)
+        if match:
+            indexed.setdefault(match["key"], {})[int(match["col"])] = name
+        else:
+            plain[name] = [name]
+    for key, cols in indexed.items():
+        if key in plain:
+            raise ValueError(f"Column {key!r} clashes with the indexed columns {key}_<j>")
+        if sorted(cols) != list(range(len(cols))):
+            raise ValueError(
+                f"Columns of {key!r} must be numbered {key}_0 ... {key}_{len(cols) - 1}"
+            )
+        plain[key] = [cols[j] for j in range(len(cols))]
+    return plain
+
+
+def _write_npy_files(
+    batches: Iterable[Mapping[str, Any]],
+    n_rows: int,
+    out_dir: Path,
+    shared: Mapping[str, np.ndarray],
+) -> None:
+    outputs: dict[str, tuple[list[str], np.memmap]] = {}
+    start = 0
+    for batch in batches:
+        if not outputs:
+            for key, cols in _group_columns(batch.keys()).items():
+                dtype = np.result_type(*(np.asarray(batch[col]).dtype for col in cols))
+                shape = (n_rows,) if cols == [key] else (n_rows, len(cols))
+                outputs[key] = (
+                    cols,
+                    np.lib.format.open_memmap(
+                        out_dir / f"{key}.npy", mode="w+", dtype=dtype, shape=shape
+                    ),
+                )
+        stop = start + len(np.asarray(batch[next(iter(batch.keys()))]))
+        if stop > n_rows:
+            raise ValueError(f"The batches hold more than `n_rows`={n_rows} rows")
+        for cols, array in outputs.values():
+            if array.ndim == 1:
+                array[start:stop] = np.asarray(batch[cols[0]])
+            else:
+                for j, col in enumerate(cols):
+                    array[start:stop, j] = np.asarray(batch[col])
+        start = stop
+    if start != n_rows:
+        raise ValueError(f"The batches hold {start} rows, but `n_rows`={n_rows} is given")
+    for _, array in outputs.values():
+        array.flush()
+    for key, value in shared.items():
+        np.save(out_dir / f"{key}.npy", value)
+
+
+def convert_columns_to_npy_dir(
+    batches: Iterable[Mapping[str, Any]],
+    n_rows: int,
+    out_dir: str | Path,
+    shared: Mapping[str, np.ndarray] | None = None,
+) -> Path:
+    """Write row batches (``column -> 1-D array``, e.g. DataFrame chunks) as ``.npy`` files.
+
+    ``n_rows`` is the total number of rows; the output arrays are pre-allocated with
+    ``open_memmap`` and filled batch by batch, so memory is one batch. ``shared`` arrays
+    (``p_e_a``, ``action_context``) are saved as they are. The files are written to a
+    temporary sibling directory that is renamed to ``out_dir`` (which must not exist) only
+    once complete. Returns ``out_dir``.
+    """
+    out_dir = Path(out_dir)
+    if out_dir.exists():
+        raise ValueError(f"{out_dir} already exists")
+    out_dir.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(prefix=f".{out_dir.name}.", dir=out_dir.parent))
+    try:
+        _write_npy_files(batches, n_rows, tmp_dir, shared or {})
+        os.replace(tmp_dir, out_dir)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    return out_dir
+
+
+def convert_parquet_to_npy_dir(
+    path: str | Path,
+    out_dir: str | Path,
+    shared: Mapping[str, np.ndarray] | None = None,
+    batch_size: int = 65536,
+) -> Path:
+    """``convert_columns_to_npy_dir`` over a Parquet file, ``batch_size`` rows at a time."""
+    try:
+        import pyarrow.parquet as pq  # type: ignore[import-untyped]
+    except ImportError as e:
+        raise ImportError("Reading Parquet logs requires pyarrow (`pip install pyarrow`)") from e
+    parquet_file = pq.ParquetFile(path)
+    batches = (
+        {
+            name: column.to_numpy(zero_copy_only=False)
+            for name, column in zip(batch.schema.names, batch.columns, strict=True)
+        }
+        for batch in parquet_file.iter_batches(batch_size=batch_size)
+    )
+    return convert_columns_to_npy_dir(batches, parquet_file.metadata.num_rows, out_dir, shared)
@@ -1,3 +1,4 @@
+from collections.abc import Sequence
 from typing import Any, cast
 
 import numpy as np
@@ -5,124 +6,396 @@ from obp.ope import DirectMethod as DM  # type: ignore
 from obp.ope import DoublyRobust as DR
 from obp.ope import InverseProbabilityWeighting as IPS
 from obp.ope import OffPolicyEvaluation, RegressionModel
-from sklearn.ensemble import RandomForestRegressor  # type: ignore
 
+from synthetic.base_model_registry import make_base_model
+from synthetic.estimators import (
+    FactorizedQHat,
+    check_logged_data,
+    dm,
+    dr,
+    estimate_all,
+    factual_expected_reward,
+    ips,
+    policy_expected_reward,
+    policy_factual_prob,
+)
+from synthetic.fit_cache import FitCache
+from synthetic.policy import EpsGreedyPolicy, SparseRowPolicy
+from synthetic.regression_model_factorized import FactorizedRegressionModel
 from synthetic.regression_model_mdr import RegressionModelMDR
+from synthetic.timing import StageTimer
 
 
-def _flatten_policy_probs(
-    pi_b_3d: np.ndarray, action_dist_val: np.ndarray, n: int, n_actions: int
-) -> tuple[np.ndarray, np.ndarray]:
-    pi_b = np.zeros((n, n_actions))
-    action_dist = np.zeros((n, n_actions))
-    for i in range(n):
-        for j in range(n_actions):
-            pi_b[i][j] = pi_b_3d[i][j][0]
-            action_dist[i][j] = action_dist_val[i][j][0]
-    return pi_b, action_dist
+def _policy_probs_2d(action_dist: np.ndarray) -> np.ndarray:
+    """Return an ``(n_rounds, n_actions)`` view of a policy array (position 0 when 3-D)."""
+    return action_dist[:, :, 0] if action_dist.ndim == 3 else action_dist
+
+
+def _dense_marginal_embedding_probs(
+    policies: list[np.ndarray],
+    p_e_a: np.ndarray,
+    action_embed: np.ndarray,
+    chunk_size: int,
+) -> list[np.ndarray]:
+    """:math:`p(e_i|x_i,\\pi)` for dense policy arrays, sharing one gather of ``p_e_a``."""
+    probs_2d = [_policy_probs_2d(policy) for policy in policies]
+    n = action_embed.shape[0]
+    # (n_cat_per_dim, n_cat_dim, n_actions): row ``[e, d]`` is p(e | a, d) over all actions.
+    p_e_a_by_cat = np.ascontiguousarray(np.moveaxis(p_e_a, 0, -1))
+    p_e_pi = [np.ones(n) for _ in policies]
+    for start in range(0, n, chunk_size):
+        rows = slice(start, start + chunk_size)
+        for d in range(p_e_a.shape[-1]):
+            p_e_rows = p_e_a_by_cat[action_embed[rows, d], d]
+            for pi_2d, p_e in zip(probs_2d, p_e_pi, strict=True):
+                p_e[rows] *= np.einsum("ia,ia->i", pi_2d[rows], p_e_rows)
+    return p_e_pi
 
 
 def _marginal_embedding_weights(
-    pi_b: np.ndarray,
-    action_dist: np.ndarray,
+    pi_b: Any,
+    action_dist: Any,
     p_e_a: np.ndarray,
     action_embed: np.ndarray,
-    n: int,
+    chunk_size: int = 1024,
 ) -> np.ndarray:
-    p_e_pi_b = np.ones(n)
-    p_e_pi_e = np.ones(n)
-    for d in np.arange(p_e_a.shape[-1]):
-        p_e_pi_b_d = pi_b[np.arange(n), :] @ p_e_a[:, :, d]
-        p_e_pi_b *= p_e_pi_b_d[np.arange(n), action_embed[:, d]]
-        p_e_pi_e_d = action_dist[np.arange(n), :] @ p_e_a[:, :, d]
-        p_e_pi_e *= p_e_pi_e_d[np.arange(n), action_embed[:, d]]
-    return p_e_pi_e / p_e_pi_b
+    """Marginal importance weights :math:`p(e_i|x_i,\\pi_e) / p(e_i|x_i,\\pi_b)` used by MIPS/MDR.
+
+    Each policy is either a dense array of shape ``(n_rounds, n_actions)`` or
+    ``(n_rounds, n_actions, 1)``, or a compact policy object (e.g. ``EpsGreedyPolicy``, or a
+    sparse ``pi_b`` as ``SparseRowPolicy``) that provides
+    ``marginal_embedding_prob(p_e_a, action_embed)``.
+
+    Dense arrays are read through views, never copied. For every embedding dimension only the
+    ``p_e_a[:, e_i, d]`` column needed by row ``i`` is gathered, ``chunk_size`` rows at a time,
+    so the extra memory is ``chunk_size * n_actions`` regardless of ``n_rounds``.
+    """
+    policies = (pi_b, action_dist)
+    dense = [policy for policy in policies if isinstance(policy, np.ndarray)]
+    dense_probs = iter(_dense_marginal_embedding_probs(dense, p_e_a, action_embed, chunk_size))
+    p_e_pi_b, p_e_pi_e = (
+        next(dense_probs)
+        if isinstance(policy, np.ndarray)
+        else policy.marginal_embedding_prob(p_e_a, action_embed)
+        for policy in policies
+    )
+    return np.asarray(p_e_pi_e / p_e_pi_b)
+
+
+def _dm_value(estimated_rewards: np.ndarray, action_dist: np.ndarray | EpsGreedyPolicy) -> float:
+    """Direct-method estimate :math:`n^{-1} \\sum_i \\sum_a \\pi_e(a|x_i) \\hat{q}(x_i,a)`."""
+    if isinstance(action_dist, EpsGreedyPolicy):
+        return float(action_dist.policy_value(estimated_rewards).mean())
+    return float(
+        np.einsum(
+            "ia,ia->i", _policy_probs_2d(action_dist), _policy_probs_2d(estimated_rewards)
+        ).mean()
+    )
+
+
+def _fit_predict(
+    model: Any, fit_cache: FitCache | None, **kwargs: Any
+) -> np.ndarray | FactorizedQHat:
+    if fit_cache is not None:
+        return fit_cache.fit_predict(model, **kwargs)
+    q_hat = model.fit_predict(**kwargs)
+    return q_hat if isinstance(q_hat, FactorizedQHat) else np.asarray(q_hat)
+
+
+def _fit_dm_dr_regression(
+    dataset: Any,
+    round: int,
+    val_bandit_data: dict[str, Any],
+    random_state: int,
+    fit_cache: FitCache | None,
+    timer: StageTimer,
+    base_model: str = "random_forest",
+    factorize_q_hat: bool = True,
+) -> np.ndarray | FactorizedQHat:
+    model_kwargs: dict[str, Any] = dict(
+        n_actions=dataset.n_actions,
+        action_context=val_bandit_data["action_context"],
+        base_model=make_base_model(
+            base_model, random_state + round, val_bandit_data["context"].shape[1]
+        ),
+    )
+    # obp's dense RegressionModel always predicts in float64; only the factorized q_hat follows
+    # the dataset dtype
+    reg_model = (
+        FactorizedRegressionModel(
+            **model_kwargs, dtype=str(getattr(dataset, "dtype", "float64"))
+        )
+        if factorize_q_hat
+        else RegressionModel(**model_kwargs)
+    )
+    with timer.stage("dm_dr_regression"):
+        return _fit_predict(
+            reg_model,
+            fit_cache,
+            context=val_bandit_data["context"],
+            action=val_bandit_data["action"],
+            reward=val_bandit_data["reward"],
+            n_folds=2,
+            random_state=random_state + round,
+        )
+
+
+def _fit_mdr_regression(
+    dataset: Any,
+    round: int,
+    val_bandit_data: dict[str, Any],
+    random_state: int,
+    n_jobs: int | None,
+    fit_cache: FitCache | None,
+    timer: StageTimer,
+    base_model: str = "random_forest",
+) -> np.ndarray:
+    reg_model_mdr = RegressionModelMDR(
+        n_actions=dataset.n_actions,
+        action_context=val_bandit_data["action_context"],
+        base_model=make_base_model(
+            base_model, random_state + round, val_bandit_data["context"].shape[1]
+        ),
+        n_jobs=n_jobs,
+        dtype=str(getattr(dataset, "dtype", "float64")),
+    )
+    with timer.stage("mdr_regression"):
+        return cast(
+            np.ndarray,
+            _fit_predict(
+                reg_model_mdr,
+                fit_cache,
+                context=val_bandit_data["context"],
+                action=val_bandit_data["action"],
+                embedding=val_bandit_data["action_embed"],
+                reward=val_bandit_data["reward"],
+                n_folds=2,
+                random_state=random_state + round,
+            ),
+        )
+
+
+ESTIMATOR_BACKENDS = ("obp", "native")
+
+
+def _native_ips_dr_dm(
+    val_bandit_data: dict[str, Any],
+    action_dist: np.ndarray | EpsGreedyPolicy,
+    estimated_rewards: np.ndarray | FactorizedQHat,
+) -> dict[str, Any]:
+    """IPS / DR / DM via ``synthetic.estimators``, validating the log once."""
+    action = val_bandit_data["action"]
+    reward = val_bandit_data["reward"]
+    pscore = val_bandit_data["pscore"]
+    check_logged_data(reward, action, pscore, val_bandit_data["n_actions"], action_dist)
+    pi_e_factual = policy_factual_prob(action_dist, action)
+    q_pi = policy_expected_reward(action_dist, estimated_rewards)
+    q_hat_factual = factual_expected_reward(estimated_rewards, action)
+    return {
+        "IPS": float(ips(reward, pscore, pi_e_factual)),
+        "DR": float(dr(reward, pscore, pi_e_factual, q_pi, q_hat_factual)),
+        "DM": float(dm(q_pi)),
+    }
 
 
 def run_ope(
     dataset: Any,
     round: int,
     val_bandit_data: dict[str, Any],
-    action_dist_val: np.ndarray,
+    action_dist_val: np.ndarray | EpsGreedyPolicy,
     embed_selection: bool = False,
     random_state: int = 12345,
+    n_jobs: int | None = None,
+    fit_cache: FitCache | None = None,
+    timer: StageTimer | None = None,
+    estimator_backend: str = "native",
+    base_model: str = "random_forest",
+    factorize_q_hat: bool = True,
 ) -> dict[str, Any]:
+    """IPS, DR, DM, MIPS and MDR estimates of ``action_dist_val`` on one validation log.
+
+    ``estimator_backend="native"`` (default) computes IPS / DR / DM with
+    ``synthetic.estimators`` directly (no dense ``action_dist`` for compact policies, one
+    validation pass); ``"obp"`` uses ``obp.ope.OffPolicyEvaluation``. Both agree up to float
+    rounding.
+    ``base_model`` is the ``base_model_registry`` key of the regressor inside the DM/DR and
+    MDR reward models. ``factorize_q_hat=True`` (default) keeps the DM/DR ``q_hat`` as one
+    prediction per distinct action context (``FactorizedRegressionModel``); the native backend
+    reads it as is, the obp backend expands it to the dense array ``OffPolicyEvaluation`` needs.
+    ``False`` fits obp's dense ``RegressionModel``.
+    """
+    if estimator_backend not in ESTIMATOR_BACKENDS:
+        raise ValueError(
+            f"`estimator_backend` must be one of {list(ESTIMATOR_BACKENDS)}, "
+            f"but {estimator_backend} is given"
+        )
     if embed_selection:
         raise NotImplementedError(
             "embed_selection=True requires MarginalizedInverseProbabilityWeighting from "
             "full zr-obp (https://github.com/st-tech/zr-obp); PyPI 'obp' does not ship MIPS."
         )
+    if timer is None:
+        timer = StageTimer()
 
-    reg_model = RegressionModel(
-        n_actions=dataset.n_actions,
-        action_context=val_bandit_data["action_context"],
-        base_model=RandomForestRegressor(
-            n_estimators=10, max_samples=0.8, random_state=random_state + round
-        ),
+    estimated_rewards = _fit_dm_dr_regression(
+        dataset,
+        round,
+        val_bandit_data,
+        random_state,
+        fit_cache,
+        timer,
+        base_model,
+        factorize_q_hat,
     )
 
-    estimated_rewards = reg_model.fit_predict(
-        context=val_bandit_data["context"],
-        action=val_bandit_data["action"],
-        reward=val_bandit_data["reward"],
-        n_folds=2,
-        random_state=random_state + round,
-    )
+    with timer.stage("ips_dr_dm_estimates"):
+        if estimator_backend == "native":
+            estimated_policy_values = _native_ips_dr_dm(
+                val_bandit_data, action_dist_val, estimated_rewards
+            )
+        else:
+            if isinstance(estimated_rewards, FactorizedQHat):
+                estimated_rewards = estimated_rewards.to_dense()
+            ope_estimators = [
+                IPS(estimator_name="IPS"),
+                DR(estimator_name="DR"),
+            ]
+            if isinstance(action_dist_val, EpsGreedyPolicy):
+                # obp estimators need the dense distribution; DM is computed from the compact policy
+                action_dist_dense = action_dist_val.to_dense()
+            else:
+                action_dist_dense = action_dist_val
+                ope_estimators.append(DM(estimator_name="DM"))
+            ope = OffPolicyEvaluation(
+                bandit_feedback=val_bandit_data,
+                ope_estimators=ope_estimators,
+            )
+            estimated_policy_values = ope.estimate_policy_values(
+                action_dist=action_dist_dense,
+                estimated_rewards_by_reg_model=estimated_rewards,
+            )
+            if "DM" not in estimated_policy_values:
+                estimated_policy_values["DM"] = _dm_value(estimated_rewards, action_dist_val)
 
-    ope_estimators = [
-        IPS(estimator_name="IPS"),
-        DR(estimator_name="DR"),
-        DM(estimator_name="DM"),
-    ]
-
-    ope = OffPolicyEvaluation(
-        bandit_feedback=val_bandit_data,
-        ope_estimators=ope_estimators,
-    )
-    estimated_policy_values = ope.estimate_policy_values(
-        action_dist=action_dist_val,
-        estimated_rewards_by_reg_model=estimated_rewards,
-    )
-
-    p_e_a = val_bandit_data["p_e_a"]
-    n = val_bandit_data["n_rounds"]
-    n_actions = len(val_bandit_data["pi_b"][0])
-    pi_b, action_dist = _flatten_policy_probs(
-        val_bandit_data["pi_b"], action_dist_val, n, n_actions
-    )
-    w_x_e = _marginal_embedding_weights(
-        pi_b,
-        action_dist,
-        p_e_a,
-        val_bandit_data["action_embed"],
-        n,
-    )
+    with timer.stage("mips_weights"):
+        w_x_e = _marginal_embedding_weights(
+            val_bandit_data["pi_b"],
+            action_dist_val,
+            val_bandit_data["p_e_a"],
+            val_bandit_data["action_embed"],
+        )
 
     V_MIPS = float(np.mean(w_x_e * val_bandit_data["reward"]))
     estimated_policy_values["MIPS"] = V_MIPS
 
-    reg_model_mdr = RegressionModelMDR(
-        n_actions=dataset.n_actions,
-        action_context=val_bandit_data["action_context"],
-        base_model=RandomForestRegressor(
-            n_estimators=10, max_samples=0.8, random_state=random_state + round
-        ),
-    )
-
-    estimated_rewards_mdr = reg_model_mdr.fit_predict(
-        context=val_bandit_data["context"],
-        action=val_bandit_data["action"],
-        embedding=val_bandit_data["action_embed"],
-        reward=val_bandit_data["reward"],
-        n_folds=2,
-        random_state=random_state + round,
+    estimated_rewards_mdr = _fit_mdr_regression(
+        dataset, round, val_bandit_data, random_state, n_jobs, fit_cache, timer, base_model
     )
 
+    # drop the len_list axis: an (n, 1) q_hat would broadcast w_x_e * q_hat to (n, n)
     q_xi_ai_ei = estimated_rewards_mdr[
-        np.arange(val_bandit_data["n_rounds"]), val_bandit_data["action"]
+        np.arange(val_bandit_data["n_rounds"]), val_bandit_data["action"], 0
     ]
 
     V_MDR = estimated_policy_values["DM"] + V_MIPS - np.mean(w_x_e * q_xi_ai_ei)
     estimated_policy_values["MDR"] = float(V_MDR)
 
     return cast(dict[str, Any], estimated_policy_values)
+
+
+def stack_bandit_feedback(feedbacks: Sequence[dict[str, Any]]) -> dict[str, Any]:
+    """Stack ``S`` replicate logs of equal size into one dict of ``(S, n, ...)`` arrays.
+
+    Array entries gain a leading replicate axis, as do the arrays of a sparse ``pi_b``
+    (``SparseRowPolicy``); scalar entries (``n_rounds``, ``n_actions``, ...) must agree across
+    replicates and are kept as is.
+    """
+    if not feedbacks:
+        raise ValueError("`feedbacks` must contain at least one log")
+    stacked: dict[str, Any] = {}
+    for key, value in feedbacks[0].items():
+        if isinstance(value, np.ndarray):
+            stacked[key] = np.stack([np.asarray(fb[key]) for fb in feedbacks])
+        elif isinstance(value, SparseRowPolicy):
+            stacked[key] = SparseRowPolicy(
+                indices=np.stack([np.asarray(fb[key].indices) for fb in feedbacks]),
+                probs=np.stack([np.asarray(fb[key].probs) for fb in feedbacks]),
+                n_actions=value.n_actions,
+            )
+        else:
+            if any(fb[key] != value for fb in feedbacks):
+                raise ValueError(f"`{key}` differs across the stacked logs")
+            stacked[key] = value
+    return stacked
+
+
+def run_ope_batch(
+    dataset: Any,
+    rounds: Sequence[int],
+    val_bandit_data: dict[str, Any],
+    action_dist_val: np.ndarray | Sequence[EpsGreedyPolicy],
+    embed_selection: bool = False,
+    random_state: int = 12345,
+    n_jobs: int | None = None,
+    fit_cache: FitCache | None = None,
+    timer: StageTimer | None = None,
+    base_model: str = "random_forest",
+    factorize_q_hat: bool = True,
+) -> np.ndarray:
+    """``run_ope`` for ``S`` stacked replicates; returns an ``(S, n_estimators)`` array.
+
+    ``val_bandit_data`` holds ``(S, n, ...)`` arrays (see ``stack_bandit_feedback``) and
+    ``action_dist_val`` is either a dense ``(S, n, n_actions[, 1])`` array or one compact policy
+    per replicate; replicate ``s`` uses seed offset ``rounds[s]`` exactly as
+    ``run_ope(round=rounds[s])``. The regressions are fitted per replicate, then every
+    estimator is evaluated for all replicates in one vectorized pass over ``(S, n)`` arrays.
+    Columns follow ``estimators.ESTIMATOR_NAMES``; values agree with ``run_ope`` up to float
+    rounding.
+    """
+    if embed_selection:
+        raise NotImplementedError(
+            "embed_selection=True requires MarginalizedInverseProbabilityWeighting from "
+            "full zr-obp (https://github.com/st-tech/zr-obp); PyPI 'obp' does not ship MIPS."
+        )
+    if timer is None:
+        timer = StageTimer()
+    n_replicates = len(rounds)
+    if len(action_dist_val) != n_replicates or val_bandit_data["reward"].shape[0] != n_replicates:
+        raise ValueError(
+            f"`rounds`, `action_dist_val` and `val_bandit_data` must hold {n_replicates} replicates"
+        )
+
+    per_round: dict[str, list[np.ndarray]] = {
+        key: [] for key in ("pi_e_factual", "q_pi", "q_hat_factual", "w_x_e", "q_hat_mdr_factual")
+    }
+    for s, round_ in enumerate(rounds):
+        data: dict[str, Any] = {
+            key: value[s] if isinstance(value, (np.ndarray, SparseRowPolicy)) else value
+            for key, value in val_bandit_data.items()
+        }
+        action_dist = action_dist_val[s]
+        action = data["action"]
+        rows = np.arange(action.shape[0])
+        estimated_rewards = _fit_dm_dr_regression(
+            dataset, round_, data, random_state, fit_cache, timer, base_model, factorize_q_hat
+        )
+        with timer.stage("mips_weights"):
+            w_x_e = _marginal_embedding_weights(
+                data["pi_b"], action_dist, data["p_e_a"], data["action_embed"]
+            )
+        estimated_rewards_mdr = _fit_mdr_regression(
+            dataset, round_, data, random_state, n_jobs, fit_cache, timer, base_model
+        )
+        per_round["pi_e_factual"].append(policy_factual_prob(action_dist, action))
+        per_round["q_pi"].append(policy_expected_reward(action_dist, estimated_rewards))
+        per_round["q_hat_factual"].append(factual_expected_reward(estimated_rewards, action))
+        per_round["w_x_e"].append(w_x_e)
+        per_round["q_hat_mdr_factual"].append(estimated_rewards_mdr[rows, action, 0])
+
+    with timer.stage("batched_estimates"):
+        return estimate_all(
+            reward=val_bandit_data["reward"],
+            pscore=val_bandit_data["pscore"],
+            **{key: np.stack(values) for key, values in per_round.items()},
+        )
+
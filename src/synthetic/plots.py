@@ -1,8 +1,18 @@
-import matplotlib.pyplot as plt
-import seaborn as sns
-from matplotlib.lines import Line2D
+"""Line plots of MSE / squared bias / variance; matplotlib and seaborn load on first use."""
 
-plt.style.use("ggplot")
+from __future__ import annotations
+
+from collections.abc import Sequence
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from synthetic.execution import map_tasks, resolve_n_workers
+
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+    from matplotlib.lines import Line2D
+
+PLOT_STYLE = "ggplot"
 
 registered_colors = {
     "IPS": "tab:red",
@@ -20,36 +30,40 @@ num_estimators = len(legend)
 
 palette = [registered_colors[est] for est in legend]
 
-line_legend_elements = [
-    Line2D(
-        [0],
-        [0],
-        color=registered_colors[est],
-        linewidth=5,
-        marker="o",
-        markerfacecolor=registered_colors[est],
-        markersize=10,
-        label=est,
-    )
-    for est in legend
-]
+
+def _line_legend_elements() -> list[Line2D]:
+    from matplotlib.lines import Line2D
+
+    return [
+        Line2D(
+            [0],
+            [0],
+            color=registered_colors[est],
+            linewidth=5,
+            marker="o",
+            markerfacecolor=registered_colors[est],
+            markersize=10,
+            label=est,
+        )
+        for est in legend
+    ]
+
 
 y_list = ["se", "bias", "variance"]
 title_list = ["MSE", "Squared Bias", "Variance"]
 
 
-def plot_line(
-    result_df,
-    x,
-    xlabel,
-    xticklabels=None,
+def _draw_line(
+    fig: Figure,
+    axes: Any,
+    result_df: Any,
+    x: str,
+    xlabel: str,
+    xticklabels: Any = None,
     flag_log_scale: bool = False,
-    flag_share_y_scale: bool = True,
     markersize: int = 12,
 ) -> None:
-    fig, axes = plt.subplots(
-        1, 3, figsize=(27, 7), tight_layout=True, sharey=flag_share_y_scale
-    )
+    import seaborn as sns
 
     for i in range(3):
         sns.lineplot(
@@ -81,11 +95,108 @@ def plot_line(
         axes[i].tick_params(axis="both", which="major", labelsize=20)
 
     fig.legend(
-        handles=line_legend_elements,
+        handles=_line_legend_elements(),
         loc="upper center",
         bbox_to_anchor=(0.5, 1.15),
         ncol=num_estimators,
         fontsize=25,
     )
 
-    plt.show()
+
+def plot_line(
+    result_df,
+    x,
+    xlabel,
+    xticklabels=None,
+    flag_log_scale: bool = False,
+    flag_share_y_scale: bool = True,
+    markersize: int = 12,
+) -> None:
+    """Draw MSE / squared bias / variance against ``x`` and show it (interactive use)."""
+    import matplotlib.pyplot as plt
+
+    with plt.style.context(PLOT_STYLE):
+        fig, axes = plt.subplots(
+            1, 3, figsize=(27, 7), tight_layout=True, sharey=flag_share_y_scale
+        )
+        _draw_line(fig, axes, result_df, x, xlabel, xticklabels, flag_log_scale, markersize)
+        plt.show()
+
+
+def save_line(
+    path_stem: str | Path,
+    result_df,
+    x,
+    xlabel,
+    xticklabels=None,
+    flag_log_scale: bool = False,
+    flag_share_y_scale: bool = True,
+    markersize: int = 12,
+    formats: Sequence[str] = ("png",),
+) -> list[Path]:
+    """Render the ``plot_line`` figure off-screen and write ``<path_stem>.<fmt>`` per format.
+
+    The figure is built on a bare ``Figure`` (Agg canvas), never through pyplot, so this works
+    without a display, does not block and is safe to call from worker processes.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.style import context
+
+    paths = []
+    with context(PLOT_STYLE):
+        fig = Figure(figsize=(27, 7), tight_layout=True)
+        axes = fig.subplots(1, 3, sharey=flag_share_y_scale)
+        _draw_line(fig, axes, result_df, x, xlabel, xticklabels, flag_log_scale, markersize)
+        for fmt in formats:
+            path = Path(f"{path_stem}.{fmt}")
+            fig.savefig(path, format=fmt, bbox_inches="tight")
+            paths.append(path)
+    return paths
+
+
+def _save_line_task(task: tuple[str, dict[str, Any]]) -> list[Path]:
+    path_stem, kwargs = task
+    return save_line(path_stem, **kwargs)
+
+
+def render_plots(
+    out_dir: str | Path,
+    result_df,
+    x,
+    xlabel,
+    xticklabels=None,
+    markersize: int = 12,
+    formats: Sequence[str] = ("png", "pdf"),
+    backend: str = "processes",
+    n_workers: int | None = None,
+) -> list[Path]:
+    """Write the four share-y / log-scale variants of ``plot_line`` to ``out_dir``.
+
+    Files are named ``<x>_{sharey,freey}_{linear,log}.<fmt>``; with ``backend="processes"``
+    the variants are rendered concurrently (see ``synthetic.execution.map_tasks``).
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    tasks = [
+        (
+            str(out_dir / f"{x}_{'sharey' if share else 'freey'}_{'log' if log else 'linear'}"),
+            dict(
+                result_df=result_df,
+                x=x,
+                xlabel=xlabel,
+                xticklabels=xticklabels,
+                flag_log_scale=log,
+                flag_share_y_scale=share,
+                markersize=markersize,
+                formats=tuple(formats),
+            ),
+        )
+        for share in (True, False)
+        for log in (False, True)
+    ]
+    if backend == "processes" and min(resolve_n_workers(n_workers, 1), len(tasks)) == 1:
+        backend = "serial"  # a single worker would only add the spawn cost
+    results = map_tasks(
+        _save_line_task, tasks, backend=backend, n_workers=n_workers, desc="plots"
+    )
+    return [path for paths in results for path in paths]
@@ -1,22 +1,138 @@
+from dataclasses import dataclass
+from typing import Any
+
 import numpy as np
 
 
+@dataclass
+class EpsGreedyPolicy:
+    """Epsilon-greedy policy stored as one greedy action per row instead of a dense distribution.
+
+    Equivalent to ``gen_eps_greedy`` (:math:`\\pi(a|x_i) = (1-\\epsilon)\\,1[a = a^*_i] +
+    \\epsilon / |\\mathcal{A}|`) at ``O(n_rounds)`` memory; ``to_dense`` materializes it.
+    """
+
+    greedy_action: np.ndarray
+    eps: float
+    n_actions: int
+
+    @classmethod
+    def from_expected_reward(
+        cls,
+        expected_reward: np.ndarray,
+        is_optimal: bool = True,
+        eps: float = 0.0,
+    ) -> "EpsGreedyPolicy":
+        if is_optimal:
+            greedy_action = np.argmax(expected_reward, axis=1)
+        else:
+            greedy_action = np.argmin(expected_reward, axis=1)
+        return cls(greedy_action=greedy_action, eps=eps, n_actions=expected_reward.shape[1])
+
+    @property
+    def n_rounds(self) -> int:
+        return int(self.greedy_action.shape[0])
+
+    def policy_value(self, q: np.ndarray) -> np.ndarray:
+        "Per-row value :math:`\\sum_a \\pi(a|x_i) q(x_i,a)` for ``q`` of shape (n_rounds, n_actions[, 1])."
+        q = q[:, :, 0] if q.ndim == 3 else q
+        greedy_q = q[np.arange(self.n_rounds), self.greedy_action]
+        return np.asarray((1.0 - self.eps) * greedy_q + self.eps * q.mean(axis=1))
+
+    def action_prob(self, action: np.ndarray) -> np.ndarray:
+        "Probability :math:`\\pi(a_i|x_i)` of the given action in every row."
+        return np.where(action == self.greedy_action, 1.0 - self.eps, 0.0) + (
+            self.eps / self.n_actions
+        )
+
+    def marginal_embedding_prob(self, p_e_a: np.ndarray, action_embed: np.ndarray) -> np.ndarray:
+        "Marginal probability :math:`p(e_i|x_i,\\pi) = \\prod_d \\sum_a \\pi(a|x_i) p(e_{i,d}|a)`."
+        prob = np.ones(self.n_rounds)
+        for d in np.arange(p_e_a.shape[-1]):
+            p_e_greedy = p_e_a[self.greedy_action, action_embed[:, d], d]
+            p_e_uniform = p_e_a[:, :, d].mean(axis=0)[action_embed[:, d]]
+            prob *= (1.0 - self.eps) * p_e_greedy + self.eps * p_e_uniform
+        return prob
+
+    def to_dense(self) -> np.ndarray:
+        "Dense action distribution of shape (n_rounds, n_actions, 1), as ``gen_eps_greedy``."
+        base_pol = np.zeros((self.n_rounds, self.n_actions))
+        base_pol[np.arange(self.n_rounds), self.greedy_action] = 1
+        pol = (1.0 - self.eps) * base_pol
+        pol += self.eps / self.n_actions
+        return pol[:, :, np.newaxis]
+
+
+@dataclass
+class SparseRowPolicy:
+    """Policy stored as the supported actions of every row and their probabilities.
+
+    Row ``i`` puts probability ``probs[i, j]`` on action ``indices[i, j]`` and none on the other
+    actions, as the behavior policy with ``n_deficient_actions > 0`` does. Both arrays have
+    shape ``(n_rounds, n_supported)``, so memory is ``O(n_rounds * n_supported)``;
+    ``to_dense`` materializes it. Indexing (``policy[rows]``) selects rounds, or replicates of
+    a stacked policy.
+    """
+
+    indices: np.ndarray
+    probs: np.ndarray
+    n_actions: int
+
+    def __getitem__(self, key: Any) -> "SparseRowPolicy":
+        return SparseRowPolicy(self.indices[key], self.probs[key], self.n_actions)
+
+    @property
+    def n_rounds(self) -> int:
+        return int(self.indices.shape[0])
+
+    def policy_value(self, q: np.ndarray) -> np.ndarray:
+        "Per-row value :math:`\\sum_a \\pi(a|x_i) q(x_i,a)` for ``q`` of shape (n_rounds, n_actions[, 1])."
+        q = q[:, :, 0] if q.ndim == 3 else q
+        q_supported = np.take_along_axis(q, self.indices, axis=1)
+        return np.asarray(np.einsum("ij,ij->i", self.probs, q_supported))
+
+    def action_prob(self, action: np.ndarray) -> np.ndarray:
+        "Probability :math:`\\pi(a_i|x_i)` of the given action in every row (0 if unsupported)."
+        match = self.indices == action[:, np.newaxis]
+        return np.asarray(np.where(match, self.probs, 0.0).sum(axis=1))
+
+    def marginal_embedding_prob(
+        self, p_e_a: np.ndarray, action_embed: np.ndarray, chunk_size: int = 1024
+    ) -> np.ndarray:
+        "Marginal probability :math:`p(e_i|x_i,\\pi)`, gathering ``chunk_size`` rows of ``p_e_a`` at a time."
+        prob = np.ones(self.n_rounds)
+        for start in range(0, self.n_rounds, chunk_size):
+            rows = slice(start, start + chunk_size)
+            indices, probs = self.indices[rows], self.probs[rows]
+            for d in range(p_e_a.shape[-1]):
+                p_e = p_e_a[indices, action_embed[rows, d][:, np.newaxis], d]
+                prob[rows] *= np.einsum("ij,ij->i", probs, p_e)
+        return prob
+
+    def to_dense(self) -> np.ndarray:
+        "Dense action distribution of shape (n_rounds, n_actions, 1)."
+        pol = np.zeros((self.n_rounds, self.n_actions), dtype=self.probs.dtype)
+        np.put_along_axis(pol, self.indices, self.probs, axis=1)
+        return pol[:, :, np.newaxis]
+
+
 def gen_eps_greedy(
     expected_reward: np.ndarray,
     is_optimal: bool = True,
     eps: float = 0.0,
 ) -> np.ndarray:
     "Generate an evaluation policy via the epsilon-greedy rule."
-    base_pol = np.zeros_like(expected_reward)
-    if is_optimal:
-        a = np.argmax(expected_reward, axis=1)
-    else:
-        a = np.argmin(expected_reward, axis=1)
-    base_pol[
-        np.arange(expected_reward.shape[0]),
-        a,
-    ] = 1
-    pol = (1.0 - eps) * base_pol
-    pol += eps / expected_reward.shape[1]
-
-    return pol[:, :, np.newaxis]
+    return EpsGreedyPolicy.from_expected_reward(
+        expected_reward, is_optimal=is_optimal, eps=eps
+    ).to_dense()
+
+
+def eps_greedy_policy_value(
+    expected_reward: np.ndarray,
+    is_optimal: bool = True,
+    eps: float = 0.0,
+) -> np.ndarray:
+    "Per-row value of the epsilon-greedy policy without building its action distribution."
+    return EpsGreedyPolicy.from_expected_reward(
+        expected_reward, is_optimal=is_optimal, eps=eps
+    ).policy_value(expected_reward)
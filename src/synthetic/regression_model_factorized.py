@@ -0,0 +1,123 @@
+"""DM/DR reward regression whose predictions are stored per distinct action context.
+
+``obp.ope.RegressionModel`` predicts ``q_hat`` as a dense ``(n_rounds, n_actions, 1)`` array,
+but its design rows ``[context, action_context[a]]`` are equal for actions with equal
+``action_context`` rows. ``FactorizedRegressionModel`` fits exactly like ``RegressionModel``
+and evaluates the base model once per distinct action-context row, returning a
+``FactorizedQHat`` whose expansion equals ``RegressionModel.fit_predict``.
+
+As in ``RegressionModelMDR``, ``max_predict_rows`` bounds the rows of one ``base_model.predict``
+call: as many distinct action-context rows as fit are stacked into one design matrix, which is
+allocated once. ``dtype`` (also as in ``RegressionModelMDR``) is the floating-point type of the design matrix and of
+the ``FactorizedQHat`` values; ``"float32"`` halves the stored predictions.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+from obp.ope import RegressionModel
+from sklearn.base import is_classifier
+from sklearn.model_selection import KFold
+from sklearn.utils import check_scalar
+
+from synthetic.estimators import FactorizedQHat
+
+
+@dataclass
+class FactorizedRegressionModel(RegressionModel):
+    """``RegressionModel`` (``len_list=1``) whose predictions are a ``FactorizedQHat``."""
+
+    max_predict_rows: int = 1_000_000
+    dtype: str = "float64"
+
+    def __post_init__(self) -> None:
+        super().__post_init__()
+        check_scalar(self.max_predict_rows, "max_predict_rows", int, min_val=1)
+        if self.len_list != 1:
+            raise ValueError(f"`len_list` must be 1, but {self.len_list} is given")
+        if self.dtype not in ("float64", "float32"):
+            raise ValueError(f"`dtype` must be 'float64' or 'float32', but {self.dtype} is given")
+
+    def _pre_process_for_reg_model(
+        self, context: np.ndarray, action: np.ndarray, action_context: np.ndarray
+    ) -> np.ndarray:
+        return np.asarray(
+            super()._pre_process_for_reg_model(context, action, action_context), dtype=self.dtype
+        )
+
+    def predict_factorized(self, context: np.ndarray) -> FactorizedQHat:
+        """``predict(context)`` as one prediction per round and distinct action-context row."""
+        assert self.action_context is not None
+        unique_ctx, context_index = np.unique(self.action_context, axis=0, return_inverse=True)
+        context_index = context_index.reshape(-1)
+        n = context.shape[0]
+        n_unique = unique_ctx.shape[0]
+        values = np.zeros((n, n_unique), dtype=self.dtype)
+        if n == 0:
+            return FactorizedQHat(values=values, context_index=context_index)
+        n_block = max(1, min(n_unique, self.max_predict_rows // n))
+        X = np.ascontiguousarray(
+            self._pre_process_for_reg_model(
+                context=np.tile(context, (n_block, 1)),
+                action=np.repeat(np.arange(n_block), n),
+                action_context=unique_ctx,
+            )
+        )
+        dim_action_ctx = unique_ctx.shape[1]
+        base_model = self.base_model_list[0]
+        for start in np.arange(0, n_unique, n_block):
+            rows = np.arange(start, min(start + n_block, n_unique))
+            X_block = X[: rows.shape[0] * n]
+            X_block.reshape(rows.shape[0], n, -1)[:, :, -dim_action_ctx:] = unique_ctx[
+                rows, np.newaxis, :
+            ]
+            q_hat_ = (
+                base_model.predict_proba(X_block)[:, 1]
+                if is_classifier(base_model)
+                else base_model.predict(X_block)
+            )
+            values[:, rows] = q_hat_.reshape(rows.shape[0], n).T
+        return FactorizedQHat(values=values, context_index=context_index)
+
+    def fit_predict(  # type: ignore[override]
+        self,
+        context: np.ndarray,
+        action: np.ndarray,
+        reward: np.ndarray,
+        pscore: np.ndarray | None = None,
+        position: np.ndarray | None = None,
+        action_dist: np.ndarray | None = None,
+        n_folds: int = 1,
+        random_state: int | None = None,
+    ) -> FactorizedQHat:
+        """``RegressionModel.fit_predict`` with the same folds, returning a ``FactorizedQHat``."""
+        check_scalar(n_folds, "n_folds", int, min_val=1)
+        fit_kwargs = dict(
+            context=context,
+            action=action,
+            reward=reward,
+            pscore=pscore,
+            position=position,
+            action_dist=action_dist,
+        )
+        if n_folds == 1:
+            self.fit(**fit_kwargs)
+            return self.predict_factorized(context)
+        q_hat: FactorizedQHat | None = None
+        kf = KFold(n_splits=n_folds, shuffle=True, random_state=random_state)
+        for train_idx, test_idx in kf.split(context):
+            self.fit(
+                **{
+                    name: value[train_idx] if value is not None else None
+                    for name, value in fit_kwargs.items()
+                }
+            )
+            fold = self.predict_factorized(context[test_idx])
+            if q_hat is None:
+                q_hat = FactorizedQHat(
+                    values=np.zeros((context.shape[0], fold.values.shape[1]), dtype=self.dtype),
+                    context_index=fold.context_index,
+                )
+            q_hat.values[test_idx] = fold.values
+        assert q_hat is not None
+        return q_hat
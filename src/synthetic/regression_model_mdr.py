@@ -7,9 +7,10 @@ This mirrors the API shape of ``obp.ope.RegressionModel`` but conditions on disc
 embeddings for the Marginalized Doubly Robust (MDR) construction.
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 
 import numpy as np
+from joblib import Parallel, delayed
 from sklearn.base import BaseEstimator, clone, is_classifier
 from sklearn.model_selection import KFold
 from sklearn.utils import check_random_state, check_scalar
@@ -44,6 +45,21 @@ class RegressionModelMDR(BaseEstimator):
         Must be one of ['normal', 'iw', 'mrdr'] where 'iw' stands for importance weighting and
         'mrdr' stands for more robust doubly robust.
 
+    max_predict_rows: int, default=1_000_000
+        Row budget of a single `base_model.predict` call in `predict`.
+        As many distinct action-context rows as fit in the budget are stacked into one design matrix.
+
+    n_jobs: int, default=None
+        Number of cross-fitting folds fitted and predicted concurrently in `fit_predict`.
+        Every fold gets its own clone of `base_model`, so results do not depend on `n_jobs`.
+        Folds run in threads by default; use `joblib.parallel_config(backend="loky")` for processes.
+        None means 1 unless in a `joblib.parallel_config` context.
+
+    dtype: str, default='float64'
+        Floating-point type of the design matrix and of `q_hat`.
+        'float32' halves their memory; tree ensembles in scikit-learn cast features to float32
+        internally anyway, so their fits are unaffected.
+
     References
     -----------
     Mehrdad Farajtabar, Yinlam Chow, and Mohammad Ghavamzadeh.
@@ -62,11 +78,15 @@ class RegressionModelMDR(BaseEstimator):
     len_list: int = 1
     action_context: np.ndarray | None = None
     fitting_method: str = "normal"
+    max_predict_rows: int = 1_000_000
+    n_jobs: int | None = None
+    dtype: str = "float64"
 
     def __post_init__(self) -> None:
         """Initialize Class."""
         check_scalar(self.n_actions, "n_actions", int, min_val=2)
         check_scalar(self.len_list, "len_list", int, min_val=1)
+        check_scalar(self.max_predict_rows, "max_predict_rows", int, min_val=1)
         if not (
             isinstance(self.fitting_method, str)
             and self.fitting_method in ["normal", "iw", "mrdr"]
@@ -74,6 +94,8 @@ class RegressionModelMDR(BaseEstimator):
             raise ValueError(
                 f"`fitting_method` must be one of 'normal', 'iw', or 'mrdr', but {self.fitting_method} is given"
             )
+        if self.dtype not in ("float64", "float32"):
+            raise ValueError(f"`dtype` must be 'float64' or 'float32', but {self.dtype} is given")
         if not isinstance(self.base_model, BaseEstimator):
             raise ValueError(
                 "`base_model` must be BaseEstimator or a child class of BaseEstimator"
@@ -196,26 +218,49 @@ class RegressionModelMDR(BaseEstimator):
         q_hat: array-like, shape (n_rounds_of_new_data, n_actions, len_list)
             Expected rewards of new data estimated by the regression model.
 
+        Note
+        ------
+        Actions with identical `action_context` rows have identical design rows, so the base
+        model is evaluated once per distinct action-context row and the result is broadcast
+        to the actions sharing it.
+        Distinct rows are predicted in blocks of `max_predict_rows // n_rounds_of_new_data`
+        at a time. The design matrix of a block is allocated once; between blocks only its
+        trailing action-context columns are rewritten, which assumes
+        `_pre_process_for_reg_model` keeps the action context in the last columns.
+
         """
         n = context.shape[0]
         action_ctx = self.action_context
         assert action_ctx is not None
-        q_hat = np.zeros((n, self.n_actions, self.len_list))
-        for action_ in np.arange(self.n_actions):
+        if n == 0:
+            return np.zeros((n, self.n_actions, self.len_list), dtype=self.dtype)
+        unique_ctx, ctx_index = np.unique(action_ctx, axis=0, return_inverse=True)
+        n_unique = unique_ctx.shape[0]
+        q_hat_unique = np.zeros((n, n_unique, self.len_list), dtype=self.dtype)
+        n_block = max(1, min(n_unique, self.max_predict_rows // n))
+        X = np.ascontiguousarray(
+            self._pre_process_for_reg_model(
+                context=np.tile(context, (n_block,) + (1,) * (context.ndim - 1)),
+                embedding=np.tile(embedding, (n_block,) + (1,) * (embedding.ndim - 1)),
+                action=np.repeat(np.arange(n_block), n),
+                action_context=unique_ctx,
+            )
+        )
+        dim_action_ctx = action_ctx.shape[1]
+        for start in np.arange(0, n_unique, n_block):
+            rows = np.arange(start, min(start + n_block, n_unique))
+            X_block = X[: rows.shape[0] * n]
+            X_block.reshape(rows.shape[0], n, -1)[:, :, -dim_action_ctx:] = unique_ctx[
+                rows, np.newaxis, :
+            ]
             for pos_ in np.arange(self.len_list):
-                X = self._pre_process_for_reg_model(
-                    context=context,
-                    embedding=embedding,
-                    action=action_ * np.ones(n, int),
-                    action_context=action_ctx,
-                )
                 q_hat_ = (
-                    self.base_model_list[pos_].predict_proba(X)[:, 1]
+                    self.base_model_list[pos_].predict_proba(X_block)[:, 1]
                     if is_classifier(self.base_model_list[pos_])
-                    else self.base_model_list[pos_].predict(X)
+                    else self.base_model_list[pos_].predict(X_block)
                 )
-                q_hat[np.arange(n), action_, pos_] = q_hat_
-        return q_hat
+                q_hat_unique[:, rows, pos_] = q_hat_.reshape(rows.shape[0], n).T
+        return q_hat_unique[:, ctx_index.reshape(-1), :]
 
     def fit_predict(
         self,
@@ -313,28 +358,57 @@ class RegressionModelMDR(BaseEstimator):
                 action_dist=action_dist,
             )
             return self.predict(context=context, embedding=embedding)
-        else:
-            q_hat = np.zeros((n_rounds, self.n_actions, self.len_list))
         kf = KFold(n_splits=n_folds, shuffle=True, random_state=random_state)
         kf.get_n_splits(context)
-        for train_idx, test_idx in kf.split(context):
-            action_dist_tr = (
-                action_dist[train_idx] if action_dist is not None else action_dist
-            )
-            self.fit(
-                context=context[train_idx],
-                embedding=embedding[train_idx],
-                action=action[train_idx],
-                reward=reward[train_idx],
-                pscore=pscore[train_idx],
-                position=position[train_idx],
-                action_dist=action_dist_tr,
-            )
-            q_hat[test_idx, :, :] = self.predict(
-                context=context[test_idx], embedding=embedding[train_idx]
+        fold_results = Parallel(n_jobs=self.n_jobs, prefer="threads")(
+            delayed(self._fit_predict_fold)(
+                train_idx=train_idx,
+                test_idx=test_idx,
+                context=context,
+                embedding=embedding,
+                action=action,
+                reward=reward,
+                pscore=pscore,
+                position=position,
+                action_dist=action_dist,
             )
+            for train_idx, test_idx in kf.split(context)
+        )
+        q_hat = np.zeros((n_rounds, self.n_actions, self.len_list), dtype=self.dtype)
+        for test_idx, q_hat_fold, _ in fold_results:
+            q_hat[test_idx, :, :] = q_hat_fold
+        self.fold_models_ = [fold_model for _, _, fold_model in fold_results]
+        self.base_model_list = self.fold_models_[-1].base_model_list
         return q_hat
 
+    def _fit_predict_fold(
+        self,
+        train_idx: np.ndarray,
+        test_idx: np.ndarray,
+        context: np.ndarray,
+        embedding: np.ndarray,
+        action: np.ndarray,
+        reward: np.ndarray,
+        pscore: np.ndarray,
+        position: np.ndarray,
+        action_dist: np.ndarray | None,
+    ) -> tuple[np.ndarray, np.ndarray, "RegressionModelMDR"]:
+        """Fit a fresh copy of this model on one fold and predict its held-out rows."""
+        fold_model = replace(self)
+        fold_model.fit(
+            context=context[train_idx],
+            embedding=embedding[train_idx],
+            action=action[train_idx],
+            reward=reward[train_idx],
+            pscore=pscore[train_idx],
+            position=position[train_idx],
+            action_dist=action_dist[train_idx] if action_dist is not None else action_dist,
+        )
+        q_hat_fold = fold_model.predict(
+            context=context[test_idx], embedding=embedding[test_idx]
+        )
+        return test_idx, q_hat_fold, fold_model
+
     def _pre_process_for_reg_model(
         self,
         context: np.ndarray,
@@ -363,5 +437,5 @@ class RegressionModelMDR(BaseEstimator):
         """
         return np.asarray(
             np.c_[context, embedding, action_context[action]],
-            dtype=float,
+            dtype=self.dtype,
         )
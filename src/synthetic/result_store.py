@@ -0,0 +1,94 @@
+"""Append-only on-disk store of sweep results, used to checkpoint and resume long runs."""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+
+def sweep_key(sweep_value: Any) -> str:
+    """Canonical string for a sweep value (stable across runs and JSON round trips)."""
+    return json.dumps(sweep_value, sort_keys=True)
+
+
+class ResultStore:
+    """JSON-lines file with one record per ground truth or finished (sweep value, seed) task.
+
+    Every record is flushed and fsynced as soon as it is appended, so a crash loses at most the
+    record being written; a truncated last line is ignored when the store is read back.
+    The first record holds the config fingerprint that ``resume`` checks against.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+
+    def reset(self, fingerprint: dict[str, Any]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text("")
+        self._append({"kind": "config", "fingerprint": fingerprint})
+
+    def resume(self, fingerprint: dict[str, Any]) -> None:
+        """Reopen an existing store written for ``fingerprint`` and drop a partially written tail."""
+        if not self.path.exists():
+            raise FileNotFoundError(
+                f"No result store at {self.path}; point hydra.run.dir at the run to resume"
+            )
+        stored = [r["fingerprint"] for r in self.records() if r["kind"] == "config"]
+        if not stored or stored[0] != json.loads(json.dumps(fingerprint)):
+            raise ValueError(
+                f"Result store {self.path} was written for a different configuration; "
+                "refusing to resume"
+            )
+        data = self.path.read_bytes()
+        if data and not data.endswith(b"\n"):
+            with self.path.open("r+b") as f:
+                f.truncate(data.rfind(b"\n") + 1)
+
+    def append_policy_value(self, sweep_value: Any, policy_value: float) -> None:
+        self._append(
+            {"kind": "policy_value", "sweep_value": sweep_value, "policy_value": float(policy_value)}
+        )
+
+    def append_estimates(self, sweep_value: Any, seed: int, estimates: dict[str, Any]) -> None:
+        self._append(
+            {
+                "kind": "estimates",
+                "sweep_value": sweep_value,
+                "seed": int(seed),
+                "estimates": {name: float(value) for name, value in estimates.items()},
+            }
+        )
+
+    def records(self) -> list[dict[str, Any]]:
+        if not self.path.exists():
+            return []
+        records = []
+        with self.path.open() as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue  # partially written tail of an interrupted run
+        return records
+
+    def policy_values(self) -> dict[str, float]:
+        return {
+            sweep_key(r["sweep_value"]): r["policy_value"]
+            for r in self.records()
+            if r["kind"] == "policy_value"
+        }
+
+    def estimates(self) -> dict[tuple[str, int], dict[str, float]]:
+        return {
+            (sweep_key(r["sweep_value"]), r["seed"]): r["estimates"]
+            for r in self.records()
+            if r["kind"] == "estimates"
+        }
+
+    def _append(self, record: dict[str, Any]) -> None:
+        with self.path.open("a") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
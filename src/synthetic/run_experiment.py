@@ -1,13 +1,18 @@
-"""Hydra CLI for synthetic OPE sweeps."""
+"""Hydra CLI for synthetic OPE sweeps.
+
+Only Hydra is imported at module load: the experiment code (obp, scikit-learn, pandas, ...) is
+imported on the first call, so ``--help`` / ``--cfg`` and spawned worker processes, which
+re-import this module as ``__mp_main__``, start quickly.
+"""
 
 import hydra
 from omegaconf import DictConfig
 
-from synthetic.experiment_runner import run_sweep_experiment
-
 
 @hydra.main(version_base=None, config_path="hydra_conf", config_name="config")
 def main(cfg: DictConfig) -> None:
+    from synthetic.experiment_runner import run_sweep_experiment
+
     run_sweep_experiment(cfg)
 
 
@@ -0,0 +1,72 @@
+"""Categorical samplers for ``SyntheticBanditDatasetWithActionEmbeds``.
+
+- ``sample_inverse_cdf``: one draw per row of a per-row distribution (zr-obp
+  ``sample_action_fast``): the first category whose cumulative probability exceeds a uniform.
+- ``CategoricalCDFTable``: the same inverse-CDF draw from a *fixed* set of distributions (e.g.
+  ``p(e|a)`` of one embedding dimension). The cumulative tables are built once instead of per
+  draw; with many categories a draw is two binary searches, so sampling ``n`` categories costs
+  ``O(n log(n_dists * n_cats))`` rather than ``O(n * n_cats)``. Draws are identical to
+  ``sample_inverse_cdf`` on the gathered rows with the same random state.
+- ``sample_gumbel_max``: ``argmax(logits + Gumbel noise)``, a draw from ``softmax(logits)``
+  without normalizing; ``-inf`` logits are never drawn. Its draws differ from inverse-CDF ones.
+"""
+
+import numpy as np
+from sklearn.utils import check_random_state
+
+# Up to this many categories, comparing a gathered precomputed CDF row is faster than searching.
+_GATHER_MAX_CATS = 64
+
+
+def sample_inverse_cdf(probs: np.ndarray, random_state: int | None = None) -> np.ndarray:
+    """One inverse-CDF draw from each row of ``probs`` (``(n, n_cats)``)."""
+    random_ = check_random_state(random_state)
+    uniform_rvs = random_.uniform(size=probs.shape[0])[:, np.newaxis]
+    cdf = probs.cumsum(axis=1)
+    return np.asarray((cdf > uniform_rvs).argmax(axis=1), dtype=np.int64)
+
+
+def sample_gumbel_max(logits: np.ndarray, random_state: int | None = None) -> np.ndarray:
+    """One draw from ``softmax(logits)`` per row of ``logits`` (``(n, n_cats)``)."""
+    random_ = check_random_state(random_state)
+    perturbed = logits + random_.gumbel(size=logits.shape)
+    return np.asarray(perturbed.argmax(axis=1), dtype=np.int64)
+
+
+class CategoricalCDFTable:
+    """Inverse-CDF sampler over the rows of ``probs`` (``(n_dists, n_cats)``), built once.
+
+    Each cumulative probability is replaced by its rank among all distinct cumulative
+    probabilities and offset by its row, giving one sorted integer key array. "first category
+    of row ``i`` with cdf > u" is then a search for ``i * n_values + #{values <= u}`` in the
+    keys; comparing ranks instead of floats keeps the draws exact. Tables with at most
+    ``_GATHER_MAX_CATS`` categories compare gathered CDF rows instead, which is faster there.
+    """
+
+    def __init__(self, probs: np.ndarray) -> None:
+        if probs.ndim != 2:
+            raise ValueError(f"`probs` must be 2-dimensional, but shape {probs.shape} is given")
+        self.n_dists, self.n_cats = probs.shape
+        cdf = probs.cumsum(axis=1)
+        if self.n_cats <= _GATHER_MAX_CATS:
+            self._cdf = cdf
+            return
+        self._values = np.unique(cdf)
+        ranks = np.searchsorted(self._values, cdf)
+        row_offsets = np.arange(self.n_dists, dtype=np.int64)[:, np.newaxis] * len(self._values)
+        self._keys = (row_offsets + ranks).ravel()
+
+    def sample(self, dists: np.ndarray, random_state: int | None = None) -> np.ndarray:
+        """One category per entry of ``dists`` (row indices of ``probs``)."""
+        random_ = check_random_state(random_state)
+        uniform_rvs = random_.uniform(size=dists.shape[0])
+        dists = np.asarray(dists, dtype=np.int64)
+        if self.n_cats <= _GATHER_MAX_CATS:
+            flg = self._cdf[dists] > uniform_rvs[:, np.newaxis]
+            return np.asarray(flg.argmax(axis=1), dtype=np.int64)
+        n_below = np.searchsorted(self._values, uniform_rvs, side="right")
+        pos = np.searchsorted(self._keys, dists * len(self._values) + n_below, side="left")
+        cats = pos - dists * self.n_cats
+        # u at or beyond the row's last cdf value (rounding): sample_inverse_cdf returns 0
+        cats[cats == self.n_cats] = 0
+        return np.asarray(cats)
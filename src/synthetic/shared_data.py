@@ -0,0 +1,64 @@
+"""Produce once the ground truths and validation logs that several multirun jobs would each draw.
+
+Used by the ``shared_data`` Hydra launcher (``hydra_plugins.shared_data_launcher``). Jobs are
+matched by fingerprint (``ground_truth_cache_key`` / ``dataset_cache_key``), not by their
+overrides, so e.g. ``experiment=beta`` and ``experiment=reward_std`` share every ground truth
+and validation log whose dataset parameters coincide.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Sequence
+from typing import Any
+
+from omegaconf import OmegaConf
+
+# (resolved job config, sweep value, seed); seed None means the ground truth of the sweep value
+SharedDataTask = tuple[dict[str, Any], Any, int | None]
+
+
+def plan_shared_data(cfg_containers: Sequence[dict[str, Any]]) -> list[SharedDataTask]:
+    """One task per distinct ground truth, plus one per validation log needed by 2+ jobs.
+
+    Validation logs used by a single job are left to that job: writing them to disk would
+    cost more than it saves.
+    """
+    from synthetic.experiment_runner import ground_truth_cache_key, validation_cache_keys
+
+    ground_truths: dict[str, SharedDataTask] = {}
+    validation: dict[str, SharedDataTask] = {}
+    uses: Counter[str] = Counter()
+    for cfg_container in cfg_containers:
+        cfg = OmegaConf.create(cfg_container)
+        if bool(cfg.plots_only):
+            continue
+        for sweep_value in cfg.experiment.sweep_values:
+            ground_truths.setdefault(
+                ground_truth_cache_key(cfg, sweep_value), (cfg_container, sweep_value, None)
+            )
+            keys = validation_cache_keys(cfg, sweep_value, int(cfg.n_seeds))
+            for seed_i, key in enumerate(keys):
+                uses[key] += 1
+                validation.setdefault(key, (cfg_container, sweep_value, seed_i))
+    shared = [task for key, task in validation.items() if uses[key] > 1]
+    return list(ground_truths.values()) + shared
+
+
+def prepare_shared_task(task: SharedDataTask) -> None:
+    """Compute one ground truth into the ground-truth cache, or write one validation log."""
+    from synthetic.dataset_cache import cached_batch_bandit_feedback
+    from synthetic.experiment_runner import (
+        build_dataset_and_rounds,
+        ground_truth_policy_value,
+        seed_random_state,
+    )
+
+    cfg_container, sweep_value, seed_i = task
+    cfg = OmegaConf.create(cfg_container)
+    if seed_i is None:
+        ground_truth_policy_value(cfg, sweep_value)
+        return
+    dataset, _, n_val = build_dataset_and_rounds(cfg, sweep_value)
+    dataset.random_ = seed_random_state(int(cfg.random_state), seed_i)
+    cached_batch_bandit_feedback(dataset, n_rounds=n_val, cache_dir=cfg.dataset_cache.dir)
@@ -0,0 +1,86 @@
+"""MIPS and MDR over a stream of log mini-batches, keeping only running sums.
+
+``partial_update(batch, action_dist)`` folds in one batch in ``O(len(batch))`` time and
+``estimate()`` returns the estimate over everything seen so far in ``O(1)``, so logs larger
+than memory can be evaluated batch by batch. A batch is a dict with the keys of
+``obtain_batch_bandit_feedback`` (``context``, ``action``, ``action_embed``, ``reward``,
+``pi_b``); ``action_dist`` is the evaluation policy on that batch, dense or compact.
+Estimates equal the in-memory ones (``run_ope``) on the concatenated log up to float rounding.
+"""
+
+from collections.abc import Mapping
+from typing import Any
+
+import numpy as np
+
+from synthetic.estimators import policy_expected_reward
+from synthetic.ope import _marginal_embedding_weights
+
+
+class StreamingMIPS:
+    """MIPS :math:`n^{-1} \\sum_i w(x_i, e_i) r_i` with the marginal weights of ``run_ope``.
+
+    ``p_e_a`` (``(n_actions, n_cat_per_dim, n_cat_dim)``) is shared by all batches.
+    """
+
+    def __init__(self, p_e_a: np.ndarray) -> None:
+        self.p_e_a = p_e_a
+        self.n_rounds = 0
+        self.sum_weighted_reward = 0.0
+
+    def weights(self, batch: Mapping[str, Any], action_dist: Any) -> np.ndarray:
+        return _marginal_embedding_weights(
+            batch["pi_b"], action_dist, self.p_e_a, batch["action_embed"]
+        )
+
+    def partial_update(self, batch: Mapping[str, Any], action_dist: Any) -> "StreamingMIPS":
+        w_x_e = self.weights(batch, action_dist)
+        self.n_rounds += int(w_x_e.shape[0])
+        self.sum_weighted_reward += float(np.sum(w_x_e * batch["reward"]))
+        return self
+
+    def estimate(self) -> float:
+        if self.n_rounds == 0:
+            raise ValueError("No batch has been seen; call `partial_update` first")
+        return self.sum_weighted_reward / self.n_rounds
+
+
+class StreamingMDR(StreamingMIPS):
+    """MDR: DM term plus the MIPS-weighted residual of the MDR regression, over batches.
+
+    ``reward_model`` (e.g. a fitted ``obp.ope.RegressionModel``) provides ``predict(context)``
+    of shape ``(n, n_actions, 1)`` for the DM term and ``mdr_model`` (a fitted
+    ``RegressionModelMDR``) provides ``predict(context, embedding)``. Both must be fitted
+    beforehand, e.g. on an earlier log: the stream only evaluates them.
+    """
+
+    def __init__(self, p_e_a: np.ndarray, reward_model: Any, mdr_model: Any) -> None:
+        super().__init__(p_e_a)
+        self.reward_model = reward_model
+        self.mdr_model = mdr_model
+        self.sum_q_pi = 0.0
+        self.sum_weighted_q_mdr = 0.0
+
+    def partial_update(self, batch: Mapping[str, Any], action_dist: Any) -> "StreamingMDR":
+        context, action = batch["context"], batch["action"]
+        w_x_e = self.weights(batch, action_dist)
+        q_pi = policy_expected_reward(action_dist, self.reward_model.predict(context))
+        q_hat_mdr = self.mdr_model.predict(context=context, embedding=batch["action_embed"])
+        q_hat_mdr_factual = q_hat_mdr[np.arange(action.shape[0]), action, 0]
+        self.n_rounds += int(action.shape[0])
+        self.sum_q_pi += float(np.sum(q_pi))
+        self.sum_weighted_reward += float(np.sum(w_x_e * batch["reward"]))
+        self.sum_weighted_q_mdr += float(np.sum(w_x_e * q_hat_mdr_factual))
+        return self
+
+    def estimate_dm(self) -> float:
+        if self.n_rounds == 0:
+            raise ValueError("No batch has been seen; call `partial_update` first")
+        return self.sum_q_pi / self.n_rounds
+
+    def estimate_mips(self) -> float:
+        return super().estimate()
+
+    def estimate(self) -> float:
+        residual = self.sum_weighted_reward - self.sum_weighted_q_mdr
+        return self.estimate_dm() + residual / self.n_rounds
@@ -21,21 +21,37 @@ from obp.types import BanditFeedback
 from obp.utils import softmax
 from sklearn.utils import check_random_state, check_scalar
 
+from synthetic.policy import EpsGreedyPolicy, SparseRowPolicy
+from synthetic.samplers import CategoricalCDFTable, sample_gumbel_max, sample_inverse_cdf
 
-def _sample_action_fast(
-    action_dist: np.ndarray, random_state: int | None = None
-) -> np.ndarray:
-    """Row-wise categorical sampling (zr-obp ``sample_action_fast``)."""
-    random_ = check_random_state(random_state)
-    uniform_rvs = random_.uniform(size=action_dist.shape[0])[:, np.newaxis]
-    cum_action_dist = action_dist.cumsum(axis=1)
-    flg = cum_action_dist > uniform_rvs
-    return np.asarray(flg.argmax(axis=1), dtype=np.int64)
+ACTION_SAMPLERS = ("inverse_cdf", "gumbel_max")
+# Rows of the Gumbel matrix drawn at once when choosing the supported actions.
+_SUPPORT_CHUNK_ROWS = 4096
 
 
 @dataclass
 class SyntheticBanditDatasetWithActionEmbeds(BaseBanditDataset):
-    """Synthesize bandit data with action/item category embeddings (OBP / zr-obp semantics)."""
+    """Synthesize bandit data with action/item category embeddings (OBP / zr-obp semantics).
+
+    ``dtype="float32"`` is a compact mode: the ``n_rounds x n_actions`` arrays are computed in
+    float32, contexts, ``q_x_e``, ``p_e_a`` and ``pscore`` are returned as float32, and actions /
+    embedding categories use the smallest sufficient unsigned integer type, roughly halving
+    memory. Rewards (and the small per-row quantities they are drawn from) stay float64, since
+    rounding regression targets would flip near-tied tree splits.
+    Sampling sees float32 probabilities, so an action may differ from the float64 log in rare
+    rows that fall within rounding of a CDF boundary; otherwise the logs match.
+
+    Embedding categories are drawn from per-dimension ``CategoricalCDFTable``s of ``p_e_a``
+    built once, so their cost grows with ``n_rounds`` only. ``action_sampler="gumbel_max"``
+    draws the logged action as ``argmax(beta * logits + Gumbel noise)`` over the supported
+    actions instead of by inverse CDF on ``pi_b``: same distribution, different draws.
+
+    With ``n_deficient_actions > 0`` and ``sparse_pi_b=True``, ``pi_b`` is returned as a
+    ``SparseRowPolicy`` (each row's supported actions and probabilities) instead of a dense
+    ``(n_rounds, n_actions, 1)`` array that is mostly zeros; ``pscore`` and the marginal
+    embedding weights read it directly and the logged actions are the same. Without deficient
+    actions every action is supported and ``pi_b`` stays dense.
+    """
 
     n_actions: int
     dim_context: int = 1
@@ -52,6 +68,9 @@ class SyntheticBanditDatasetWithActionEmbeds(BaseBanditDataset):
     n_irrelevant_cat_dim: int = 0
     n_deficient_actions: int = 0
     random_state: int = 12345
+    dtype: str = "float64"
+    action_sampler: str = "inverse_cdf"
+    sparse_pi_b: bool = False
     dataset_name: str = "synthetic_bandit_dataset_with_action_embed"
 
     def __post_init__(self) -> None:
@@ -67,6 +86,20 @@ class SyntheticBanditDatasetWithActionEmbeds(BaseBanditDataset):
         )
         if self.random_state is None:
             raise ValueError("`random_state` must be given")
+        if self.dtype not in ("float64", "float32"):
+            raise ValueError(f"`dtype` must be 'float64' or 'float32', but {self.dtype} is given")
+        if self.action_sampler not in ACTION_SAMPLERS:
+            raise ValueError(
+                f"`action_sampler` must be one of {ACTION_SAMPLERS}, but {self.action_sampler} "
+                "is given"
+            )
+        self.float_dtype = np.dtype(self.dtype)
+        if self.float_dtype == np.float64:
+            self.action_dtype = np.dtype(np.int64)
+            self.cat_dtype = np.dtype(np.int64)
+        else:
+            self.action_dtype = np.min_scalar_type(self.n_actions - 1)
+            self.cat_dtype = np.min_scalar_type(self.n_cat_per_dim - 1)
         self.random_ = check_random_state(self.random_state)
         if RewardType(self.reward_type) not in [
             RewardType.BINARY,
@@ -123,11 +156,13 @@ class SyntheticBanditDatasetWithActionEmbeds(BaseBanditDataset):
                 size=(self.n_actions, self.n_cat_per_dim, self.n_cat_dim),
             ),
         )
-        self.action_context_reg = np.zeros((self.n_actions, self.n_cat_dim), dtype=int)
+        self.p_e_a_tables = [
+            CategoricalCDFTable(self.p_e_a[:, :, d]) for d in range(self.n_cat_dim)
+        ]
+        self.action_context_reg = np.zeros((self.n_actions, self.n_cat_dim), dtype=self.cat_dtype)
         for d in np.arange(self.n_cat_dim):
-            self.action_context_reg[:, d] = _sample_action_fast(
-                self.p_e_a[np.arange(self.n_actions, dtype=int), :, d],
-                random_state=int(self.random_state + d),
+            self.action_context_reg[:, d] = self.p_e_a_tables[d].sample(
+                np.arange(self.n_actions), random_state=int(self.random_state + d)
             )
 
     @property
@@ -135,10 +170,16 @@ class SyntheticBanditDatasetWithActionEmbeds(BaseBanditDataset):
         return 1
 
     def calc_ground_truth_policy_value(
-        self, expected_reward: np.ndarray, action_dist: np.ndarray
+        self, expected_reward: np.ndarray, action_dist: np.ndarray | EpsGreedyPolicy
     ) -> float:
         if not isinstance(expected_reward, np.ndarray):
             raise ValueError("expected_reward must be ndarray")
+        if isinstance(action_dist, EpsGreedyPolicy):
+            if expected_reward.shape[:2] != (action_dist.n_rounds, action_dist.n_actions):
+                raise ValueError(
+                    "the shape of expected_reward must be (n_rounds, n_actions) of action_dist"
+                )
+            return float(action_dist.policy_value(expected_reward).mean())
         if not isinstance(action_dist, np.ndarray):
             raise ValueError("action_dist must be ndarray")
         if action_dist.ndim != 3:
@@ -157,18 +198,21 @@ class SyntheticBanditDatasetWithActionEmbeds(BaseBanditDataset):
             np.average(expected_reward, weights=action_dist[:, :, 0], axis=1).mean()
         )
 
-    def obtain_batch_bandit_feedback(self, n_rounds: int) -> BanditFeedback:
-        check_scalar(n_rounds, "n_rounds", int, min_val=1)
-        contexts = self.random_.normal(size=(n_rounds, self.dim_context))
+    def _sample_cat_dim_importance(self) -> np.ndarray:
         cat_dim_importance = np.zeros(self.n_cat_dim)
         cat_dim_importance[self.n_irrelevant_cat_dim :] = self.random_.dirichlet(
             alpha=self.random_.uniform(size=self.n_cat_dim - self.n_irrelevant_cat_dim),
             size=1,
         )
-        cat_dim_importance = cat_dim_importance.reshape((1, 1, self.n_cat_dim))
+        return cat_dim_importance.reshape((1, 1, self.n_cat_dim))
 
+    def _calc_expected_rewards(
+        self, contexts: np.ndarray, cat_dim_importance: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Return ``(q_x_e, q_x_a)`` for the given contexts and category-dimension importance."""
+        n_rounds = contexts.shape[0]
         q_x_e = np.zeros((n_rounds, self.n_cat_per_dim, self.n_cat_dim))
-        q_x_a = np.zeros((n_rounds, self.n_actions, self.n_cat_dim))
+        q_x_a = np.zeros((n_rounds, self.n_actions, self.n_cat_dim), dtype=self.float_dtype)
         assert self.reward_function is not None
         for d in np.arange(self.n_cat_dim):
             q_x_e[:, :, d] = self.reward_function(
@@ -177,7 +221,69 @@ class SyntheticBanditDatasetWithActionEmbeds(BaseBanditDataset):
                 random_state=self.random_state + d,
             )
             q_x_a[:, :, d] = q_x_e[:, :, d] @ self.p_e_a[:, :, d].T
-        q_x_a = (q_x_a * cat_dim_importance).sum(2)
+        return q_x_e, (q_x_a * cat_dim_importance.astype(self.float_dtype)).sum(2)
+
+    def calc_ground_truth_policy_value_streaming(
+        self,
+        n_rounds: int,
+        policy_value_fn: Callable[[np.ndarray], np.ndarray],
+        chunk_size: int = 10000,
+    ) -> float:
+        """Ground-truth policy value over ``n_rounds`` fresh contexts, ``chunk_size`` rows at a time.
+
+        Draws the same contexts and category importance as ``obtain_batch_bandit_feedback(n_rounds)``
+        would from the current RNG state, so the result matches ``calc_ground_truth_policy_value`` on
+        that log up to floating-point summation order. ``policy_value_fn`` maps a chunk of
+        ``q_x_a`` (shape ``(chunk, n_actions)``) to the per-row values
+        :math:`\\sum_a \\pi(a|x) q(x,a)`, e.g. ``policy.eps_greedy_policy_value``; no dense
+        ``action_dist`` is needed and peak memory is bounded by ``chunk_size``.
+        Actions and rewards are not drawn, so the RNG is not advanced past the importance draw.
+        """
+        check_scalar(n_rounds, "n_rounds", int, min_val=1)
+        check_scalar(chunk_size, "chunk_size", int, min_val=1)
+        context_state = self.random_.get_state()
+        # contexts precede the importance draw in the RNG stream: skip them, then replay them below
+        for start in range(0, n_rounds, chunk_size):
+            self.random_.normal(size=(min(chunk_size, n_rounds - start), self.dim_context))
+        cat_dim_importance = self._sample_cat_dim_importance()
+
+        context_random_ = np.random.RandomState()
+        context_random_.set_state(context_state)
+        total = 0.0
+        for start in range(0, n_rounds, chunk_size):
+            contexts = context_random_.normal(
+                size=(min(chunk_size, n_rounds - start), self.dim_context)
+            )
+            _, q_x_a = self._calc_expected_rewards(contexts, cat_dim_importance)
+            total += float(np.sum(policy_value_fn(q_x_a)))
+        return total / n_rounds
+
+    def _sample_supported_actions(self, n_rounds: int) -> np.ndarray:
+        """Every row's ``n_actions - n_deficient_actions`` supported actions, in ascending order.
+
+        The actions with the largest Gumbel noise form a uniformly random subset; they are
+        found with ``argpartition`` ``_SUPPORT_CHUNK_ROWS`` rows at a time, which draws the
+        same Gumbel stream as one ``(n_rounds, n_actions)`` draw without holding or sorting it.
+        """
+        n_supported = self.n_actions - self.n_deficient_actions
+        supported = np.empty((n_rounds, n_supported), dtype=np.int64)
+        for start in range(0, n_rounds, _SUPPORT_CHUNK_ROWS):
+            gumbel = self.random_.gumbel(
+                size=(min(_SUPPORT_CHUNK_ROWS, n_rounds - start), self.n_actions)
+            )
+            top = np.argpartition(gumbel, self.n_deficient_actions, axis=1)
+            is_supported = np.zeros(gumbel.shape, dtype=bool)
+            np.put_along_axis(is_supported, top[:, self.n_deficient_actions :], True, axis=1)
+            supported[start : start + gumbel.shape[0]] = np.nonzero(is_supported)[1].reshape(
+                -1, n_supported
+            )
+        return supported
+
+    def obtain_batch_bandit_feedback(self, n_rounds: int) -> BanditFeedback:
+        check_scalar(n_rounds, "n_rounds", int, min_val=1)
+        contexts = self.random_.normal(size=(n_rounds, self.dim_context))
+        cat_dim_importance = self._sample_cat_dim_importance()
+        q_x_e, q_x_a = self._calc_expected_rewards(contexts, cat_dim_importance)
 
         if self.behavior_policy_function is None:
             pi_b_logits = q_x_a
@@ -187,35 +293,47 @@ class SyntheticBanditDatasetWithActionEmbeds(BaseBanditDataset):
                 action_context=self.action_context,
                 random_state=self.random_state,
             )
+        rows = np.arange(n_rounds)
         if self.n_deficient_actions > 0:
-            pi_b = np.zeros_like(q_x_a)
-            n_supported_actions = self.n_actions - self.n_deficient_actions
-            supported_actions = np.argsort(
-                self.random_.gumbel(size=(n_rounds, self.n_actions)), axis=1
-            )[:, ::-1][:, :n_supported_actions]
-            supported_actions_idx = (
-                np.tile(np.arange(n_rounds), (n_supported_actions, 1)).T,
-                supported_actions,
-            )
-            pi_b[supported_actions_idx] = softmax(
-                self.beta * pi_b_logits[supported_actions_idx]
-            )
+            supported = self._sample_supported_actions(n_rounds)
+            supported_logits = self.beta * np.take_along_axis(pi_b_logits, supported, axis=1)
+            supported_probs = softmax(supported_logits)
+            # supported actions are ascending, so the CDF over them has the dense CDF's values
+            if self.action_sampler == "gumbel_max":
+                sampled = sample_gumbel_max(supported_logits, random_state=int(self.random_state))
+            else:
+                sampled = sample_inverse_cdf(supported_probs, random_state=int(self.random_state))
+            actions = supported[rows, sampled].astype(self.action_dtype)
+            pscore = supported_probs[rows, sampled]
+            if self.sparse_pi_b:
+                pi_b_out: np.ndarray | SparseRowPolicy = SparseRowPolicy(
+                    indices=supported, probs=supported_probs, n_actions=self.n_actions
+                )
+            else:
+                pi_b = np.zeros_like(q_x_a)
+                np.put_along_axis(pi_b, supported, supported_probs, axis=1)
+                pi_b_out = pi_b[:, :, np.newaxis]
         else:
             pi_b = softmax(self.beta * pi_b_logits)
-        actions = _sample_action_fast(pi_b, random_state=int(self.random_state))
+            if self.action_sampler == "gumbel_max":
+                sampled = sample_gumbel_max(
+                    self.beta * pi_b_logits, random_state=int(self.random_state)
+                )
+            else:
+                sampled = sample_inverse_cdf(pi_b, random_state=int(self.random_state))
+            actions = sampled.astype(self.action_dtype)
+            pscore = pi_b[rows, actions]
+            pi_b_out = pi_b[:, :, np.newaxis]
 
-        action_embed = np.zeros((n_rounds, self.n_cat_dim), dtype=int)
+        action_embed = np.zeros((n_rounds, self.n_cat_dim), dtype=self.cat_dtype)
         for d in np.arange(self.n_cat_dim):
-            action_embed[:, d] = _sample_action_fast(
-                self.p_e_a[actions, :, d],
-                random_state=int(d),
-            )
+            action_embed[:, d] = self.p_e_a_tables[d].sample(actions, random_state=int(d))
 
         expected_rewards_factual = np.zeros(n_rounds)
         for d in np.arange(self.n_cat_dim):
             expected_rewards_factual += (
                 cat_dim_importance[0, 0, d]
-                * q_x_e[np.arange(n_rounds), action_embed[:, d], d]
+                * q_x_e[rows, action_embed[:, d], d]
             )
         if RewardType(self.reward_type) == RewardType.BINARY:
             rewards = self.random_.binomial(n=1, p=expected_rewards_factual)
@@ -231,13 +349,13 @@ class SyntheticBanditDatasetWithActionEmbeds(BaseBanditDataset):
             n_actions=self.n_actions,
             action_context=self.action_context_reg[:, self.n_unobserved_cat_dim :],
             action_embed=action_embed[:, self.n_unobserved_cat_dim :],
-            context=contexts,
+            context=contexts.astype(self.float_dtype, copy=False),
             action=actions,
             position=None,
             reward=rewards,
             expected_reward=q_x_a,
-            q_x_e=q_x_e[:, :, self.n_unobserved_cat_dim :],
-            p_e_a=self.p_e_a[:, :, self.n_unobserved_cat_dim :],
-            pi_b=pi_b[:, :, np.newaxis],
-            pscore=pi_b[np.arange(n_rounds), actions],
+            q_x_e=q_x_e[:, :, self.n_unobserved_cat_dim :].astype(self.float_dtype, copy=False),
+            p_e_a=self.p_e_a[:, :, self.n_unobserved_cat_dim :].astype(self.float_dtype, copy=False),
+            pi_b=pi_b_out,
+            pscore=pscore,
         )
@@ -0,0 +1,112 @@
+"""Per-stage wall-clock timing of sweeps, with pluggable callbacks to forward the records."""
+
+from __future__ import annotations
+
+import json
+import time
+from collections.abc import Iterable, Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from logging import getLogger
+from pathlib import Path
+from typing import Any
+
+logger = getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class StageTiming:
+    """Wall time of one stage; ``sweep_value`` / ``seed`` are None for sweep-wide stages."""
+
+    stage: str
+    seconds: float
+    sweep_value: Any = None
+    seed: int | None = None
+
+
+class TimingCallback:
+    """Receives every stage timing as it is recorded; subclass and override what you need.
+
+    Callbacks run in the main process, also for stages timed inside worker processes.
+    Configure them under ``timing.callbacks`` as Hydra ``_target_`` entries.
+    """
+
+    def on_stage(self, timing: StageTiming) -> None:
+        pass
+
+    def on_run_end(self, timings: Sequence[StageTiming]) -> None:
+        pass
+
+
+class LoggingTimingCallback(TimingCallback):
+    """Log each stage at INFO level."""
+
+    def on_stage(self, timing: StageTiming) -> None:
+        logger.info(
+            "%s took %.3fs (sweep_value=%s, seed=%s)",
+            timing.stage,
+            timing.seconds,
+            timing.sweep_value,
+            timing.seed,
+        )
+
+
+class StageTimer:
+    """Collect ``StageTiming`` records tagged with a sweep value and seed.
+
+    ``with timer.stage("name"): ...`` times a block; ``extend`` merges records produced
+    elsewhere (e.g. returned by a worker process) and forwards them to the callbacks.
+    """
+
+    def __init__(
+        self,
+        sweep_value: Any = None,
+        seed: int | None = None,
+        callbacks: Iterable[TimingCallback] = (),
+    ) -> None:
+        self.sweep_value = sweep_value
+        self.seed = seed
+        self.callbacks = list(callbacks)
+        self.records: list[StageTiming] = []
+
+    @contextmanager
+    def stage(self, name: str, sweep_value: Any = None, seed: int | None = None) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(
+                StageTiming(
+                    stage=name,
+                    seconds=time.perf_counter() - start,
+                    sweep_value=self.sweep_value if sweep_value is None else sweep_value,
+                    seed=self.seed if seed is None else seed,
+                )
+            )
+
+    def record(self, timing: StageTiming) -> None:
+        self.records.append(timing)
+        for callback in self.callbacks:
+            callback.on_stage(timing)
+
+    def extend(self, timings: Iterable[StageTiming]) -> None:
+        for timing in timings:
+            self.record(timing)
+
+    def finish(self) -> None:
+        for callback in self.callbacks:
+            callback.on_run_end(self.records)
+
+    def totals(self) -> dict[str, float]:
+        """Total seconds per stage, in order of first appearance."""
+        totals: dict[str, float] = {}
+        for timing in self.records:
+            totals[timing.stage] = totals.get(timing.stage, 0.0) + timing.seconds
+        return totals
+
+    def to_json(self, path: str | Path) -> None:
+        payload = {
+            "total_seconds_by_stage": self.totals(),
+            "stages": [asdict(timing) for timing in self.records],
+        }
+        Path(path).write_text(json.dumps(payload, indent=2) + "\n")
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from synthetic.aggregation import EstimateAggregator, RunningMoments, per_seed_frame
+
+
+def test_running_moments_match_numpy() -> None:
+    values = np.random.RandomState(0).normal(3.0, 2.0, size=257)
+    moments = RunningMoments()
+    for v in values:
+        moments.update(float(v))
+    assert moments.count == 257
+    np.testing.assert_allclose(moments.mean, values.mean(), rtol=1e-12)
+    np.testing.assert_allclose(moments.variance, values.var(), rtol=1e-12)
+
+
+def test_aggregator_matches_per_seed_decomposition() -> None:
+    rng = np.random.RandomState(1)
+    policy_values = {-3: 0.5, 3: 1.5}
+    per_seed = {
+        beta: [{"IPS": rng.normal(), "MDR": rng.normal(1.0)} for _ in range(7)]
+        for beta in policy_values
+    }
+    aggregator = EstimateAggregator("beta")
+    for beta, policy_value in policy_values.items():
+        aggregator.set_policy_value(beta, policy_value)
+    for seed_i in range(7):
+        for beta in policy_values:
+            aggregator.update(beta, per_seed[beta][seed_i])
+    summary = aggregator.summary().set_index(["beta", "est"])
+
+    for beta, policy_value in policy_values.items():
+        long = pd.DataFrame(per_seed[beta]).melt(var_name="est", value_name="value")
+        mean = long.groupby("est")["value"].transform("mean")
+        long["se"] = (long["value"] - policy_value) ** 2
+        long["bias"] = (policy_value - mean) ** 2
+        long["variance"] = (long["value"] - mean) ** 2
+        expected = long.groupby("est")[["value", "se", "bias", "variance"]].mean()
+        for est in ("IPS", "MDR"):
+            row = summary.loc[(beta, est)]
+            assert row["n_seeds"] == 7
+            for col in ("value", "se", "bias", "variance"):
+                np.testing.assert_allclose(row[col], expected.loc[est, col], rtol=1e-10)
+
+
+def test_aggregator_requires_policy_value() -> None:
+    aggregator = EstimateAggregator("beta")
+    assert aggregator.summary().empty
+    with pytest.raises(KeyError):
+        aggregator.update(3, {"IPS": 1.0})
+
+
+def test_per_seed_frame_averages_to_the_summary() -> None:
+    rng = np.random.RandomState(2)
+    per_seed = [{"IPS": rng.normal(), "MDR": rng.normal(1.0)} for _ in range(5)]
+    aggregator = EstimateAggregator("beta")
+    aggregator.set_policy_value(3, 0.5)
+    for estimates in per_seed:
+        aggregator.update(3, estimates)
+    long = per_seed_frame(per_seed, 0.5, "beta", 3)
+    assert len(long) == 10 and (long["beta"] == 3).all()
+    means = long.groupby("est")[["value", "se", "bias", "variance"]].mean()
+    summary = aggregator.summary().set_index("est")
+    for col in ("value", "se", "bias", "variance"):
+        np.testing.assert_allclose(means[col], summary.loc[means.index, col], rtol=1e-10)
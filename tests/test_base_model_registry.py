@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from obp.dataset.synthetic import linear_reward_function
+from sklearn.base import clone
+from sklearn.linear_model import Ridge
+from sklearn.preprocessing import OneHotEncoder
+
+from synthetic.base_model_registry import BASE_MODELS, OneHotRidgeRegressor, make_base_model
+from synthetic.ope import run_ope
+from synthetic.policy import EpsGreedyPolicy
+from synthetic.synthetic_bandit_with_action_embeds import SyntheticBanditDatasetWithActionEmbeds
+
+
+def test_make_base_model_unknown() -> None:
+    with pytest.raises(ValueError, match="Unknown base_model"):
+        make_base_model("not_a_key", 0, 3)
+
+
+def test_one_hot_ridge_matches_sklearn_ridge() -> None:
+    rng = np.random.RandomState(0)
+    n, dim_context = 300, 3
+    X = np.c_[rng.normal(size=(n, dim_context)), rng.randint(4, size=n), rng.randint(6, size=n)]
+    y = X[:, 0] - 2.0 * (X[:, 3] == 1) + rng.normal(size=n)
+    weight = rng.uniform(0.5, 2.0, size=n)
+    model = clone(make_base_model("one_hot_ridge", 0, dim_context)).fit(X, y, sample_weight=weight)
+
+    encoder = OneHotEncoder(sparse_output=False).fit(X[:, dim_context:])
+    X_test = np.c_[rng.normal(size=(50, dim_context)), rng.randint(4, size=50), rng.randint(6, size=50)]
+    reference = Ridge(alpha=1.0).fit(
+        np.c_[X[:, :dim_context], encoder.transform(X[:, dim_context:])], y, sample_weight=weight
+    )
+    np.testing.assert_allclose(
+        model.predict(X_test),
+        reference.predict(np.c_[X_test[:, :dim_context], encoder.transform(X_test[:, dim_context:])]),
+        rtol=1e-8,
+    )
+    # a code never seen in fit contributes nothing
+    unseen = X_test.copy()
+    unseen[:, -1] = 9
+    seen_zero = X_test.copy()
+    seen_zero[:, -1] = 0
+    expected = model.predict(seen_zero) - model.coef_categorical_[model.offsets_[-1]]
+    np.testing.assert_allclose(model.predict(unseen), expected)
+    assert isinstance(model, OneHotRidgeRegressor)
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize("base_model", sorted(BASE_MODELS))
+def test_run_ope_with_every_base_model(base_model: str) -> None:
+    dataset = SyntheticBanditDatasetWithActionEmbeds(
+        n_actions=20,
+        dim_context=3,
+        beta=-1.0,
+        reward_type="continuous",
+        reward_function=linear_reward_function,
+        random_state=3,
+    )
+    val = dataset.obtain_batch_bandit_feedback(n_rounds=80)
+    policy = EpsGreedyPolicy.from_expected_reward(val["expected_reward"], eps=0.1)
+    estimates = run_ope(dataset, 0, val, policy, random_state=3, base_model=base_model)
+    assert all(np.isfinite(estimates[name]) for name in ("IPS", "DR", "DM", "MIPS", "MDR"))
+    if base_model == "random_forest_threaded":
+        default = run_ope(dataset, 0, val, policy, random_state=3)
+        assert estimates == default
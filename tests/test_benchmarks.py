@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from synthetic.benchmarks import compare, main, run_benchmarks
+
+
+def _report(wall: float, peak: int) -> dict:
+    return {
+        "results": {
+            "run_ope": {
+                "wall_time_s": wall,
+                "throughput": 1 / wall,
+                "throughput_unit": "rounds/s",
+                "peak_memory_bytes": peak,
+            }
+        }
+    }
+
+
+def test_compare_flags_only_regressions_beyond_threshold() -> None:
+    base = _report(1.0, 1000)
+    assert compare(base, _report(1.1, 1000), threshold=0.2) == []
+    assert compare(base, _report(0.5, 500), threshold=0.2) == []
+    regressions = compare(base, _report(1.5, 2000), threshold=0.2)
+    assert [r.split(":")[0] for r in regressions] == [
+        "run_ope.wall_time_s",
+        "run_ope.peak_memory_bytes",
+    ]
+    assert compare(base, {"results": {}}) == []
+    with pytest.raises(ValueError):
+        compare(base, base, threshold=-1)
+
+
+def test_run_and_compare_cli(tmp_path, capsys) -> None:
+    report = run_benchmarks("fastest", "beta", repeats=1, only=["aggregate_estimates"])
+    result = report["results"]["aggregate_estimates"]
+    assert result["wall_time_s"] > 0
+    assert result["throughput_unit"] == "seeds/s"
+    with pytest.raises(ValueError, match="Unknown benchmarks"):
+        run_benchmarks("fastest", "beta", only=["nope"])
+
+    baseline = tmp_path / "baseline.json"
+    slower = tmp_path / "slower.json"
+    baseline.write_text(json.dumps(_report(1.0, 1000)))
+    slower.write_text(json.dumps(_report(2.0, 1000)))
+    assert main(["compare", str(baseline), str(baseline)]) == 0
+    assert main(["compare", str(baseline), str(slower)]) == 1
+
+    extended = _report(1.0, 1000)
+    extended["results"]["run_ope[one_hot_ridge]"] = extended["results"]["run_ope"]
+    (tmp_path / "extended.json").write_text(json.dumps(extended))
+    capsys.readouterr()
+    assert main(["compare", str(baseline), str(tmp_path / "extended.json")]) == 0
+    assert "NO BASELINE run_ope[one_hot_ridge]" in capsys.readouterr().out
@@ -0,0 +1,79 @@
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+from obp.dataset.synthetic import linear_reward_function
+
+from synthetic.dataset_cache import cached_batch_bandit_feedback, dataset_cache_key
+from synthetic.policy import SparseRowPolicy
+from synthetic.synthetic_bandit_with_action_embeds import SyntheticBanditDatasetWithActionEmbeds
+
+
+def _dataset(**kwargs) -> SyntheticBanditDatasetWithActionEmbeds:
+    params = dict(
+        n_actions=9,
+        dim_context=3,
+        reward_type="continuous",
+        reward_function=linear_reward_function,
+        random_state=4,
+    )
+    params.update(kwargs)
+    return SyntheticBanditDatasetWithActionEmbeds(**params)
+
+
+def test_cache_hit_is_memory_mapped_and_keeps_rng_stream(tmp_path: Path) -> None:
+    reference = _dataset()
+    expected = [reference.obtain_batch_bandit_feedback(n_rounds=20) for _ in range(2)]
+
+    for _ in range(2):  # first pass fills the cache, second pass reads it
+        dataset = _dataset()
+        first = cached_batch_bandit_feedback(dataset, n_rounds=20, cache_dir=tmp_path)
+        second = cached_batch_bandit_feedback(dataset, n_rounds=20, cache_dir=tmp_path)
+        for got, want in zip((first, second), expected, strict=True):
+            assert got.keys() == want.keys()
+            for key, value in want.items():
+                if isinstance(value, np.ndarray):
+                    np.testing.assert_array_equal(got[key], value)
+                else:
+                    assert got[key] == value
+    assert isinstance(first["expected_reward"], np.memmap)
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_key_depends_on_fields_rng_state_and_rounds() -> None:
+    key = dataset_cache_key(_dataset(), 20)
+    assert key == dataset_cache_key(_dataset(), 20)
+    assert key != dataset_cache_key(_dataset(), 21)
+    assert key != dataset_cache_key(_dataset(beta=1.0), 20)
+    advanced = _dataset()
+    advanced.random_.uniform()
+    assert key != dataset_cache_key(advanced, 20)
+
+
+@dataclass
+class _DatasetWithWeights(SyntheticBanditDatasetWithActionEmbeds):
+    weights: np.ndarray = field(default_factory=lambda: np.arange(4.0))
+
+
+def test_key_hashes_ndarray_fields_by_dtype_shape_and_bytes() -> None:
+    def key(weights: np.ndarray) -> str:
+        dataset = _DatasetWithWeights(n_actions=9, dim_context=3, random_state=4, weights=weights)
+        return dataset_cache_key(dataset, 20)
+
+    assert key(np.arange(4.0)) == key(np.arange(4.0))
+    assert key(np.arange(4.0)) != key(np.arange(4.0)[::-1])
+    assert key(np.arange(4.0)) != key(np.arange(4.0, dtype=np.float32))
+    assert key(np.arange(4.0)) != key(np.arange(4.0).reshape(2, 2))
+
+
+def test_cache_round_trips_sparse_pi_b(tmp_path: Path) -> None:
+    expected = _dataset(n_deficient_actions=4, sparse_pi_b=True).obtain_batch_bandit_feedback(20)
+    for _ in range(2):
+        got = cached_batch_bandit_feedback(
+            _dataset(n_deficient_actions=4, sparse_pi_b=True), n_rounds=20, cache_dir=tmp_path
+        )
+        assert isinstance(got["pi_b"], SparseRowPolicy)
+        assert got["pi_b"].n_actions == 9
+        np.testing.assert_array_equal(got["pi_b"].indices, expected["pi_b"].indices)
+        np.testing.assert_array_equal(got["pi_b"].probs, expected["pi_b"].probs)
+    assert isinstance(got["pi_b"].indices, np.memmap)
@@ -0,0 +1,166 @@
+import numpy as np
+import pytest
+from obp.dataset.synthetic import linear_reward_function
+from obp.ope import DirectMethod, DoublyRobust, InverseProbabilityWeighting
+
+from synthetic.estimators import (
+    ESTIMATOR_NAMES,
+    check_logged_data,
+    dm,
+    dr,
+    estimate_all,
+    ips,
+    policy_expected_reward,
+    policy_factual_prob,
+)
+from synthetic.ope import run_ope, run_ope_batch, stack_bandit_feedback
+from synthetic.policy import EpsGreedyPolicy
+from synthetic.synthetic_bandit_with_action_embeds import SyntheticBanditDatasetWithActionEmbeds
+
+
+def _inputs(rng: np.random.RandomState, n: int, n_actions: int) -> dict:
+    policy = EpsGreedyPolicy(rng.randint(n_actions, size=n), eps=0.2, n_actions=n_actions)
+    action = rng.randint(n_actions, size=n)
+    q_hat = rng.normal(size=(n, n_actions, 1))
+    return dict(
+        reward=rng.normal(size=n),
+        pscore=rng.uniform(0.05, 1.0, size=n),
+        pi_e_factual=policy_factual_prob(policy, action),
+        q_pi=policy_expected_reward(policy, q_hat),
+        q_hat_factual=q_hat[np.arange(n), action, 0],
+        w_x_e=rng.uniform(0.0, 3.0, size=n),
+        q_hat_mdr_factual=rng.normal(size=n),
+    )
+
+
+def test_policy_helpers_agree_for_dense_and_compact() -> None:
+    rng = np.random.RandomState(0)
+    policy = EpsGreedyPolicy(rng.randint(6, size=20), eps=0.3, n_actions=6)
+    action = rng.randint(6, size=20)
+    q_hat = rng.normal(size=(20, 6, 1))
+    np.testing.assert_allclose(
+        policy_factual_prob(policy, action), policy_factual_prob(policy.to_dense(), action)
+    )
+    np.testing.assert_allclose(
+        policy_expected_reward(policy, q_hat), policy_expected_reward(policy.to_dense(), q_hat)
+    )
+
+
+def test_estimate_all_batches_over_leading_axis() -> None:
+    rng = np.random.RandomState(1)
+    replicates = [_inputs(rng, n=50, n_actions=7) for _ in range(4)]
+    stacked = {key: np.stack([r[key] for r in replicates]) for key in replicates[0]}
+    batched = estimate_all(**stacked)
+    assert batched.shape == (4, len(ESTIMATOR_NAMES))
+    for s, replicate in enumerate(replicates):
+        np.testing.assert_allclose(batched[s], estimate_all(**replicate), rtol=1e-12)
+    ips = np.mean(replicates[0]["reward"] * replicates[0]["pi_e_factual"] / replicates[0]["pscore"])
+    np.testing.assert_allclose(batched[0, ESTIMATOR_NAMES.index("IPS")], ips, rtol=1e-12)
+
+
+def test_stack_bandit_feedback_rejects_mismatched_logs() -> None:
+    a = {"n_rounds": 3, "reward": np.zeros(3)}
+    b = {"n_rounds": 4, "reward": np.zeros(4)}
+    assert stack_bandit_feedback([a, a])["reward"].shape == (2, 3)
+    with pytest.raises(ValueError, match="n_rounds"):
+        stack_bandit_feedback([a, b])
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize(("n_deficient_actions", "sparse_pi_b"), [(0, False), (5, True)])
+def test_run_ope_batch_matches_per_seed_run_ope(
+    n_deficient_actions: int, sparse_pi_b: bool
+) -> None:
+    dataset = SyntheticBanditDatasetWithActionEmbeds(
+        n_actions=15,
+        dim_context=3,
+        beta=-1.0,
+        reward_type="continuous",
+        reward_function=linear_reward_function,
+        n_deficient_actions=n_deficient_actions,
+        sparse_pi_b=sparse_pi_b,
+        random_state=2,
+    )
+    feedbacks = [dict(dataset.obtain_batch_bandit_feedback(n_rounds=60)) for _ in range(3)]
+    policies = [
+        EpsGreedyPolicy.from_expected_reward(fb["expected_reward"], eps=0.1) for fb in feedbacks
+    ]
+    batched = run_ope_batch(
+        dataset, [0, 1, 2], stack_bandit_feedback(feedbacks), policies, random_state=4
+    )
+    assert batched.shape == (3, len(ESTIMATOR_NAMES))
+    for s, (fb, policy) in enumerate(zip(feedbacks, policies, strict=True)):
+        single = run_ope(dataset, s, fb, policy, random_state=4)
+        expected = [single[name] for name in ESTIMATOR_NAMES]
+        np.testing.assert_allclose(batched[s], expected, rtol=1e-10, atol=1e-12)
+
+
+def test_native_estimators_match_obp() -> None:
+    rng = np.random.RandomState(3)
+    n, n_actions = 200, 9
+    action_dist = rng.dirichlet(np.ones(n_actions), size=n)[:, :, np.newaxis]
+    action = rng.randint(n_actions, size=n)
+    reward = rng.normal(size=n)
+    pscore = rng.uniform(0.05, 1.0, size=n)
+    q_hat = rng.normal(size=(n, n_actions, 1))
+    check_logged_data(reward, action, pscore, n_actions, action_dist)
+
+    pi_e_factual = policy_factual_prob(action_dist, action)
+    q_pi = policy_expected_reward(action_dist, q_hat)
+    q_hat_factual = q_hat[np.arange(n), action, 0]
+    obp_kwargs = dict(
+        reward=reward,
+        action=action,
+        pscore=pscore,
+        action_dist=action_dist,
+        estimated_rewards_by_reg_model=q_hat,
+        position=np.zeros(n, dtype=int),
+    )
+    np.testing.assert_allclose(
+        ips(reward, pscore, pi_e_factual),
+        InverseProbabilityWeighting().estimate_policy_value(**obp_kwargs),
+        rtol=1e-12,
+    )
+    np.testing.assert_allclose(
+        dr(reward, pscore, pi_e_factual, q_pi, q_hat_factual),
+        DoublyRobust().estimate_policy_value(**obp_kwargs),
+        rtol=1e-12,
+    )
+    np.testing.assert_allclose(
+        dm(q_pi), DirectMethod().estimate_policy_value(**obp_kwargs), rtol=1e-12
+    )
+
+
+def test_check_logged_data_rejects_invalid_logs() -> None:
+    reward, pscore = np.zeros(4), np.full(4, 0.5)
+    action = np.array([0, 1, 2, 0])
+    with pytest.raises(ValueError, match="same shape"):
+        check_logged_data(reward, action[:3], pscore, 3)
+    with pytest.raises(ValueError, match="in \\[0, 3\\)"):
+        check_logged_data(reward, action + 1, pscore, 3)
+    with pytest.raises(ValueError, match="positive"):
+        check_logged_data(reward, action, np.zeros(4), 3)
+    with pytest.raises(ValueError, match="sum up to 1"):
+        check_logged_data(reward, action, pscore, 3, np.ones((4, 3, 1)))
+
+
+@pytest.mark.integration
+def test_run_ope_native_backend_matches_obp() -> None:
+    dataset = SyntheticBanditDatasetWithActionEmbeds(
+        n_actions=12,
+        dim_context=3,
+        beta=-1.0,
+        reward_type="continuous",
+        reward_function=linear_reward_function,
+        random_state=6,
+    )
+    val = dict(dataset.obtain_batch_bandit_feedback(n_rounds=80))
+    policy = EpsGreedyPolicy.from_expected_reward(val["expected_reward"], eps=0.2)
+    for action_dist in (policy, policy.to_dense()):
+        native = run_ope(dataset, 0, val, action_dist, random_state=1, estimator_backend="native")
+        reference = run_ope(dataset, 0, val, action_dist, random_state=1, estimator_backend="obp")
+        assert native.keys() == reference.keys()
+        for name in ESTIMATOR_NAMES:
+            np.testing.assert_allclose(native[name], reference[name], rtol=1e-10, atol=1e-12)
+    with pytest.raises(ValueError, match="estimator_backend"):
+        run_ope(dataset, 0, val, policy, estimator_backend="numba")
@@ -0,0 +1,51 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+from hydra import compose, initialize_config_dir
+from omegaconf import OmegaConf
+
+from synthetic.execution import map_tasks, resolve_n_workers
+from synthetic.experiment_runner import _run_seed_task
+
+CONFIG_DIR = str(Path(__file__).resolve().parents[1] / "src" / "synthetic" / "hydra_conf")
+
+
+def _draw(seed: int) -> float:
+    return float(np.random.RandomState(seed).normal(size=100).sum())
+
+
+def test_map_tasks_processes_match_serial() -> None:
+    tasks = list(range(6))
+    serial = map_tasks(_draw, tasks, backend="serial")
+    parallel = map_tasks(_draw, tasks, backend="processes", n_workers=2)
+    assert parallel == serial
+
+
+def test_map_tasks_unknown_backend() -> None:
+    with pytest.raises(ValueError, match="Unknown execution backend"):
+        map_tasks(_draw, [0], backend="threads")
+
+
+def test_resolve_n_workers() -> None:
+    assert resolve_n_workers(3, blas_threads=4) == 3
+    assert resolve_n_workers(None, blas_threads=10**6) == 1
+    with pytest.raises(ValueError):
+        resolve_n_workers(0, blas_threads=1)
+
+
+@pytest.mark.integration
+def test_seed_tasks_bit_identical_across_backends() -> None:
+    with initialize_config_dir(config_dir=CONFIG_DIR, version_base=None):
+        cfg = compose(
+            config_name="config",
+            overrides=["dataset.n_actions=20", "n_train=30"],
+        )
+    cfg_container = OmegaConf.to_container(cfg, resolve=True)
+    tasks = [(cfg_container, beta, seed_i) for beta in (-3, 3) for seed_i in range(2)]
+    serial = map_tasks(_run_seed_task, tasks, backend="serial")
+    parallel = map_tasks(_run_seed_task, tasks, backend="processes", n_workers=2)
+    assert [estimates for estimates, _ in parallel] == [estimates for estimates, _ in serial]
+    stages = [timing.stage for timing in serial[0][1]]
+    assert stages[:2] == ["data_generation", "policy_construction"]
+    assert "mdr_regression" in stages
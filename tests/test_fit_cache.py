@@ -0,0 +1,86 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pytest
+from sklearn.base import BaseEstimator
+
+from synthetic.fit_cache import FitCache
+
+
+@dataclass
+class _CountingModel(BaseEstimator):
+    scale: float = 1.0
+    n_jobs: int | None = None
+
+    def __post_init__(self) -> None:
+        self.n_calls = 0
+
+    def fit_predict(self, context: np.ndarray, n_folds: int = 1) -> np.ndarray:
+        self.n_calls += 1
+        return self.scale * context * n_folds
+
+
+def test_hit_skips_refit_and_returns_read_only() -> None:
+    cache = FitCache()
+    model = _CountingModel()
+    context = np.arange(6.0)
+    first = cache.fit_predict(model, context=context, n_folds=2)
+    second = cache.fit_predict(model, context=context.copy(), n_folds=2)
+    assert model.n_calls == 1
+    assert second is first
+    assert not second.flags.writeable
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_key_depends_on_data_params_and_folds_only() -> None:
+    context = np.arange(4.0)
+    key = FitCache.make_key(_CountingModel(), {"context": context, "n_folds": 2})
+    assert key == FitCache.make_key(_CountingModel(n_jobs=8), {"context": context, "n_folds": 2})
+    assert key != FitCache.make_key(_CountingModel(scale=2.0), {"context": context, "n_folds": 2})
+    assert key != FitCache.make_key(_CountingModel(), {"context": context + 1, "n_folds": 2})
+    assert key != FitCache.make_key(_CountingModel(), {"context": context, "n_folds": 3})
+
+
+def test_lru_eviction_respects_memory_cap() -> None:
+    cache = FitCache(max_bytes=2 * 80)
+    for key in ("a", "b"):
+        cache.put(key, np.zeros(10))
+    cache.get("a")
+    cache.put("c", np.zeros(10))
+    assert "a" in cache and "c" in cache and "b" not in cache
+    assert cache.nbytes == 160 and cache.evictions == 1
+    cache.put("too_big", np.zeros(100))
+    assert "too_big" not in cache
+
+
+def test_negative_budget() -> None:
+    with pytest.raises(ValueError):
+        FitCache(max_bytes=-1)
+
+
+def test_disk_store_is_shared_across_cache_instances(tmp_path) -> None:
+    context = np.arange(6.0)
+    writer = FitCache(cache_dir=tmp_path)
+    expected = writer.fit_predict(_CountingModel(), context=context, n_folds=2)
+
+    model = _CountingModel()
+    reader = FitCache(cache_dir=tmp_path)
+    got = reader.fit_predict(model, context=context, n_folds=2)
+    assert model.n_calls == 0
+    np.testing.assert_array_equal(got, expected)
+    assert not got.flags.writeable
+    assert (reader.hits, reader.disk_hits, reader.misses) == (1, 1, 0)
+
+    (path,) = reader.cache_dir.glob("*.pkl")
+    path.write_bytes(path.read_bytes()[:10])  # truncated by an interrupted writer
+    fresh = FitCache(cache_dir=tmp_path)
+    fresh.fit_predict(model, context=context, n_folds=2)
+    assert model.n_calls == 1 and fresh.misses == 1
+
+
+def test_fold_models_are_sized_by_their_arrays() -> None:
+    cache = FitCache()
+    fold_model = _CountingModel()
+    fold_model.coef_ = np.zeros(100)
+    cache.put("a", np.zeros(10), [fold_model, fold_model])
+    assert cache.nbytes == 80 + 800
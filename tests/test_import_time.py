@@ -0,0 +1,50 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC = str(Path(__file__).resolve().parents[1] / "src")
+HEAVY = ("obp", "torch", "sklearn", "scipy", "pandas", "matplotlib", "seaborn", "tqdm")
+# Generous: the CLI module needs ~0.25s (mostly Hydra) against ~5s with eager imports.
+IMPORT_BUDGET_S = 1.5
+
+
+def _import_in_subprocess(module: str) -> tuple[list[str], float]:
+    code = (
+        "import json, sys, time\n"
+        "t = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - t\n"
+        f"heavy = sorted(m for m in {HEAVY!r} if m in sys.modules)\n"
+        "print(json.dumps([heavy, elapsed]))\n"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        check=True,
+        capture_output=True,
+        text=True,
+        env={"PYTHONPATH": SRC, "PATH": ""},
+    )
+    heavy, elapsed = json.loads(out.stdout.splitlines()[-1])
+    return heavy, elapsed
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "synthetic.run_experiment",
+        "synthetic.plots",
+        "synthetic.execution",
+        "synthetic.aggregation",
+        "synthetic.dataset_cache",
+        "synthetic.timing",
+        "synthetic.shared_data",
+        "hydra_plugins.shared_data_launcher.shared_data_launcher",
+    ],
+)
+def test_light_modules_defer_heavy_imports(module: str) -> None:
+    heavy, elapsed = _import_in_subprocess(module)
+    assert heavy == []
+    assert elapsed < IMPORT_BUDGET_S
@@ -0,0 +1,140 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from obp.dataset.synthetic import linear_reward_function
+
+from synthetic.dataset_cache import cached_batch_bandit_feedback
+from synthetic.logged_data import LoggedData, convert_columns_to_npy_dir, convert_parquet_to_npy_dir
+from synthetic.ope import _marginal_embedding_weights, run_ope
+from synthetic.policy import EpsGreedyPolicy, SparseRowPolicy
+from synthetic.streaming_estimators import StreamingMIPS
+from synthetic.synthetic_bandit_with_action_embeds import SyntheticBanditDatasetWithActionEmbeds
+
+KEYS = ("context", "action", "reward", "pscore", "action_embed", "pi_b", "p_e_a", "action_context")
+
+
+def _dataset(**kwargs) -> SyntheticBanditDatasetWithActionEmbeds:
+    params = dict(
+        n_actions=9,
+        dim_context=3,
+        beta=-1.0,
+        reward_type="continuous",
+        reward_function=linear_reward_function,
+        random_state=4,
+    )
+    params.update(kwargs)
+    return SyntheticBanditDatasetWithActionEmbeds(**params)
+
+
+def _save(feedback: dict, path: Path) -> Path:
+    path.mkdir()
+    for key in KEYS:
+        np.save(path / f"{key}.npy", feedback[key])
+    return path
+
+
+def _columns(feedback: dict, rows: slice) -> pd.DataFrame:
+    columns = {key: feedback[key][rows] for key in ("action", "reward", "pscore")}
+    for key in ("context", "action_embed"):
+        for j in range(feedback[key].shape[1]):
+            columns[f"{key}_{j}"] = feedback[key][rows, j]
+    for a in range(feedback["n_actions"]):
+        columns[f"pi_b_{a}"] = feedback["pi_b"][rows, a, 0]
+    return pd.DataFrame(columns)
+
+
+def test_npy_dir_is_memory_mapped_and_batches_cover_the_log(tmp_path: Path) -> None:
+    feedback = _dataset().obtain_batch_bandit_feedback(n_rounds=50)
+    data = LoggedData.from_npy_dir(_save(feedback, tmp_path / "log"))
+    assert data.n_rounds == 50 and data.n_actions == 9
+    got = data.to_bandit_feedback()
+    assert isinstance(got["context"], np.memmap)
+    for key in KEYS:
+        np.testing.assert_array_equal(got[key], feedback[key])
+
+    policy = EpsGreedyPolicy.from_expected_reward(feedback["expected_reward"], eps=0.2)
+    streaming = StreamingMIPS(data.p_e_a)
+    batch_rounds = []
+    for rows, batch in data.iter_batches(batch_size=16):
+        assert not isinstance(batch["context"], np.memmap)
+        batch_rounds.append(batch["n_rounds"])
+        streaming.partial_update(batch, EpsGreedyPolicy(policy.greedy_action[rows], 0.2, 9))
+    assert batch_rounds == [16, 16, 16, 2]
+    w_x_e = _marginal_embedding_weights(
+        feedback["pi_b"], policy, feedback["p_e_a"], feedback["action_embed"]
+    )
+    np.testing.assert_allclose(streaming.estimate(), np.mean(w_x_e * feedback["reward"]))
+
+
+def test_dataset_cache_entry_with_sparse_pi_b_opens_as_logged_data(tmp_path: Path) -> None:
+    dataset = _dataset(n_deficient_actions=4, sparse_pi_b=True)
+    feedback = cached_batch_bandit_feedback(dataset, n_rounds=20, cache_dir=tmp_path)
+    (entry_dir,) = tmp_path.iterdir()
+    data = LoggedData.from_npy_dir(entry_dir)
+    assert isinstance(data.pi_b, SparseRowPolicy)
+    np.testing.assert_array_equal(data.pi_b.to_dense(), feedback["pi_b"].to_dense())
+    (_, batch), *_ = data.iter_batches(batch_size=5)
+    assert isinstance(batch["pi_b"], SparseRowPolicy)
+    np.testing.assert_array_equal(batch["pi_b"].indices, feedback["pi_b"].indices[:5])
+
+
+def test_columns_convert_batch_by_batch(tmp_path: Path) -> None:
+    feedback = _dataset().obtain_batch_bandit_feedback(n_rounds=30)
+    chunks = (_columns(feedback, slice(start, start + 8)) for start in range(0, 30, 8))
+    shared = {key: feedback[key] for key in ("p_e_a", "action_context")}
+    out_dir = convert_columns_to_npy_dir(chunks, 30, tmp_path / "log", shared)
+    data = LoggedData.from_npy_dir(out_dir)
+    np.testing.assert_array_equal(data.context, feedback["context"])
+    np.testing.assert_array_equal(data.action_embed, feedback["action_embed"])
+    np.testing.assert_array_equal(data.pi_b, feedback["pi_b"][:, :, 0])
+    np.testing.assert_array_equal(data.reward, feedback["reward"])
+
+    with pytest.raises(ValueError, match="already exists"):
+        convert_columns_to_npy_dir([], 0, out_dir)
+    with pytest.raises(ValueError, match="hold 20 rows"):
+        convert_columns_to_npy_dir([_columns(feedback, slice(0, 20))], 30, tmp_path / "short")
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["log"]
+    with pytest.raises(ValueError, match="numbered"):
+        convert_columns_to_npy_dir([{"context_1": np.zeros(2)}], 2, tmp_path / "gap")
+
+
+def test_parquet_converts_to_npy_dir(tmp_path: Path) -> None:
+    pytest.importorskip("pyarrow")
+    feedback = _dataset().obtain_batch_bandit_feedback(n_rounds=30)
+    _columns(feedback, slice(None)).to_parquet(tmp_path / "log.parquet", row_group_size=7)
+    out_dir = convert_parquet_to_npy_dir(
+        tmp_path / "log.parquet", tmp_path / "log", {"p_e_a": feedback["p_e_a"]}, batch_size=7
+    )
+    data = LoggedData.from_npy_dir(out_dir)
+    np.testing.assert_array_equal(data.context, feedback["context"])
+    np.testing.assert_array_equal(data.action, feedback["action"])
+    np.testing.assert_array_equal(data.action_context, np.eye(9, dtype=int))
+
+
+def test_invalid_logs_are_rejected(tmp_path: Path) -> None:
+    feedback = _dataset().obtain_batch_bandit_feedback(n_rounds=10)
+    log_dir = _save(feedback, tmp_path / "log")
+    (log_dir / "pi_b.npy").unlink()
+    with pytest.raises(ValueError, match=r"no pi_b\.npy"):
+        LoggedData.from_npy_dir(log_dir)
+    arrays = {key: feedback[key] for key in KEYS}
+    arrays["pscore"] = arrays["pscore"][:5]
+    with pytest.raises(ValueError, match="`pscore` must have 10 rows"):
+        LoggedData(**arrays)
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize("estimator_backend", ["native", "obp"])
+def test_run_ope_on_memory_mapped_log_matches_in_memory(
+    tmp_path: Path, estimator_backend: str
+) -> None:
+    dataset = _dataset()
+    feedback = dataset.obtain_batch_bandit_feedback(n_rounds=60)
+    data = LoggedData.from_npy_dir(_save(feedback, tmp_path / "log"))
+    policy = EpsGreedyPolicy.from_expected_reward(feedback["expected_reward"], eps=0.1)
+    expected = run_ope(dataset, 0, feedback, policy, estimator_backend=estimator_backend)
+    got = run_ope(data, 0, data.to_bandit_feedback(), policy, estimator_backend=estimator_backend)
+    for name, value in expected.items():
+        np.testing.assert_allclose(got[name], value, rtol=1e-12)
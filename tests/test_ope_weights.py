@@ -0,0 +1,51 @@
+import numpy as np
+from obp.dataset.synthetic import linear_reward_function
+
+from synthetic.ope import _marginal_embedding_weights
+from synthetic.policy import gen_eps_greedy
+from synthetic.synthetic_bandit_with_action_embeds import SyntheticBanditDatasetWithActionEmbeds
+
+
+def _reference_weights(
+    pi_b_3d: np.ndarray, action_dist_3d: np.ndarray, p_e_a: np.ndarray, action_embed: np.ndarray
+) -> np.ndarray:
+    """Original loop-based implementation kept as the regression oracle."""
+    n, n_actions = pi_b_3d.shape[:2]
+    pi_b = np.zeros((n, n_actions))
+    action_dist = np.zeros((n, n_actions))
+    for i in range(n):
+        for j in range(n_actions):
+            pi_b[i][j] = pi_b_3d[i][j][0]
+            action_dist[i][j] = action_dist_3d[i][j][0]
+    p_e_pi_b = np.ones(n)
+    p_e_pi_e = np.ones(n)
+    for d in np.arange(p_e_a.shape[-1]):
+        p_e_pi_b_d = pi_b[np.arange(n), :] @ p_e_a[:, :, d]
+        p_e_pi_b *= p_e_pi_b_d[np.arange(n), action_embed[:, d]]
+        p_e_pi_e_d = action_dist[np.arange(n), :] @ p_e_a[:, :, d]
+        p_e_pi_e *= p_e_pi_e_d[np.arange(n), action_embed[:, d]]
+    return p_e_pi_e / p_e_pi_b
+
+
+def test_marginal_embedding_weights_match_reference() -> None:
+    dataset = SyntheticBanditDatasetWithActionEmbeds(
+        n_actions=30,
+        dim_context=4,
+        beta=-1.0,
+        reward_type="continuous",
+        reward_function=linear_reward_function,
+        n_deficient_actions=5,
+        random_state=3,
+    )
+    fb = dataset.obtain_batch_bandit_feedback(n_rounds=53)
+    action_dist = gen_eps_greedy(expected_reward=fb["expected_reward"], eps=0.2)
+    expected = _reference_weights(fb["pi_b"], action_dist, fb["p_e_a"], fb["action_embed"])
+    for chunk_size in (1, 7, 1024):
+        w = _marginal_embedding_weights(
+            fb["pi_b"], action_dist, fb["p_e_a"], fb["action_embed"], chunk_size=chunk_size
+        )
+        np.testing.assert_allclose(w, expected, rtol=1e-12)
+    w_2d = _marginal_embedding_weights(
+        fb["pi_b"][:, :, 0], action_dist[:, :, 0], fb["p_e_a"], fb["action_embed"]
+    )
+    np.testing.assert_allclose(w_2d, expected, rtol=1e-12)
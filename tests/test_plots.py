@@ -0,0 +1,29 @@
+import pandas as pd
+
+from synthetic.plots import render_plots
+
+
+def test_render_plots_writes_all_variants(tmp_path) -> None:
+    result_df = pd.DataFrame(
+        [
+            {"est": est, "beta": beta, "se": se, "bias": se / 2, "variance": se / 2}
+            for beta in (-3, 3)
+            for est, se in zip(("IPS", "DR", "DM", "MIPS", "MDR"), (1.0, 2.0, 3.0, 4.0, 5.0))
+        ]
+    )
+    paths = render_plots(
+        tmp_path / "plots",
+        result_df,
+        x="beta",
+        xlabel="$\\beta$",
+        xticklabels=[-3, 3],
+        formats=("png", "pdf"),
+        backend="serial",
+    )
+    assert sorted(p.name for p in paths) == sorted(
+        f"beta_{share}_{scale}.{fmt}"
+        for share in ("sharey", "freey")
+        for scale in ("linear", "log")
+        for fmt in ("png", "pdf")
+    )
+    assert all(p.stat().st_size > 0 for p in paths)
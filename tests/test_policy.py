@@ -0,0 +1,68 @@
+import numpy as np
+
+from synthetic.ope import _marginal_embedding_weights
+from synthetic.policy import EpsGreedyPolicy, SparseRowPolicy, gen_eps_greedy
+
+
+def _reference_eps_greedy(expected_reward: np.ndarray, eps: float) -> np.ndarray:
+    base_pol = np.zeros_like(expected_reward)
+    base_pol[np.arange(expected_reward.shape[0]), np.argmax(expected_reward, axis=1)] = 1
+    pol = (1.0 - eps) * base_pol
+    pol += eps / expected_reward.shape[1]
+    return pol[:, :, np.newaxis]
+
+
+def test_compact_policy_matches_dense() -> None:
+    rng = np.random.RandomState(0)
+    n, n_actions, n_cat_per_dim, n_cat_dim = 40, 12, 4, 3
+    q = rng.normal(size=(n, n_actions))
+    policy = EpsGreedyPolicy.from_expected_reward(q, is_optimal=True, eps=0.3)
+    dense = _reference_eps_greedy(q, eps=0.3)
+
+    np.testing.assert_array_equal(policy.to_dense(), dense)
+    np.testing.assert_array_equal(gen_eps_greedy(q, eps=0.3), dense)
+    np.testing.assert_allclose(policy.policy_value(q), (dense[:, :, 0] * q).sum(axis=1))
+
+    action = rng.randint(n_actions, size=n)
+    np.testing.assert_allclose(policy.action_prob(action), dense[np.arange(n), action, 0])
+
+    p_e_a = rng.dirichlet(np.ones(n_cat_per_dim), size=(n_actions, n_cat_dim)).transpose(0, 2, 1)
+    action_embed = rng.randint(n_cat_per_dim, size=(n, n_cat_dim))
+    pi_b = rng.dirichlet(np.ones(n_actions), size=n)
+    np.testing.assert_allclose(
+        _marginal_embedding_weights(pi_b, policy, p_e_a, action_embed),
+        _marginal_embedding_weights(pi_b, dense, p_e_a, action_embed),
+    )
+
+
+def test_anti_optimal_policy() -> None:
+    q = np.array([[0.0, 2.0, 1.0], [3.0, -1.0, 0.0]])
+    policy = EpsGreedyPolicy.from_expected_reward(q, is_optimal=False, eps=0.0)
+    np.testing.assert_array_equal(policy.greedy_action, [0, 1])
+    np.testing.assert_array_equal(policy.policy_value(q), [0.0, -1.0])
+
+
+def test_sparse_row_policy_matches_dense() -> None:
+    rng = np.random.RandomState(1)
+    n, n_actions, n_supported, n_cat_per_dim, n_cat_dim = 30, 10, 4, 3, 2
+    indices = np.sort(np.argsort(rng.uniform(size=(n, n_actions)), axis=1)[:, :n_supported])
+    policy = SparseRowPolicy(
+        indices=indices, probs=rng.dirichlet(np.ones(n_supported), size=n), n_actions=n_actions
+    )
+    dense = policy.to_dense()
+    np.testing.assert_allclose(dense.sum(axis=1), 1.0)
+    assert np.count_nonzero(dense) == n * n_supported
+
+    q = rng.normal(size=(n, n_actions))
+    np.testing.assert_allclose(policy.policy_value(q), (dense[:, :, 0] * q).sum(axis=1))
+    action = rng.randint(n_actions, size=n)
+    np.testing.assert_allclose(policy.action_prob(action), dense[np.arange(n), action, 0])
+
+    p_e_a = rng.dirichlet(np.ones(n_cat_per_dim), size=(n_actions, n_cat_dim)).transpose(0, 2, 1)
+    action_embed = rng.randint(n_cat_per_dim, size=(n, n_cat_dim))
+    action_dist = rng.dirichlet(np.ones(n_actions), size=n)
+    np.testing.assert_allclose(
+        _marginal_embedding_weights(policy, action_dist, p_e_a, action_embed),
+        _marginal_embedding_weights(dense, action_dist, p_e_a, action_embed),
+    )
+    np.testing.assert_array_equal(policy[5:9].to_dense(), dense[5:9])
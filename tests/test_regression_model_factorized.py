@@ -0,0 +1,126 @@
+import numpy as np
+import pytest
+from obp.dataset.synthetic import linear_reward_function
+from obp.ope import RegressionModel
+from sklearn.ensemble import RandomForestRegressor
+
+from synthetic.estimators import FactorizedQHat, factual_expected_reward, policy_expected_reward
+from synthetic.fit_cache import FitCache
+from synthetic.ope import run_ope
+from synthetic.policy import EpsGreedyPolicy
+from synthetic.regression_model_factorized import FactorizedRegressionModel
+from synthetic.synthetic_bandit_with_action_embeds import SyntheticBanditDatasetWithActionEmbeds
+
+
+def _dataset() -> SyntheticBanditDatasetWithActionEmbeds:
+    return SyntheticBanditDatasetWithActionEmbeds(
+        n_actions=30,
+        dim_context=3,
+        beta=-1.0,
+        reward_type="continuous",
+        reward_function=linear_reward_function,
+        n_cat_per_dim=3,
+        n_cat_dim=2,
+        random_state=4,
+    )
+
+
+def _model(cls: type, fb: dict) -> RegressionModel:
+    return cls(
+        n_actions=fb["n_actions"],
+        action_context=fb["action_context"],
+        base_model=RandomForestRegressor(n_estimators=5, random_state=0),
+    )
+
+
+@pytest.mark.parametrize("n_folds", [1, 2])
+def test_factorized_fit_predict_expands_to_obp_q_hat(n_folds: int) -> None:
+    fb = _dataset().obtain_batch_bandit_feedback(n_rounds=80)
+    kwargs = dict(
+        context=fb["context"], action=fb["action"], reward=fb["reward"], n_folds=n_folds, random_state=1
+    )
+    dense = _model(RegressionModel, fb).fit_predict(**kwargs)
+    q_hat = _model(FactorizedRegressionModel, fb).fit_predict(**kwargs)
+    assert isinstance(q_hat, FactorizedQHat)
+    assert q_hat.values.shape == (80, np.unique(fb["action_context"], axis=0).shape[0])
+    assert q_hat.values.shape[1] < fb["n_actions"]
+    np.testing.assert_array_equal(q_hat.to_dense(), dense)
+    np.testing.assert_array_equal(
+        factual_expected_reward(q_hat, fb["action"]), factual_expected_reward(dense, fb["action"])
+    )
+    for policy in (
+        EpsGreedyPolicy.from_expected_reward(fb["expected_reward"], eps=0.3),
+        np.random.RandomState(0).dirichlet(np.ones(fb["n_actions"]), size=80)[:, :, np.newaxis],
+    ):
+        np.testing.assert_allclose(
+            policy_expected_reward(policy, q_hat), policy_expected_reward(policy, dense), rtol=1e-12
+        )
+
+
+def test_predict_factorized_stacks_contexts_within_max_predict_rows() -> None:
+    fb = _dataset().obtain_batch_bandit_feedback(n_rounds=60)
+    model = _model(FactorizedRegressionModel, fb)
+    model.fit(context=fb["context"], action=fb["action"], reward=fb["reward"])
+    n_unique = np.unique(fb["action_context"], axis=0).shape[0]
+    expected = _model(RegressionModel, fb)
+    expected.fit(context=fb["context"], action=fb["action"], reward=fb["reward"])
+
+    base_model = model.base_model_list[0]
+    predicted_rows = []
+    predict = base_model.predict
+    base_model.predict = lambda X: predicted_rows.append(X.shape[0]) or predict(X)
+    for max_predict_rows, n_calls in ((1, n_unique), (120, (n_unique + 1) // 2), (10**6, 1)):
+        predicted_rows.clear()
+        model.max_predict_rows = max_predict_rows
+        q_hat = model.predict_factorized(fb["context"])
+        np.testing.assert_array_equal(q_hat.to_dense(), expected.predict(fb["context"]))
+        assert len(predicted_rows) == n_calls
+        assert sum(predicted_rows) == n_unique * 60
+
+
+def test_float32_values_match_float64() -> None:
+    fb = _dataset().obtain_batch_bandit_feedback(n_rounds=60)
+    kwargs = dict(context=fb["context"], action=fb["action"], reward=fb["reward"], n_folds=2)
+    q_hat64 = _model(FactorizedRegressionModel, fb).fit_predict(**kwargs, random_state=1)
+    model32 = FactorizedRegressionModel(
+        n_actions=fb["n_actions"],
+        action_context=fb["action_context"],
+        base_model=RandomForestRegressor(n_estimators=5, random_state=0),
+        dtype="float32",
+    )
+    q_hat32 = model32.fit_predict(**kwargs, random_state=1)
+    assert q_hat32.values.dtype == np.float32
+    np.testing.assert_allclose(q_hat32.values, q_hat64.values, rtol=1e-6)
+
+
+def test_fit_cache_keeps_factorized_q_hat_read_only() -> None:
+    fb = _dataset().obtain_batch_bandit_feedback(n_rounds=40)
+    cache = FitCache()
+    kwargs = dict(context=fb["context"], action=fb["action"], reward=fb["reward"], n_folds=2)
+    first = cache.fit_predict(_model(FactorizedRegressionModel, fb), **kwargs)
+    second = cache.fit_predict(_model(FactorizedRegressionModel, fb), **kwargs)
+    assert second is first and cache.hits == 1
+    assert isinstance(first, FactorizedQHat) and not first.values.flags.writeable
+    assert cache.nbytes >= first.nbytes
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize("estimator_backend", ["native", "obp"])
+def test_run_ope_factorized_matches_dense(estimator_backend: str) -> None:
+    dataset = _dataset()
+    val = dataset.obtain_batch_bandit_feedback(n_rounds=60)
+    policy = EpsGreedyPolicy.from_expected_reward(val["expected_reward"], eps=0.1)
+    dense, factorized = (
+        run_ope(
+            dataset,
+            0,
+            val,
+            policy,
+            random_state=5,
+            estimator_backend=estimator_backend,
+            factorize_q_hat=factorize_q_hat,
+        )
+        for factorize_q_hat in (False, True)
+    )
+    for name in ("IPS", "DR", "DM", "MIPS", "MDR"):
+        np.testing.assert_allclose(factorized[name], dense[name], rtol=1e-12)
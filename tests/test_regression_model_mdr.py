@@ -0,0 +1,118 @@
+import numpy as np
+from obp.dataset.synthetic import linear_reward_function
+from sklearn.ensemble import RandomForestRegressor
+
+from synthetic.regression_model_mdr import RegressionModelMDR
+from synthetic.synthetic_bandit_with_action_embeds import SyntheticBanditDatasetWithActionEmbeds
+
+
+def _feedback(n_rounds: int = 60, **kwargs) -> dict:
+    dataset = SyntheticBanditDatasetWithActionEmbeds(
+        n_actions=17,
+        dim_context=3,
+        beta=-1.0,
+        reward_type="continuous",
+        reward_function=linear_reward_function,
+        random_state=5,
+        **kwargs,
+    )
+    return dataset.obtain_batch_bandit_feedback(n_rounds=n_rounds)
+
+
+def _model(fb: dict, **kwargs) -> RegressionModelMDR:
+    return RegressionModelMDR(
+        n_actions=fb["n_actions"],
+        action_context=fb["action_context"],
+        base_model=RandomForestRegressor(n_estimators=5, random_state=0),
+        **kwargs,
+    )
+
+
+def _per_action_predict(model: RegressionModelMDR, context, embedding) -> np.ndarray:
+    n = context.shape[0]
+    q_hat = np.zeros((n, model.n_actions, 1))
+    for action_ in range(model.n_actions):
+        X = model._pre_process_for_reg_model(
+            context=context,
+            embedding=embedding,
+            action=action_ * np.ones(n, int),
+            action_context=model.action_context,
+        )
+        q_hat[:, action_, 0] = model.base_model_list[0].predict(X)
+    return q_hat
+
+
+def test_batched_predict_matches_per_action_loop() -> None:
+    fb = _feedback()
+    model = _model(fb)
+    model.fit(
+        context=fb["context"],
+        embedding=fb["action_embed"],
+        action=fb["action"],
+        reward=fb["reward"],
+    )
+    expected = _per_action_predict(model, fb["context"], fb["action_embed"])
+    for max_predict_rows in (1, 60, 61, 7 * 60, 10**6):
+        model.max_predict_rows = max_predict_rows
+        q_hat = model.predict(context=fb["context"], embedding=fb["action_embed"])
+        np.testing.assert_array_equal(q_hat, expected)
+
+
+def test_predict_evaluates_each_distinct_action_context_once() -> None:
+    fb = _feedback(n_cat_per_dim=2, n_cat_dim=2)
+    n_unique = np.unique(fb["action_context"], axis=0).shape[0]
+    assert n_unique < fb["n_actions"]
+    model = _model(fb)
+    model.fit(
+        context=fb["context"],
+        embedding=fb["action_embed"],
+        action=fb["action"],
+        reward=fb["reward"],
+    )
+    expected = _per_action_predict(model, fb["context"], fb["action_embed"])
+
+    base_model = model.base_model_list[0]
+    predicted_rows = []
+    predict = base_model.predict
+    base_model.predict = lambda X: predicted_rows.append(X.shape[0]) or predict(X)
+    for max_predict_rows in (1, 60, 10**6):
+        predicted_rows.clear()
+        model.max_predict_rows = max_predict_rows
+        q_hat = model.predict(context=fb["context"], embedding=fb["action_embed"])
+        np.testing.assert_array_equal(q_hat, expected)
+        assert sum(predicted_rows) == n_unique * 60
+
+
+def test_parallel_cross_fitting_is_deterministic() -> None:
+    fb = _feedback(n_rounds=61)
+    kwargs = dict(
+        context=fb["context"],
+        embedding=fb["action_embed"],
+        action=fb["action"],
+        reward=fb["reward"],
+        n_folds=3,
+        random_state=1,
+    )
+    serial_model = _model(fb)
+    serial = serial_model.fit_predict(**kwargs)
+    parallel_model = _model(fb, n_jobs=3)
+    parallel = parallel_model.fit_predict(**kwargs)
+    np.testing.assert_array_equal(parallel, serial)
+    assert len(parallel_model.fold_models_) == 3
+    assert len({id(m.base_model_list[0]) for m in parallel_model.fold_models_}) == 3
+
+
+def test_float32_q_hat_matches_float64() -> None:
+    fb = _feedback()
+    kwargs = dict(
+        context=fb["context"],
+        embedding=fb["action_embed"],
+        action=fb["action"],
+        reward=fb["reward"],
+        n_folds=2,
+        random_state=1,
+    )
+    q_hat64 = _model(fb).fit_predict(**kwargs)
+    q_hat32 = _model(fb, dtype="float32").fit_predict(**kwargs)
+    assert q_hat32.dtype == np.float32
+    np.testing.assert_allclose(q_hat32, q_hat64, rtol=1e-6)
@@ -0,0 +1,72 @@
+import json
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from hydra import compose, initialize_config_dir
+
+from synthetic.experiment_runner import run_sweep_experiment
+from synthetic.result_store import ResultStore, sweep_key
+
+CONFIG_DIR = str(Path(__file__).resolve().parents[1] / "src" / "synthetic" / "hydra_conf")
+
+
+def test_round_trip_and_truncated_tail(tmp_path: Path) -> None:
+    store = ResultStore(tmp_path / "estimates.jsonl")
+    store.reset({"n_test": 10})
+    store.append_policy_value(0.5, 1.25)
+    store.append_estimates(0.5, 3, {"IPS": 1.0, "MDR": 2.0})
+    with store.path.open("a") as f:
+        f.write('{"kind": "estimates", "sweep')
+
+    store.resume({"n_test": 10})
+    assert store.path.read_text().endswith("}\n")
+    assert store.policy_values() == {sweep_key(0.5): 1.25}
+    assert store.estimates() == {(sweep_key(0.5), 3): {"IPS": 1.0, "MDR": 2.0}}
+
+
+def test_resume_rejects_other_config(tmp_path: Path) -> None:
+    store = ResultStore(tmp_path / "estimates.jsonl")
+    with pytest.raises(FileNotFoundError):
+        store.resume({"n_test": 10})
+    store.reset({"n_test": 10})
+    with pytest.raises(ValueError, match="different configuration"):
+        store.resume({"n_test": 20})
+
+
+@pytest.mark.integration
+def test_resume_skips_finished_seeds(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    overrides = ["dataset.n_actions=10", "output.save_legacy_csv=false"]
+    with initialize_config_dir(config_dir=CONFIG_DIR, version_base=None):
+        cfg = compose(config_name="config", overrides=overrides)
+        cfg_resume = compose(config_name="config", overrides=overrides + ["resume=true"])
+    run_sweep_experiment(cfg)
+    expected = pd.read_csv("df/result_df.csv")
+
+    store_path = Path("df/estimates.jsonl")
+    lines = store_path.read_text().splitlines(keepends=True)
+    # keep config, both ground truths and the first seed; cut the next record mid-write
+    store_path.write_text("".join(lines[:4]) + lines[4][:20])
+    run_sweep_experiment(cfg_resume)
+    pd.testing.assert_frame_equal(pd.read_csv("df/result_df.csv"), expected)
+    assert len(ResultStore(store_path).estimates()) == 4
+
+    Path("df/timings.json").unlink()
+    with initialize_config_dir(config_dir=CONFIG_DIR, version_base=None):
+        cfg_plots = compose(config_name="config", overrides=overrides + ["plots_only=true"])
+    run_sweep_experiment(cfg_plots)
+    timings = json.loads(Path("df/timings.json").read_text())
+    assert sorted(timings["total_seconds_by_stage"]) == ["plotting", "summarization"]
+
+
+def test_batched_seeds_require_native_backend(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    overrides = ["execution.seeds_per_task=2", "estimator_backend=obp"]
+    with initialize_config_dir(config_dir=CONFIG_DIR, version_base=None):
+        cfg = compose(config_name="config", overrides=overrides)
+    with pytest.raises(ValueError, match="requires `estimator_backend=native`"):
+        run_sweep_experiment(cfg)
+    assert not Path("df/estimates.jsonl").exists()
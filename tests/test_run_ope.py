@@ -2,8 +2,10 @@ import numpy as np
 import pytest
 from obp.dataset.synthetic import linear_reward_function
 
-from synthetic.ope import run_ope
-from synthetic.policy import gen_eps_greedy
+from synthetic import ope
+from synthetic.fit_cache import FitCache
+from synthetic.ope import _marginal_embedding_weights, run_ope
+from synthetic.policy import EpsGreedyPolicy, gen_eps_greedy
 from synthetic.synthetic_bandit_with_action_embeds import (
     SyntheticBanditDatasetWithActionEmbeds,
 )
@@ -38,3 +40,120 @@ def test_run_ope_produces_estimator_keys() -> None:
         assert name in out
         v = float(np.asarray(out[name]).item())
         assert np.isfinite(v)
+
+
+@pytest.mark.integration
+def test_run_ope_reuses_cached_fits() -> None:
+    dataset = SyntheticBanditDatasetWithActionEmbeds(
+        n_actions=10,
+        dim_context=3,
+        reward_type="continuous",
+        reward_function=linear_reward_function,
+        random_state=3,
+    )
+    val = dataset.obtain_batch_bandit_feedback(n_rounds=30)
+    action_dist = gen_eps_greedy(expected_reward=val["expected_reward"], eps=0.1)
+    cache = FitCache()
+    first = run_ope(dataset, 0, val, action_dist, random_state=3, fit_cache=cache)
+    second = run_ope(dataset, 0, val, action_dist, random_state=3, fit_cache=cache)
+    assert (cache.misses, cache.hits) == (2, 2)
+    assert first == second
+    assert first == run_ope(dataset, 0, val, action_dist, random_state=3)
+
+
+@pytest.mark.parametrize("estimator_backend", ["native", "obp"])
+def test_mdr_correction_is_the_mean_of_weighted_factual_predictions(
+    estimator_backend: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    dataset = SyntheticBanditDatasetWithActionEmbeds(
+        n_actions=10,
+        dim_context=3,
+        reward_type="continuous",
+        reward_function=linear_reward_function,
+        random_state=6,
+    )
+    val = dataset.obtain_batch_bandit_feedback(n_rounds=30)
+    policy = EpsGreedyPolicy.from_expected_reward(val["expected_reward"], eps=0.1)
+    q_hat_mdr = np.random.RandomState(0).normal(size=(30, 10, 1))
+    monkeypatch.setattr(ope, "_fit_mdr_regression", lambda *args, **kwargs: q_hat_mdr)
+    out = run_ope(dataset, 0, val, policy, random_state=6, estimator_backend=estimator_backend)
+
+    w_x_e = _marginal_embedding_weights(val["pi_b"], policy, val["p_e_a"], val["action_embed"])
+    q_factual = q_hat_mdr[np.arange(30), val["action"], 0]
+    expected = out["DM"] + np.mean(w_x_e * (val["reward"] - q_factual))
+    np.testing.assert_allclose(out["MDR"], expected, rtol=1e-12)
+    # indexing q_hat_mdr without the trailing axis broadcast to mean(w_x_e) * mean(q_factual)
+    outer = out["DM"] + np.mean(w_x_e * val["reward"]) - np.mean(w_x_e) * np.mean(q_factual)
+    assert not np.isclose(out["MDR"], outer)
+
+
+@pytest.mark.integration
+def test_run_ope_accepts_compact_policy() -> None:
+    dataset = SyntheticBanditDatasetWithActionEmbeds(
+        n_actions=10,
+        dim_context=3,
+        reward_type="continuous",
+        reward_function=linear_reward_function,
+        random_state=5,
+    )
+    val = dataset.obtain_batch_bandit_feedback(n_rounds=30)
+    policy = EpsGreedyPolicy.from_expected_reward(val["expected_reward"], eps=0.1)
+    compact = run_ope(dataset, 0, val, policy, random_state=5)
+    dense = run_ope(dataset, 0, val, policy.to_dense(), random_state=5)
+    assert list(compact) == list(dense)
+    for name in dense:
+        np.testing.assert_allclose(compact[name], dense[name], rtol=1e-10)
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize("estimator_backend", ["native", "obp"])
+def test_run_ope_accepts_sparse_pi_b(estimator_backend: str) -> None:
+    kwargs = dict(
+        n_actions=30,
+        dim_context=3,
+        beta=-1.0,
+        reward_type="continuous",
+        reward_function=linear_reward_function,
+        n_deficient_actions=20,
+        random_state=2,
+    )
+    estimates = []
+    for sparse_pi_b in (False, True):
+        dataset = SyntheticBanditDatasetWithActionEmbeds(**kwargs, sparse_pi_b=sparse_pi_b)
+        val = dataset.obtain_batch_bandit_feedback(n_rounds=60)
+        policy = EpsGreedyPolicy.from_expected_reward(val["expected_reward"], eps=0.1)
+        estimates.append(
+            run_ope(dataset, 0, val, policy, random_state=2, estimator_backend=estimator_backend)
+        )
+    for name in ("IPS", "DR", "DM", "MIPS", "MDR"):
+        np.testing.assert_allclose(estimates[1][name], estimates[0][name], rtol=1e-12)
+
+
+# Documented float32 tolerance (README, "dataset.dtype"): with the same seed the logs are
+# identical here, and every estimate agrees with float64 to this relative tolerance.
+FLOAT32_RTOL = 1e-5
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize("factorize_q_hat", [True, False])
+def test_run_ope_float32_estimates_match_float64(factorize_q_hat: bool) -> None:
+    estimates, actions = [], []
+    for dtype in ("float64", "float32"):
+        dataset = SyntheticBanditDatasetWithActionEmbeds(
+            n_actions=40,
+            dim_context=3,
+            beta=-1.0,
+            reward_type="continuous",
+            reward_function=linear_reward_function,
+            random_state=3,
+            dtype=dtype,
+        )
+        val = dataset.obtain_batch_bandit_feedback(n_rounds=200)
+        policy = EpsGreedyPolicy.from_expected_reward(val["expected_reward"], eps=0.1)
+        actions.append(val["action"])
+        estimates.append(
+            run_ope(dataset, 0, val, policy, random_state=3, factorize_q_hat=factorize_q_hat)
+        )
+    np.testing.assert_array_equal(actions[1], actions[0])
+    for name in ("IPS", "DR", "DM", "MIPS", "MDR"):
+        np.testing.assert_allclose(estimates[1][name], estimates[0][name], rtol=FLOAT32_RTOL)
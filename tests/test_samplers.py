@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from synthetic.samplers import CategoricalCDFTable, sample_gumbel_max, sample_inverse_cdf
+from synthetic.synthetic_bandit_with_action_embeds import SyntheticBanditDatasetWithActionEmbeds
+
+
+@pytest.mark.parametrize("n_cats", [5, 300])
+def test_cdf_table_matches_inverse_cdf_on_gathered_rows(n_cats: int) -> None:
+    rng = np.random.RandomState(0)
+    probs = rng.dirichlet(np.full(n_cats, 0.3), size=40)
+    # rows whose cdf ends below 1 exercise the "u beyond the last value" fallback
+    probs[:5] *= 0.9
+    dists = rng.randint(40, size=5000)
+    table = CategoricalCDFTable(probs)
+    np.testing.assert_array_equal(
+        table.sample(dists, random_state=3), sample_inverse_cdf(probs[dists], random_state=3)
+    )
+
+
+def test_cdf_table_rejects_non_matrix() -> None:
+    with pytest.raises(ValueError, match="2-dimensional"):
+        CategoricalCDFTable(np.ones(3))
+
+
+def test_gumbel_max_follows_softmax_and_skips_minus_inf() -> None:
+    logits = np.array([0.0, np.log(3.0), -np.inf])
+    draws = sample_gumbel_max(np.tile(logits, (40000, 1)), random_state=0)
+    assert not np.any(draws == 2)
+    np.testing.assert_allclose(np.bincount(draws, minlength=3) / 40000, [0.25, 0.75, 0.0], atol=0.01)
+
+
+@pytest.mark.parametrize("n_deficient_actions", [0, 4])
+def test_dataset_gumbel_max_draws_supported_actions(n_deficient_actions: int) -> None:
+    dataset = SyntheticBanditDatasetWithActionEmbeds(
+        n_actions=10,
+        beta=-1.0,
+        reward_type="continuous",
+        n_deficient_actions=n_deficient_actions,
+        action_sampler="gumbel_max",
+    )
+    log = dataset.obtain_batch_bandit_feedback(n_rounds=500)
+    assert np.all(log["pscore"] > 0)
+
+
+def test_dataset_rejects_unknown_action_sampler() -> None:
+    with pytest.raises(ValueError, match="action_sampler"):
+        SyntheticBanditDatasetWithActionEmbeds(n_actions=10, action_sampler="alias")
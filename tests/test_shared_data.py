@@ -0,0 +1,93 @@
+from pathlib import Path
+
+import pytest
+from hydra import compose, initialize_config_dir
+from omegaconf import OmegaConf
+
+from synthetic.experiment_runner import _run_seed_task, ground_truth_policy_value
+from synthetic.shared_data import plan_shared_data, prepare_shared_task
+
+CONFIG_DIR = str(Path(__file__).resolve().parents[1] / "src" / "synthetic" / "hydra_conf")
+
+
+def _job(overrides: list[str]) -> dict:
+    with initialize_config_dir(config_dir=CONFIG_DIR, version_base=None):
+        cfg = compose(config_name="config", overrides=["dataset.n_actions=10", *overrides])
+    container = OmegaConf.to_container(cfg, resolve=True)
+    assert isinstance(container, dict)
+    return container
+
+
+def test_plan_groups_jobs_by_fingerprint() -> None:
+    # beta=3 with the default reward_std=2.5 appears in both sweeps
+    jobs = [
+        _job(["experiment=beta", "experiment.sweep_values=[-1,3]", "dataset.reward_std=2.5"]),
+        _job(["experiment=reward_std", "experiment.sweep_values=[2.5,4]", "dataset.beta=3"]),
+    ]
+    tasks = plan_shared_data(jobs)
+    ground_truths = [t for t in tasks if t[2] is None]
+    validation = [t for t in tasks if t[2] is not None]
+    assert len(ground_truths) == 3
+    assert [(t[1], t[2]) for t in validation] == [(3, 0), (3, 1)]
+    assert plan_shared_data([jobs[0]]) == ground_truths[:2]
+
+
+@pytest.mark.integration
+def test_shared_data_reproduces_unshared_results(tmp_path: Path) -> None:
+    base = ["experiment=beta", "experiment.sweep_values=[3]", "n_seeds=1"]
+    plain = _job(base)
+    shared = _job(
+        base
+        + [
+            f"ground_truth.cache_dir={tmp_path / 'ground_truth'}",
+            f"dataset_cache.dir={tmp_path / 'datasets'}",
+            "dataset_cache.write=false",
+        ]
+    )
+    for task in plan_shared_data([shared, shared]):
+        prepare_shared_task(task)
+    assert len(list((tmp_path / "ground_truth").glob("*.json"))) == 1
+    assert len(list((tmp_path / "datasets").iterdir())) == 1
+
+    assert ground_truth_policy_value(OmegaConf.create(shared), 3) == ground_truth_policy_value(
+        OmegaConf.create(plain), 3
+    )
+    assert _run_seed_task((shared, 3, 0))[0] == _run_seed_task((plain, 3, 0))[0]
+
+
+@pytest.mark.parametrize(
+    ("execution", "expected"),
+    [
+        (["execution.backend=serial"], None),
+        (["execution.backend=processes"], "execution.n_workers=2"),
+        (["execution.backend=processes", "execution.blas_threads=2"], "execution.n_workers=1"),
+        (["execution.backend=processes", "execution.n_workers=1"], None),
+        (["execution.backend=processes", "execution.n_workers=8"], "execution.n_workers=2"),
+    ],
+)
+def test_launcher_caps_nested_worker_pools(
+    monkeypatch: pytest.MonkeyPatch, execution: list[str], expected: str | None
+) -> None:
+    from hydra_plugins.shared_data_launcher.shared_data_launcher import SharedDataLauncher
+
+    monkeypatch.setattr("os.cpu_count", lambda: 8)
+    sweep_config = OmegaConf.create(_job(execution))
+    overrides = SharedDataLauncher()._sharing_overrides(sweep_config, Path("shared"), n_jobs=4)
+    capped = [o for o in overrides if o.startswith("execution.n_workers=")]
+    assert capped == ([expected] if expected else [])
+
+
+def test_launcher_overrides_quote_shared_paths() -> None:
+    from hydra.core.override_parser.overrides_parser import OverridesParser
+
+    from hydra_plugins.shared_data_launcher.shared_data_launcher import SharedDataLauncher
+
+    shared_dir = Path("/tmp/it's \\ shared\\")
+    overrides = SharedDataLauncher()._sharing_overrides(
+        OmegaConf.create(_job([])), shared_dir, n_jobs=1
+    )
+    parsed = {
+        o.key_or_group: o.value() for o in OverridesParser.create().parse_overrides(overrides)
+    }
+    assert parsed["ground_truth.cache_dir"] == str(shared_dir / "ground_truth")
+    assert parsed["dataset_cache.dir"] == str(shared_dir / "datasets")
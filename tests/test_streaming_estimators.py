@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from obp.dataset.synthetic import linear_reward_function
+from obp.ope import RegressionModel
+from sklearn.linear_model import Ridge
+
+from synthetic.estimators import policy_expected_reward
+from synthetic.ope import _marginal_embedding_weights
+from synthetic.policy import EpsGreedyPolicy
+from synthetic.regression_model_mdr import RegressionModelMDR
+from synthetic.streaming_estimators import StreamingMDR, StreamingMIPS
+from synthetic.synthetic_bandit_with_action_embeds import SyntheticBanditDatasetWithActionEmbeds
+
+
+def _batches(log: dict, sizes: list[int]) -> list[dict]:
+    bounds = np.cumsum([0, *sizes])
+    keys = ("context", "action", "action_embed", "reward", "pi_b", "expected_reward")
+    return [{k: log[k][lo:hi] for k in keys} for lo, hi in zip(bounds[:-1], bounds[1:])]
+
+
+def test_streaming_mips_and_mdr_match_full_log() -> None:
+    dataset = SyntheticBanditDatasetWithActionEmbeds(
+        n_actions=12,
+        dim_context=3,
+        beta=-1.0,
+        reward_type="continuous",
+        reward_function=linear_reward_function,
+        random_state=8,
+    )
+    train = dict(dataset.obtain_batch_bandit_feedback(n_rounds=100))
+    log = dict(dataset.obtain_batch_bandit_feedback(n_rounds=150))
+    reward_model = RegressionModel(
+        n_actions=12, action_context=train["action_context"], base_model=Ridge()
+    )
+    reward_model.fit(context=train["context"], action=train["action"], reward=train["reward"])
+    mdr_model = RegressionModelMDR(
+        n_actions=12, action_context=train["action_context"], base_model=Ridge()
+    )
+    mdr_model.fit(
+        context=train["context"],
+        embedding=train["action_embed"],
+        action=train["action"],
+        reward=train["reward"],
+    )
+
+    policy = EpsGreedyPolicy.from_expected_reward(log["expected_reward"], eps=0.2)
+    w_x_e = _marginal_embedding_weights(log["pi_b"], policy, log["p_e_a"], log["action_embed"])
+    q_mdr = mdr_model.predict(context=log["context"], embedding=log["action_embed"])
+    q_mdr_factual = q_mdr[np.arange(150), log["action"], 0]
+    dm = policy_expected_reward(policy, reward_model.predict(log["context"])).mean()
+    expected_mips = np.mean(w_x_e * log["reward"])
+    expected_mdr = dm + expected_mips - np.mean(w_x_e * q_mdr_factual)
+
+    mips = StreamingMIPS(log["p_e_a"])
+    mdr = StreamingMDR(log["p_e_a"], reward_model, mdr_model)
+    for batch in _batches(log, [40, 1, 60, 49]):
+        batch_policy = EpsGreedyPolicy.from_expected_reward(batch["expected_reward"], eps=0.2)
+        mips.partial_update(batch, batch_policy)
+        mdr.partial_update(batch, batch_policy.to_dense())
+    assert mips.n_rounds == mdr.n_rounds == 150
+    np.testing.assert_allclose(mips.estimate(), expected_mips, rtol=1e-12)
+    np.testing.assert_allclose(mdr.estimate_mips(), expected_mips, rtol=1e-12)
+    np.testing.assert_allclose(mdr.estimate_dm(), dm, rtol=1e-12)
+    np.testing.assert_allclose(mdr.estimate(), expected_mdr, rtol=1e-12)
+
+
+def test_estimate_requires_a_batch() -> None:
+    with pytest.raises(ValueError, match="partial_update"):
+        StreamingMIPS(np.ones((2, 2, 1))).estimate()
+    with pytest.raises(ValueError, match="partial_update"):
+        StreamingMDR(np.ones((2, 2, 1)), None, None).estimate()
@@ -1,7 +1,12 @@
 import numpy as np
 from obp.dataset.synthetic import linear_reward_function
 
-from synthetic.policy import gen_eps_greedy
+from synthetic.policy import (
+    EpsGreedyPolicy,
+    SparseRowPolicy,
+    eps_greedy_policy_value,
+    gen_eps_greedy,
+)
 from synthetic.synthetic_bandit_with_action_embeds import SyntheticBanditDatasetWithActionEmbeds
 
 
@@ -53,3 +58,77 @@ def test_calc_ground_truth_policy_value() -> None:
     )
     assert isinstance(v, float)
     assert np.isfinite(v)
+    compact = EpsGreedyPolicy.from_expected_reward(fb["expected_reward"], eps=0.1)
+    v_compact = dataset.calc_ground_truth_policy_value(
+        expected_reward=fb["expected_reward"], action_dist=compact
+    )
+    np.testing.assert_allclose(v_compact, v, rtol=1e-12)
+
+
+def test_streaming_ground_truth_matches_dense() -> None:
+    kwargs = dict(
+        n_actions=15,
+        dim_context=3,
+        beta=-1.0,
+        reward_type="continuous",
+        reward_function=linear_reward_function,
+        random_state=11,
+    )
+    dense = SyntheticBanditDatasetWithActionEmbeds(**kwargs)
+    fb = dense.obtain_batch_bandit_feedback(n_rounds=101)
+    pol = gen_eps_greedy(expected_reward=fb["expected_reward"], is_optimal=False, eps=0.3)
+    expected = dense.calc_ground_truth_policy_value(
+        expected_reward=fb["expected_reward"], action_dist=pol
+    )
+    for chunk_size in (1, 10, 1000):
+        streaming = SyntheticBanditDatasetWithActionEmbeds(**kwargs)
+        v = streaming.calc_ground_truth_policy_value_streaming(
+            n_rounds=101,
+            policy_value_fn=lambda q: eps_greedy_policy_value(q, is_optimal=False, eps=0.3),
+            chunk_size=chunk_size,
+        )
+        np.testing.assert_allclose(v, expected, rtol=1e-12)
+
+
+def test_float32_dtype_matches_float64() -> None:
+    kwargs = dict(
+        n_actions=300,
+        dim_context=3,
+        beta=-1.0,
+        reward_type="continuous",
+        reward_function=linear_reward_function,
+        random_state=5,
+    )
+    fb64 = SyntheticBanditDatasetWithActionEmbeds(**kwargs).obtain_batch_bandit_feedback(200)
+    fb32 = SyntheticBanditDatasetWithActionEmbeds(
+        **kwargs, dtype="float32"
+    ).obtain_batch_bandit_feedback(200)
+    for key in ("context", "expected_reward", "pi_b", "pscore", "p_e_a"):
+        assert fb32[key].dtype == np.float32
+        np.testing.assert_allclose(fb32[key], fb64[key], rtol=1e-4, atol=1e-6)
+    assert fb32["action"].dtype == np.uint16
+    assert fb32["reward"].dtype == np.float64
+    assert np.mean(fb32["action"] == fb64["action"]) > 0.99
+
+
+def test_sparse_pi_b_matches_dense_log() -> None:
+    kwargs = dict(
+        n_actions=50,
+        dim_context=3,
+        beta=-1.0,
+        reward_type="continuous",
+        reward_function=linear_reward_function,
+        n_deficient_actions=35,
+        random_state=6,
+    )
+    dense = SyntheticBanditDatasetWithActionEmbeds(**kwargs).obtain_batch_bandit_feedback(300)
+    sparse = SyntheticBanditDatasetWithActionEmbeds(
+        **kwargs, sparse_pi_b=True
+    ).obtain_batch_bandit_feedback(300)
+    assert isinstance(sparse["pi_b"], SparseRowPolicy)
+    assert sparse["pi_b"].indices.shape == (300, 15)
+    np.testing.assert_array_equal(sparse["pi_b"].to_dense(), dense["pi_b"])
+    for key in ("action", "action_embed", "pscore", "reward"):
+        np.testing.assert_array_equal(sparse[key], dense[key])
+    assert np.all(dense["pi_b"][np.arange(300), dense["action"], 0] == dense["pscore"])
+    assert np.all(np.count_nonzero(dense["pi_b"][:, :, 0], axis=1) == 15)
@@ -0,0 +1,43 @@
+import json
+
+from synthetic.timing import StageTimer, StageTiming, TimingCallback
+
+
+class _Collect(TimingCallback):
+    def __init__(self) -> None:
+        self.seen: list[StageTiming] = []
+        self.finished = 0
+
+    def on_stage(self, timing: StageTiming) -> None:
+        self.seen.append(timing)
+
+    def on_run_end(self, timings) -> None:
+        self.finished = len(timings)
+
+
+def test_stage_timer_records_and_forwards(tmp_path) -> None:
+    callback = _Collect()
+    timer = StageTimer(callbacks=[callback])
+    with timer.stage("ground_truth", sweep_value=3):
+        pass
+    worker = StageTimer(sweep_value=3, seed=1)
+    with worker.stage("mdr_regression"):
+        pass
+    with worker.stage("mdr_regression"):
+        pass
+    timer.extend(worker.records)
+    timer.finish()
+
+    assert [(t.stage, t.sweep_value, t.seed) for t in callback.seen] == [
+        ("ground_truth", 3, None),
+        ("mdr_regression", 3, 1),
+        ("mdr_regression", 3, 1),
+    ]
+    assert callback.finished == 3
+    assert list(timer.totals()) == ["ground_truth", "mdr_regression"]
+
+    timer.to_json(tmp_path / "timings.json")
+    payload = json.loads((tmp_path / "timings.json").read_text())
+    assert len(payload["stages"]) == 3
+    assert payload["stages"][1]["seed"] == 1
+    assert payload["total_seconds_by_stage"]["mdr_regression"] >= 0